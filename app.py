@@ -52,16 +52,22 @@ Options:
 import os
 import cmd
 import sys
-from pyfiglet import figlet_format
-from termcolor import cprint, colored
-from docopt import docopt, DocoptExit
-from terminaltables import AsciiTable
 
 from models.amity import Amity
 from models.config import Config
+from models.logger import colored, cprint
 from models.person import Staff, Fellow
 from models.room import Office, LivingSpace
 
+# pyfiglet, docopt and terminaltables are imported where they are used,
+# and termcolor the first time something is coloured, so that one-shot
+# commands do not pay for importing them at startup
+
+BANNER_FONT = 'colossal'
+
+# Set by main
+amity = None
+
 
 def docopt_cmd(func):
     """
@@ -74,11 +80,13 @@ def docopt_cmd(func):
 
         :param self:
         :type self:
-        :param args:
-        :type args:
+        :param args: A line typed in the shell, or the arguments already
+            split by the command line
+        :type args: string or list of strings
         :return:
         :rtype:
         """
+        from docopt import docopt, DocoptExit
         try:
             option = docopt(fn.__doc__, args)
         except DocoptExit as error:
@@ -103,14 +111,61 @@ def docopt_cmd(func):
     return fn
 
 
+def is_interactive():
+    """
+    Check that Amity is run from a terminal rather than a script or a pipe
+    :rtype: Boolean
+    """
+    return sys.stdin.isatty() and sys.stdout.isatty()
+
+
+def banner_cache_path(text, font):
+    cache_directory = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_directory, 'amity',
+                        'banner-%s-%s.txt' % (font, text))
+
+
+def render_banner(text='AMITY', font=BANNER_FONT):
+    """
+    Render text in a figlet font. The rendering is cached in a file, so
+    pyfiglet is only imported the first time a banner is shown
+    :param text:
+    :type text: string
+    :param font: figlet font name
+    :type font: string
+    :rtype: string
+    """
+    cache_path = banner_cache_path(text, font)
+    try:
+        with open(cache_path) as cache:
+            return cache.read()
+    except OSError:
+        pass
+    from pyfiglet import figlet_format
+    banner = figlet_format(text, font=font)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as cache:
+            cache.write(banner)
+    except OSError:
+        # Not being able to cache the banner only costs startup time
+        pass
+    return banner
+
+
 def print_header():
     """
-        Create a header to be displayed when the program starts
+        Create a header to be displayed when the program starts. Nothing
+        is shown when Amity is not run from a terminal
     """
-    os.system("clear")
+    if not is_interactive():
+        return
+    # Clear the screen with escape codes rather than running `clear`
+    sys.stdout.write("\033[H\033[2J")
     print("\n")
 
-    cprint(figlet_format('AMITY', font='colossal'), 'blue', attrs=[
+    cprint(render_banner(), 'blue', attrs=[
         'bold'])
     cprint('-' * 55, 'blue')
     cprint("%sA ROOM ALLOCATION SYSTEM." % (" " * 14), 'cyan')
@@ -193,6 +248,7 @@ def pretty_print_data(list_of_dicts):
     :param list_of_dicts:
     :type list_of_dicts:
     """
+    from terminaltables import AsciiTable
     if list_of_dicts:
         max_len = max([len(d) for d in list_of_dicts])
         headers = []
@@ -250,13 +306,21 @@ class AmityInteractive(cmd.Cmd):
     """
         The Amity Command Line Interface to be used for User interaction
     """
-    intro = colored("\nWelcome to my Amity!" +
-                    "\n\t<Type 'help' to see the list of available "
-                    "commands>\n", 'blue', attrs=['dark'])
 
-    amity_prompt = colored('Amity # ', 'blue', attrs=['bold'])
+    intro = ("\nWelcome to my Amity!" +
+             "\n\t<Type 'help' to see the list of available commands>\n")
+
+    amity_prompt = 'Amity # '
     prompt = amity_prompt
 
+    def preloop(self):
+        # Coloured when the loop starts rather than in the class body, so
+        # that one-shot commands do not import termcolor
+        if self.intro:
+            self.intro = colored(self.intro, 'blue', attrs=['dark'])
+        if self.prompt:
+            self.prompt = colored(self.prompt, 'blue', attrs=['bold'])
+
     @docopt_cmd
     def do_create_room(self, args):
         """
@@ -485,6 +549,14 @@ class AmityInteractive(cmd.Cmd):
         cprint("\n Ciao! :) \n", 'yellow', attrs=['reverse'])
         exit()
 
+    @staticmethod
+    def do_EOF(args):
+        """ Quits Amity at the end of piped input
+        :param args:
+        :type args:
+        """
+        return True
+
     @docopt_cmd
     def do_list_people(self, args):
         """
@@ -547,9 +619,32 @@ class AmityInteractive(cmd.Cmd):
                 pretty_print_data(allocated_staff + allocated_fellows)
 
 
-opt = docopt(__doc__, sys.argv[1:], True, 2.0)
-
-if opt['--interactive']:
-    print_header()
+def main(argv=None):
+    """
+    Run a single command, or the interactive shell with -i
+    :param argv: Command line arguments. Defaults to sys.argv[1:]
+    :type argv: list of strings
+    """
+    from docopt import docopt
+    global amity
+    if argv is None:
+        argv = sys.argv[1:]
+    opt = docopt(__doc__, argv, True, 2.0)
     amity = Amity()
-    AmityInteractive().cmdloop()
+    if opt['--interactive']:
+        print_header()
+        shell = AmityInteractive()
+        if is_interactive():
+            shell.cmdloop()
+        else:
+            # No welcome message or prompts when commands are piped in
+            shell.prompt = ''
+            shell.cmdloop('')
+    else:
+        # Pass the arguments on as a list rather than a line of text, so
+        # that quoted arguments with spaces are not split again
+        getattr(AmityInteractive(), 'do_' + argv[0])(argv[1:])
+
+
+if __name__ == '__main__':
+    main()
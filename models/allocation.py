@@ -0,0 +1,42 @@
+# coding=utf-8
+import random
+
+
+class SeatAllocator(object):
+    """
+    Allocates rooms to a whole cohort of people at once. The free capacity
+    of each room is computed a single time and expanded into one slot per
+    free seat. Shuffling the slots and pairing them with the people gives
+    every person a random room without rescanning the rooms per person
+    """
+
+    def __init__(self, rooms):
+        """
+        :param rooms: Rooms to allocate seats from
+        :type rooms: Iterable of Office or LivingSpace objects
+        """
+        self.seats = []
+        for room in rooms:
+            free_seats = room.get_max_occupants() - room.num_of_occupants
+            if free_seats > 0:
+                self.seats.extend([room] * free_seats)
+        random.shuffle(self.seats)
+
+    def __len__(self):
+        return len(self.seats)
+
+    def assign(self, people):
+        """
+        Pair people with free seats. People are served in order, so those
+        at the start of the list are allocated first when seats run out
+        :param people: People to be allocated a seat
+        :type people: List of Fellow or Staff objects
+        :return: (person, room) pairs and the people that got no seat
+        :rtype: Tuple of a list of tuples and a list of people
+        """
+        people = list(people)
+        count = min(len(people), len(self.seats))
+        # Seats are already shuffled, so take them from the end
+        seats = self.seats[len(self.seats) - count:]
+        del self.seats[len(self.seats) - count:]
+        return list(zip(people, seats)), people[count:]
@@ -1,12 +1,16 @@
 import os
-import re
 import sqlite3
-import random
-
-from termcolor import cprint, colored
+from collections import deque
+from itertools import islice
 
+from models.allocation import SeatAllocator
 from models.config import Config
-from models.database import Database
+from models.database import Database, connections as shared_connections
+from models.logger import ConsoleLogger, DEBUG, colored, cprint
+from models.parser import RejectedLine, RosterParser, parse_chunk
+from models.registry import ChainView, FellowRegistry, RegistryField, \
+    RoomRegistry, StaffRegistry
+from models.report import AllocationsReport
 from models.room import LivingSpace, Office, Room
 from models.person import Staff, Fellow
 
@@ -17,10 +21,113 @@ class Amity(object):
     Holds the data to be used in the application and the methods to act
     upon these data items
     """
-    offices = []  # List of Office objects
-    living_spaces = []  # List of LivingSpace objects
-    fellows = []  # List of Fellow objects
-    staff = []  # List of Staff objects
+    # Each Amity has its own lists. Use share_state or clone to work on
+    # the rooms and people of another Amity
+    offices = RegistryField(RoomRegistry)  # List of Office objects
+    living_spaces = RegistryField(RoomRegistry)  # List of LivingSpace objects
+    fellows = RegistryField(FellowRegistry)  # List of Fellow objects
+    staff = RegistryField(StaffRegistry)  # List of Staff objects
+    state_fields = ["offices", "living_spaces", "fellows", "staff"]
+
+    def __init__(self, logger=None, override_policy='prompt',
+                 connections=None):
+        """
+        :param logger: Where messages are sent. Defaults to coloured console
+            output. Use a SilentLogger or BufferedLogger for batch work
+        :type logger: Logger
+        :param override_policy: What to do when a reallocation or save_state
+            would override existing data. 'prompt' asks on the command line,
+            'always' and 'never' decide without asking. A callable is called
+            with the action ('reallocate' or 'override_database') and its
+            subjects and returns True to go ahead
+        :type override_policy: string or callable
+        :param connections: Keeps database connections open between saves
+            and loads. Defaults to one shared by all Amity instances
+        :type connections: ConnectionManager
+        """
+        if not callable(override_policy) and \
+                override_policy not in Config.override_policies:
+            raise ValueError("Invalid override policy '%s'" % override_policy)
+        self.logger = logger or ConsoleLogger()
+        self.override_policy = override_policy
+        self.connections = connections or shared_connections
+        # Set by query_database to answer the get_* queries from a database
+        self.queries = None
+
+    def share_state(self, other):
+        """
+        Use the same rooms and people as another Amity. Changes made through
+        either Amity are seen by both
+        :param other: The Amity to share with
+        :type other: Amity
+        """
+        for name in self.state_fields:
+            getattr(type(self), name).share(self, getattr(other, name))
+
+    @property
+    def synced_database(self):
+        """
+        Absolute path of the database that holds every change Amity has not
+        recorded in its registries. save_state only writes those changes
+        when saving back to it. None if the registries are not all in step
+        with the same database
+        :rtype: string
+        """
+        databases = set(getattr(self, name).synced_database
+                        for name in self.state_fields)
+        return databases.pop() if len(databases) == 1 else None
+
+    @synced_database.setter
+    def synced_database(self, database_file_path):
+        for name in self.state_fields:
+            getattr(self, name).synced_database = database_file_path
+
+    def clone(self):
+        """
+        Copy this Amity, including copies of all its rooms and people.
+        Allocations in the copy do not affect this Amity, e.g. to try out
+        an allocation before committing to it
+        :return: The copy
+        :rtype: Amity
+        """
+        amity = type(self)(logger=self.logger,
+                           override_policy=self.override_policy,
+                           connections=self.connections)
+        rooms = {}
+
+        def copy_room(room):
+            if room is None:
+                return None
+            if room not in rooms:
+                rooms[room] = type(room)(room.name)
+            return rooms[room]
+
+        amity.offices = [copy_room(office) for office in self.offices]
+        amity.living_spaces = [copy_room(living_space)
+                               for living_space in self.living_spaces]
+        fellows = []
+        for fellow in self.fellows:
+            copy = Fellow(fellow.first_name, fellow.last_name,
+                          person_id=fellow.person_id,
+                          allocated_living_space=copy_room(
+                              fellow.allocated_living_space),
+                          wants_accommodation=fellow.wants_accommodation)
+            copy.allocated_office_space = copy_room(
+                fellow.allocated_office_space)
+            fellows.append(copy)
+        staff = []
+        for person in self.staff:
+            copy = Staff(person.first_name, person.last_name,
+                         person_id=person.person_id)
+            copy.allocated_office_space = copy_room(
+                person.allocated_office_space)
+            staff.append(copy)
+        amity.fellows = fellows
+        amity.staff = staff
+        # Counts can include people that are not in Amity
+        for room, copy in rooms.items():
+            copy.num_of_occupants = room.num_of_occupants
+        return amity
 
     def create_room(self, room_names, room_type='office'):
         """
@@ -42,8 +149,8 @@ class Amity(object):
         for room_name in room_names:
             # if not isinstance(room_name, str):
             #     raise TypeError
-            if room_name.lower() not in ([room.name.lower() for room in
-                                          self.get_all_rooms()]):
+            if not self.offices.find(room_name) and \
+                    not self.living_spaces.find(room_name):
                 try:
                     if room_type in Config.allowed_living_space_strings:
                         new_living_space = LivingSpace(room_name)
@@ -60,7 +167,7 @@ class Amity(object):
         return new_rooms
 
     def add_person(self, first_name, last_name, role,
-                   wants_accommodation=False):
+                   wants_accommodation=False, allocate=True):
         """
         Create a new person object and randomly assigns a room to them
         :param first_name: First name of the new person
@@ -72,6 +179,10 @@ class Amity(object):
         :param wants_accommodation: If the new person wants accommodation or
                 not
         :type wants_accommodation: Boolean
+        :param allocate: Randomly allocate rooms to the new person. Callers
+            that add many people can allocate them all at once with
+            batch_allocate instead
+        :type allocate: Boolean
         :return: New Person
         :rtype: Person Subclass instance
         """
@@ -79,15 +190,22 @@ class Amity(object):
             return Config.error_codes[7] + " '%s'" % wants_accommodation
         try:
             if role.lower() in Config.allowed_fellow_strings:
-                new_person = Fellow(first_name, last_name)
-                new_person.wants_accommodation = wants_accommodation
-                self.fellows.append(new_person)
+                # IDs are allocated under the fellows lock whatever the role
+                with self.fellows.lock:
+                    new_person = Fellow(first_name, last_name,
+                                        person_id=self.allocate_person_id())
+                    new_person.wants_accommodation = wants_accommodation
+                    self.fellows.append(new_person)
 
             elif role.lower() in Config.allowed_staff_strings:
-                new_person = Staff(first_name, last_name)
-                self.staff.append(new_person)
+                with self.fellows.lock:
+                    new_person = Staff(first_name, last_name,
+                                       person_id=self.allocate_person_id())
+                    self.staff.append(new_person)
             else:
                 return Config.error_codes[5] + " '%s'" % role
+            if not allocate:
+                return new_person
             # Randomly allocate office to new person
             self.randomly_allocate_room(
                 new_person, Config.allowed_office_strings[0])
@@ -120,27 +238,45 @@ class Amity(object):
         :rtype: Fellow or Staff object
         """
         try:
-            if room.get_max_occupants() - room.num_of_occupants:
-                # Should not assign a living space to a staff member
-                if isinstance(person, Staff) and isinstance(room, LivingSpace):
-                    return Config.error_codes[10]
+            if room.get_max_occupants() - room.num_of_occupants <= 0:
+                return Config.error_codes[11]
+            # Should not assign a living space to a staff member
+            if isinstance(person, Staff) and isinstance(room, LivingSpace):
+                return Config.error_codes[10]
 
-                if not override:
-                    if not self.handle_override_room_allocation(person, room):
-                        return
+            # Confirm before locking so that no lock is held while prompting
+            if not override:
+                if not self.handle_override_room_allocation(person, room):
+                    return
 
+            with self.room_lock(room):
+                # Check again, another thread may have filled the room
+                if room.get_max_occupants() - room.num_of_occupants <= 0:
+                    return Config.error_codes[11]
                 if isinstance(room, Office):
-                    print("Allocated office space")
+                    self.logger.debug("Allocated office space")
                     person.allocated_office_space = room
                 elif isinstance(room, LivingSpace):
-                    print("Allocated living space")
+                    self.logger.debug("Allocated living space")
                     person.allocated_living_space = room
-            else:
-                return Config.error_codes[11]
             return person
         except AttributeError as error:
             raise error
 
+    def room_lock(self, room):
+        """
+        Get the lock to hold while checking and changing the occupancy of a
+        room. All offices share one lock and all living spaces another, so
+        moving a person between two rooms only takes one lock
+        :param room:
+        :type room: Office or LivingSpace object
+        :return: Lock of the registry for the room's type
+        :rtype: threading.RLock
+        """
+        if isinstance(room, LivingSpace):
+            return self.living_spaces.lock
+        return self.offices.lock
+
     def handle_override_room_allocation(self, person, room):
         """
         Handle the overriding of an already allocated room
@@ -157,7 +293,7 @@ class Amity(object):
             and isinstance(person.allocated_living_space, LivingSpace)
         reallocate = True
         if already_allocated_office:
-            print("Already allocated office")
+            self.logger.debug("Already allocated office")
             if person.allocated_office_space == room:
                 self.print_error(
                     "'%s %s' already allocated office '%s'" %
@@ -168,8 +304,9 @@ class Amity(object):
             self.print_info("About to move %s from %s to %s" % (
                 person.first_name,
                 person.allocated_office_space.name, room.name))
-            reallocate = self.handle_yes_no_input(
-                "Move? (Y/N): ", "Aborting Reallocation")
+            reallocate = self.confirm_override(
+                "Move? (Y/N): ", "Aborting Reallocation",
+                'reallocate', person, room)
         elif already_allocated_living_space:
             if person.allocated_living_space == room:
                 self.print_error("'%s %s' already allocated "
@@ -181,8 +318,9 @@ class Amity(object):
             self.print_info("About to move %s from %s to %s" % (
                 person.first_name,
                 person.allocated_living_space.name, room.name))
-            reallocate = self.handle_yes_no_input(
-                "Move? (Y/N): ", "Aborted Reallocation")
+            reallocate = self.confirm_override(
+                "Move? (Y/N): ", "Aborted Reallocation",
+                'reallocate', person, room)
         if not reallocate:
             return False  # Abort Mission
         else:
@@ -202,14 +340,6 @@ class Amity(object):
                 Config.allowed_office_strings:
             return Config.error_codes[6] + " '%s'" % room_type
 
-        offices_not_full = [office for office in self.offices
-                            if office.get_max_occupants() -
-                            office.num_of_occupants]
-        living_spaces_not_full = [living_space for living_space in
-                                  self.living_spaces
-                                  if living_space.get_max_occupants() -
-                                  living_space.num_of_occupants]
-
         room = None
         if room_type in Config.allowed_office_strings:
             if not self.offices:
@@ -217,14 +347,13 @@ class Amity(object):
                     "There exists no offices to assign to '%s %s'" % (
                         person.first_name, person.last_name))
                 return None
-            if offices_not_full:
-                self.print_info("Randomly allocating office to %s..." %
-                                person.first_name)
-                # Randomly select an non full office
-                office = random.choice(offices_not_full)
-                self.allocate_room_to_person(person, office)
-                room = office
-                self.print_info_result("Allocated office: %s" % room.name)
+            if self.offices.free:
+                self.logger.info("Randomly allocating office to %s...",
+                                 person.first_name, level=DEBUG)
+            room = self.allocate_free_room(person, self.offices)
+            if room:
+                self.logger.result("Allocated office: %s", room.name,
+                                   level=DEBUG)
             else:
                 self.print_info("All offices are full. No office to "
                                 "allocate to '%s %s'" %
@@ -235,30 +364,57 @@ class Amity(object):
                     "There exists no living spaces to assign to fellow "
                     "'%s %s'" % (person.first_name, person.last_name))
                 return None
-            if living_spaces_not_full:
-                self.print_info("Randomly allocating living space to %s..." %
-                                person.first_name)
-                # Randomly select a non full living space
-                living_space = random.choice(living_spaces_not_full)
-                self.allocate_room_to_person(person, living_space)
-                room = living_space
-                self.print_info_result("Allocated living space: %s" %
-                                       room.name)
+            if self.living_spaces.free:
+                self.logger.info("Randomly allocating living space to %s...",
+                                 person.first_name, level=DEBUG)
+            room = self.allocate_free_room(person, self.living_spaces)
+            if room:
+                self.logger.result("Allocated living space: %s", room.name,
+                                   level=DEBUG)
                 # Reset wants accommodation to False since they now
-                # have accommodation
-                person.wants_accommodation = False
+                # have accommodation. Staff do not have the preference
+                if isinstance(person, Fellow):
+                    person.wants_accommodation = False
             else:
                 self.print_info("All living spaces are full. No living space "
                                 "to allocate to '%s %s'" %
                                 (person.first_name, person.last_name))
         return room
 
-    def load_people(self, filename, path=None):
+    def allocate_free_room(self, person, rooms):
         """
-        :param filename:
-        :type filename:
-        :return:
-        :rtype:
+        Allocate a randomly selected room that is not full
+        :param person: Person to be allocated a room
+        :type person: Fellow or Staff object
+        :param rooms: Offices or living spaces
+        :type rooms: RoomRegistry
+        :return: The selected room, or None if all the rooms are full
+        :rtype: Office or LivingSpace object
+        """
+        while True:
+            with rooms.lock:
+                room = rooms.free.choice()
+            if not room:
+                return None
+            # The room can fill up between selecting and allocating it
+            if self.allocate_room_to_person(person, room) != \
+                    Config.error_codes[11]:
+                return room
+
+    def load_people(self, filename, path=None, stream=False):
+        """
+        Add the people listed in a file, one person per line, and randomly
+        allocate rooms to them
+        :param filename: Name of the file to load
+        :type filename: string
+        :param path: Directory containing the file
+        :type path: string
+        :param stream: Only count the loaded people instead of returning
+            them, so that the whole file is never held in memory
+        :type stream: Boolean
+        :return: The loaded people, or counts of the loaded fellows and
+            staff and of the ignored lines when streaming
+        :rtype: List of Fellow and Staff objects or a dictionary
         """
         if path:
             file_path = path + "/" + filename
@@ -266,44 +422,28 @@ class Amity(object):
             file_path = filename
         try:
             with open(file_path) as file_input:
-                people = file_input.readlines()
-            if not len(" ".join([person.strip() for person in people])):
+                # The file is read lazily, a line at a time
+                loaded_people = []
+                counts = {'fellows': 0, 'staff': 0, 'ignored': 0}
+                lines = 0
+                for person in self.add_people_from_lines(file_input):
+                    lines += 1
+                    if person is None:
+                        counts['ignored'] += 1
+                        continue
+                    counts['fellows' if isinstance(person, Fellow)
+                           else 'staff'] += 1
+                    if not stream:
+                        loaded_people.append(person)
+
+            if not lines:
+                # The file only has blank lines
                 return Config.error_codes[13] + " '%s'" % filename
-
-            loaded_people = []
-            for person in people:
-                # match the required formatting for each line
-                if re.match('^(\w+\s\w+\s(FELLOW|STAFF|F|S)'
-                            '(\s(YES|Y|NO|N))?)$', person.strip(),
-                            re.IGNORECASE):
-                    # proceed to create the objects else ignore the bad line
-                    person_data = person.strip().split()
-                    wants_accommodation = False
-                    if len(person_data) == 4:
-                        if person_data[3] in Config.allowed_yes_strings:
-                            wants_accommodation = True
-
-                    if person_data[2].lower() in Config.allowed_fellow_strings:
-                        fellow = self.add_person(
-                            person_data[0], person_data[1],
-                            Config.allowed_fellow_strings[0],
-                            wants_accommodation)
-                        loaded_people.append(fellow)
-                    elif person_data[2].lower() in \
-                            Config.allowed_staff_strings:
-                        staff = self.add_person(
-                            person_data[0],
-                            person_data[1],
-                            Config.allowed_staff_strings[0],
-                            wants_accommodation)
-                        loaded_people.append(staff)
-                else:
-                    self.print_info("Ignoring badly formatted line: %s " %
-                                    person.strip())
-
-            if not loaded_people:
+            if lines == counts['ignored']:
                 # None of the lines had the required format
                 return Config.error_codes[14] + " '%s'" % filename
+            if stream:
+                return counts
             return loaded_people
 
         except FileNotFoundError:
@@ -311,6 +451,128 @@ class Amity(object):
         except TypeError as error:
             raise error
 
+    def import_people(self, filenames, path=None, workers=None,
+                      chunk_size=5000, executor=None):
+        """
+        Add the people listed in several files and allocate rooms to all of
+        them in a single pass. The files are split into chunks of lines
+        that are parsed in parallel by a pool of processes. Only parsing
+        runs in the pool, the people are added and allocated in this
+        process, which takes most of the time for large files
+        :param filenames: Names of the files to load
+        :type filenames: List of strings
+        :param path: Directory containing the files
+        :type path: string
+        :param workers: Number of processes. Defaults to the number of CPUs
+        :type workers: int
+        :param chunk_size: Number of lines parsed by each task
+        :type chunk_size: int
+        :param executor: Executor to parse in instead of a new process pool
+        :type executor: concurrent.futures.Executor
+        :return: The new people and a report per file, in the order given,
+            with the file name, the number of people loaded, the number of
+            lines ignored and an error message if the file could not be
+            loaded
+        :rtype: Dictionary
+        """
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        if executor is None:
+            # Imported here, multiprocessing is slow to import at startup
+            from concurrent.futures import ProcessPoolExecutor
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        # Chunks waiting to be added. Only a few per worker are submitted
+        # ahead, so a large file is never held in memory all at once
+        max_pending = 2 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        files = []
+        people = []
+
+        def add_parsed(report, task):
+            # Add people in file and line order, whatever order the chunks
+            # finish in
+            for record in task.result():
+                if isinstance(record, RejectedLine):
+                    report['ignored'] += 1
+                    continue
+                people.append(self.add_person(
+                    record.first_name, record.last_name, record.role,
+                    record.wants_accommodation, allocate=False))
+                report['loaded'] += 1
+
+        try:
+            for filename in filenames:
+                # A report per file given, a name given twice is loaded and
+                # reported twice
+                report = {'filename': filename, 'loaded': 0, 'ignored': 0,
+                          'error': None}
+                files.append(report)
+                file_path = path + "/" + filename if path else filename
+                try:
+                    with open(file_path) as file_input:
+                        first_line_number = 1
+                        while True:
+                            lines = list(islice(file_input, chunk_size))
+                            if not lines:
+                                break
+                            if len(pending) >= max_pending:
+                                add_parsed(*pending.popleft())
+                            pending.append((report, pool.submit(
+                                parse_chunk, lines, first_line_number)))
+                            first_line_number += len(lines)
+                except FileNotFoundError:
+                    report['error'] = \
+                        Config.error_codes[12] + " '%s'" % filename
+                except OSError as error:
+                    # e.g. a directory or a file without read permission
+                    report['error'] = Config.error_codes[19] + \
+                        " '%s': %s" % (filename, error.strerror)
+            while pending:
+                add_parsed(*pending.popleft())
+        finally:
+            # Chunks are only left over if adding people failed
+            for _, task in pending:
+                task.cancel()
+            if not executor:
+                pool.shutdown()
+
+        for report in files:
+            if not report['error'] and not report['loaded']:
+                report['error'] = Config.error_codes[
+                    14 if report['ignored'] else 13] + \
+                    " '%s'" % report['filename']
+            if report['error']:
+                self.print_error(report['error'])
+            else:
+                self.print_info("Loaded %s people from '%s', ignored %s "
+                                "line(s)" % (report['loaded'],
+                                             report['filename'],
+                                             report['ignored']))
+        self.batch_allocate(
+            people, [person for person in people
+                     if isinstance(person, Fellow) and
+                     person.wants_accommodation])
+        return {'people': people, 'files': files}
+
+    def add_people_from_lines(self, lines):
+        """
+        Add a person for every correctly formatted line and randomly
+        allocate rooms to them. Lines are consumed one at a time
+        :param lines: Lines in the format 'FIRST LAST FELLOW|STAFF [Y|N]'
+        :type lines: Iterable of strings e.g. an open file
+        :return: Generator of the new people, with None for each badly
+            formatted line. Blank lines are skipped
+        :rtype: Generator
+        """
+        for record in RosterParser().parse(lines):
+            if isinstance(record, RejectedLine):
+                self.print_info("Ignoring badly formatted line %s: %s " %
+                                (record.line_number, record.line))
+                yield None
+            else:
+                yield self.add_person(record.first_name, record.last_name,
+                                      record.role, record.wants_accommodation)
+
     def print_allocated_people(self, filename=None, path=None):
         """
 
@@ -448,9 +710,9 @@ class Amity(object):
         """
         if not isinstance(room_name, str):
             raise TypeError
-        rooms = self.get_all_rooms()
         room_name = room_name.lower()
-        if rooms:
+        # In query mode the rooms are in the database or columns queried
+        if self.queries or self.get_all_rooms():
             people = self.get_people_allocated_room(room_name)
             if isinstance(people, str):
                 return people
@@ -479,23 +741,49 @@ class Amity(object):
         :return:
         :rtype:
         """
+        if self.queries:
+            return self.queries.get_people_allocated_room(room_name)
         room = self.get_room_object_from_name(room_name)
-        if isinstance(room, Office):
-            return [person for person in self.get_all_people() if
-                    person.allocated_office_space == room]
-        elif isinstance(room, LivingSpace):
-            return [fellow for fellow in self.fellows if
-                    fellow.allocated_living_space == room]
+        if isinstance(room, (Office, LivingSpace)):
+            return self.get_occupants_in_order(room)
         else:
             return room
 
+    def get_occupants_in_order(self, room):
+        """
+        Get the people in Amity allocated a room from the room's occupants
+        instead of scanning all people
+        :param room:
+        :type room: Office or LivingSpace object
+        :return: Fellows then staff, in the order they were added, as in
+            get_all_people
+        :rtype: list of Fellow and Staff objects
+        """
+        # People who are no longer in Amity can still point at the room
+        people = []
+        for person in room.get_occupants():
+            if isinstance(person, Fellow):
+                order = (0, self.fellows.added_order(person))
+            else:
+                order = (1, self.staff.added_order(person))
+            if order[1] is not None:
+                people.append((order, person))
+        people.sort(key=lambda entry: entry[0])
+        return [person for order, person in people]
+
     def print_allocations(self, filename=None, path=None):
         """
         Prints rooms and the people allocated to those rooms
+        :param filename: File to write the allocations to, or a file-like
+            object e.g. sys.stdout. Prints in colour to the console if not
+            given
+        :type filename: string or file-like object
+        :param path: Directory of the file
+        :type path: string
         """
         try:
             if not filename:
-                rooms = self.get_all_rooms()
+                rooms = self.get_rooms_to_print()
                 if rooms:
                     for room in rooms:
                         self.print_subtitle(room.name)
@@ -504,6 +792,10 @@ class Amity(object):
                             cprint(people, 'yellow')
                 else:
                     return "There are no rooms yet"
+            elif hasattr(filename, 'write'):
+                # A file-like object, e.g. sys.stdout
+                self.report_empty_rooms(
+                    self.get_allocations_report().write(filename))
             else:
                 if not isinstance(filename, str):
                     raise TypeError
@@ -515,33 +807,82 @@ class Amity(object):
                     file_path = path + "/" + filename
                 else:
                     file_path = filename
-                # Empty the file first
-                open(file_path, 'w').close()
-                for room in self.get_all_rooms():
-                    people = self.print_room(room.name, False)
-                    if not isinstance(people, str):
-                        with open(file_path, 'a') as file_w:
-                            file_w.write("%s\n%s\n" % (room.name, '-' * len(
-                                room.name)))
-                            for person in people:
-                                if isinstance(person, Staff):
-                                    file_w.write("%s %s %s\n" % (
-                                        person.first_name,
-                                        person.last_name,
-                                        "Staff"))
-                                else:
-                                    file_w.write("%s %s %s\n" % (
-                                        person.first_name,
-                                        person.last_name,
-                                        "Fellow"))
-                            file_w.write("\n")
-                    else:
-                        self.print_info(people)
+                self.report_empty_rooms(
+                    self.get_allocations_report().write(file_path))
                 self.print_info("Allocations saved to the file '%s'"
                                 % (file_path))
         except FileNotFoundError as error:
             self.print_error("%s" % error)
 
+    def export_people(self, filename, export_format='csv', path=None):
+        """
+        Write everyone in Amity and their allocations for other programs
+        :param filename: File to write to, or a file-like object
+        :type filename: string or file-like object
+        :param export_format: 'csv', 'jsonl' (JSON Lines) or 'columns'
+            (binary columns, see models.export.read_columns)
+        :type export_format: string
+        :param path: Directory of the file
+        :type path: string
+        """
+        if export_format not in Config.export_formats:
+            raise ValueError("Invalid export format '%s'" % export_format)
+        if hasattr(filename, 'write'):
+            output = filename
+        elif isinstance(filename, str):
+            # Clean filename. Remove unwanted filename characters
+            filename = ''.join(x for x in filename if x not in
+                               "\"'\\/:*?<>|")
+            output = path + "/" + filename if path else filename
+        else:
+            raise TypeError
+        # The export, snapshot, queries and columns modules are imported
+        # where they are used, most commands need none of them
+        from models.export import Exporter
+        exporter = Exporter(self)
+        try:
+            if export_format == 'csv':
+                exporter.write_csv(output)
+            elif export_format == 'jsonl':
+                exporter.write_json_lines(output)
+            else:
+                exporter.write_columns(output)
+        except FileNotFoundError as error:
+            self.print_error("%s" % error)
+            return
+        if isinstance(output, str):
+            self.print_info("Exported people to the file '%s'" % output)
+
+    def get_allocations_report(self):
+        """
+        Group the people in Amity by the rooms they are allocated
+        :rtype: AllocationsReport
+        """
+        if self.queries:
+            occupants = {}
+            for room in self.get_rooms_to_print():
+                people = self.get_people_allocated_room(room.name)
+                occupants[room] = people if isinstance(people, list) else []
+            return AllocationsReport(occupants)
+        # Each room's occupant index, rather than a scan of everyone
+        return AllocationsReport({room: self.get_occupants_in_order(room)
+                                  for room in self.get_all_rooms()})
+
+    def get_rooms_to_print(self):
+        """
+        Get the rooms the print methods list. In query mode these are the
+        rooms of the database or columns queried, not Amity's own rooms
+        :rtype: list of Office and LivingSpace objects
+        """
+        if self.queries:
+            return self.queries.get_all_rooms()
+        return self.get_all_rooms()
+
+    def report_empty_rooms(self, rooms):
+        for room in rooms:
+            self.print_info(Config.error_codes[16] + ": '%s'"
+                            % room.name.lower())
+
     def save_state(self, database_name=None, path=None, override=False):
         """
         Saves data from amity into a specified database file
@@ -551,7 +892,8 @@ class Amity(object):
         :type database_name:
         :param override:
         :type override:
-        :return:
+        :return: False if overriding the database was declined, an error
+            message if nothing could be saved, else None
         :rtype:
         """
         try:
@@ -568,46 +910,39 @@ class Amity(object):
             else:
                 database_file_path = database_name
 
-            if not self.offices + self.living_spaces + self.fellows \
-                    + self.staff:
+            if not any((self.offices, self.living_spaces, self.fellows,
+                        self.staff)):
                 return "No data to save"
             self.print_info("Database path: '%s'" % database_file_path)
             if os.path.isfile(database_file_path) and not override and \
                     database_name != Config.default_db_name:
                 self.print_info(
                     "About to override database '%s'" % database_name)
-                override = self.handle_yes_no_input(
-                    "Override? (Y/N): ", "Aborted save state")
+                override = self.confirm_override(
+                    "Override? (Y/N): ", "Aborted save state",
+                    'override_database', database_file_path)
                 if not override:
-                    return
+                    return False
             elif not os.path.isfile(database_file_path):
                 return Config.error_codes[18] + " '%s'" % database_name
 
             self.print_info("Database Path: %s" % database_file_path)
-            connection = sqlite3.connect(database_file_path)
+            connection = self.connections.connect(database_file_path)
 
             if isinstance(connection, sqlite3.Connection):
-                cursor = connection.cursor()
-                self.print_info("Creating rooms table...")
-                Database.create_rooms_table(cursor)
-                self.print_info("Creating people table...")
-                Database.create_people_table(cursor)
-
-                # Save data to database
-                if self.get_all_rooms():
-                    self.print_info("Saving rooms to Database...")
-                    Database.insert_room_data(
-                        cursor, self.tuplize_room_data(self.get_all_rooms()))
-                if self.fellows:
-                    self.print_info("Saving fellows to Database...")
-                    Database.insert_people_data(
-                        cursor, self.tuplize_fellow_data(self.fellows))
-                if self.staff:
-                    self.print_info("Saving staff to Database...")
-                    Database.insert_people_data(
-                        cursor, self.tuplize_staff_data(self.staff))
-                connection.commit()
-                connection.close()
+                if self.connections.create_tables(connection):
+                    self.print_info("Created rooms and people tables")
+
+                # Everything is written in a single transaction
+                with self.connections.transaction(connection) as cursor:
+                    if self.synced_database == os.path.abspath(
+                            database_file_path):
+                        self.reserve_database_ids(cursor)
+                        self.save_changes(cursor)
+                    else:
+                        self.reserve_database_ids(cursor, renumber=True)
+                        self.save_all(cursor)
+                self.mark_synced(database_file_path)
                 self.print_info("Data Saved Successfully")
             else:
                 self.print_info("Data not saved")
@@ -616,10 +951,119 @@ class Amity(object):
             raise error
         except FileNotFoundError as error:
             self.print_error("%s" % error)
-        except sqlite3.OperationalError as error:
+        except (sqlite3.OperationalError, sqlite3.ProgrammingError) as error:
             # Print out the sqlite error
             self.print_error("%s" % error)
 
+    def save_all(self, cursor):
+        """
+        Write every room and person in Amity to the database
+        :param cursor:
+        :type cursor:
+        """
+        if self.get_all_rooms():
+            self.print_info("Saving rooms to Database...")
+            Database.insert_room_data(
+                cursor, self.tuplize_room_data(self.get_all_rooms()))
+        if self.fellows:
+            self.print_info("Saving fellows to Database...")
+            Database.insert_people_data(
+                cursor, self.tuplize_fellow_data(self.fellows))
+        if self.staff:
+            self.print_info("Saving staff to Database...")
+            Database.insert_people_data(
+                cursor, self.tuplize_staff_data(self.staff))
+
+    def save_changes(self, cursor):
+        """
+        Write only the rooms and people that changed since the database was
+        last saved or loaded, and delete the ones that were removed
+        :param cursor:
+        :type cursor:
+        """
+        rooms = self.offices.dirty | self.living_spaces.dirty
+        fellows = set(self.fellows.dirty)
+        staff = set(self.staff.dirty)
+        # People store the names of their rooms, so renamed rooms change
+        # the rows of their occupants
+        for room in rooms:
+            for person in room.get_occupants():
+                if isinstance(person, Fellow):
+                    if self.fellows.added_order(person) is not None:
+                        fellows.add(person)
+                elif self.staff.added_order(person) is not None:
+                    staff.add(person)
+
+        # Delete first so that a key removed and then reused is kept
+        removed_rooms = self.offices.removed | self.living_spaces.removed
+        if removed_rooms:
+            self.print_info("Deleting %s room(s) from Database..."
+                            % len(removed_rooms))
+            Database.delete_room_data(cursor, removed_rooms)
+        removed_people = self.fellows.removed | self.staff.removed
+        if removed_people:
+            self.print_info("Deleting %s people from Database..."
+                            % len(removed_people))
+            Database.delete_people_data(cursor, removed_people)
+
+        if rooms:
+            self.print_info("Saving %s room(s) to Database..." % len(rooms))
+            Database.insert_room_data(cursor, self.tuplize_room_data(rooms))
+        if fellows:
+            self.print_info("Saving %s fellow(s) to Database..."
+                            % len(fellows))
+            Database.insert_people_data(
+                cursor, self.tuplize_fellow_data(fellows))
+        if staff:
+            self.print_info("Saving %s staff to Database..." % len(staff))
+            Database.insert_people_data(
+                cursor, self.tuplize_staff_data(staff))
+
+    def reserve_database_ids(self, cursor, renumber=False):
+        """
+        Stop Amity allocating IDs already used in a database. IDs are
+        allocated from 1 in every session, so people added in different
+        sessions can have the same ID
+        :param cursor:
+        :type cursor:
+        :param renumber: Also give new IDs to people in Amity whose ID is
+            used in the database by someone else, i.e. by a person with
+            another name or role
+        :type renumber: Boolean
+        :return: People given new IDs
+        :rtype: list
+        """
+        highest_id = Database.get_highest_person_id(cursor)
+        self.fellows.reserve_ids(highest_id)
+        self.staff.reserve_ids(highest_id)
+        if not renumber:
+            return []
+        saved = {person_id: (first_name, last_name, role.lower() in
+                             Config.allowed_fellow_strings)
+                 for person_id, first_name, last_name, role in
+                 Database.find_person_names(
+                     cursor, [person.person_id for person in
+                              self.get_all_people()])}
+        renumbered = [person for person in self.get_all_people()
+                      if person.person_id in saved and
+                      saved[person.person_id] != (
+                          person.first_name, person.last_name,
+                          isinstance(person, Fellow))]
+        for person in renumbered:
+            person.person_id = self.allocate_person_id()
+        return renumbered
+
+    def mark_synced(self, database_file_path):
+        """
+        Record that a database holds all of Amity's data
+        :param database_file_path: Path of the database
+        :type database_file_path: string
+        """
+        for registry in (self.offices, self.living_spaces, self.fellows,
+                         self.staff):
+            registry.mark_clean()
+        self.synced_database = os.path.abspath(database_file_path)
+
     def load_state(self, database_name=None, path=None):
         """
         Loads Data from an SQLITE Database into Amity
@@ -648,7 +1092,7 @@ class Amity(object):
             if not os.path.isfile(database_file_path):
                 return Config.error_codes[18] + " '%s'" % database_name
 
-            connection = sqlite3.connect(database_file_path)
+            connection = self.connections.connect(database_file_path)
             if isinstance(connection, sqlite3.Connection):
                 self.print_info("Loading data from the database...")
                 cursor = connection.cursor()
@@ -656,23 +1100,187 @@ class Amity(object):
                 if Database.database_is_empty(cursor):
                     return "No data to Load. Empty database '%s'" % \
                            database_name
+                was_empty = not self.get_all_rooms() and \
+                    not self.get_all_people()
+                # Loaded people are matched to people in Amity by ID, which
+                # only identifies the same person in the synced database
+                self.reserve_database_ids(
+                    cursor, renumber=self.synced_database != os.path.abspath(
+                        database_file_path))
                 people = Database.get_all_people(cursor)
                 rooms = Database.get_all_rooms(cursor)
                 room_objects = self.add_room_database_data_to_amity(rooms)
                 people_objects = self.add_people_database_data_to_amity(people)
 
-                connection.close()
+                cursor.close()
+                if was_empty:
+                    self.mark_synced(database_file_path)
+                elif self.synced_database == os.path.abspath(
+                        database_file_path):
+                    # Loaded objects match the database, anything else
+                    # still has to be saved
+                    self.offices.mark_clean(room_objects["loaded_offices"])
+                    self.living_spaces.mark_clean(
+                        room_objects["loaded_living_spaces"])
+                    self.fellows.mark_clean(
+                        people_objects["loaded_fellows"] +
+                        people_objects["modified_fellows"])
+                    self.staff.mark_clean(
+                        people_objects["loaded_staff"] +
+                        people_objects["modified_staff"])
                 return {"people": people_objects, "rooms": room_objects}
             else:
                 return connection
         except FileNotFoundError as error:
             self.print_error("%s" % error)
-        except sqlite3.OperationalError as error:
+        except (sqlite3.OperationalError, sqlite3.ProgrammingError) as error:
             self.print_error("%s" % error)
 
-    def add_people_database_data_to_amity(self, people_list):
+    def save_snapshot(self, filename, path=None):
+        """
+        Write Amity's rooms and people to a binary snapshot file that
+        load_snapshot reads back much faster than load_state. The database
+        is still where data is kept, save_state as well to keep changes
+        :param filename:
+        :type filename: string
+        :param path: Directory of the file
+        :type path: string
+        """
+        if not isinstance(filename, str):
+            raise TypeError
+        file_path = path + "/" + filename if path else filename
+        from models.snapshot import write_snapshot
+        try:
+            write_snapshot(self, file_path)
+        except FileNotFoundError as error:
+            self.print_error("%s" % error)
+            return
+        self.print_info("Snapshot saved to the file '%s'" % file_path)
+
+    def load_snapshot(self, filename, path=None):
+        """
+        Load the rooms and people of a snapshot file into an empty Amity.
+        Loaded rooms and people count as unsaved changes in save_state
+        :param filename:
+        :type filename: string
+        :param path: Directory of the file
+        :type path: string
+        :return: Number of rooms and people loaded, or an error message
+        :rtype: dict or string
+        """
+        if not isinstance(filename, str):
+            raise TypeError
+        file_path = path + "/" + filename if path else filename
+        if not os.path.isfile(file_path):
+            return "%s '%s'" % (Config.error_codes[12], file_path)
+        if self.get_all_rooms() or self.get_all_people():
+            return "Snapshots can only be loaded into an empty Amity"
+        from models.snapshot import Snapshot
+        try:
+            with Snapshot(file_path) as snapshot:
+                snapshot.restore(self)
+                return {"rooms": snapshot.num_of_rooms,
+                        "people": len(snapshot)}
+        except ValueError as error:
+            self.print_error("%s" % error)
+            return "%s" % error
+
+    def query_database(self, database_name=None, path=None):
+        """
+        Answer the get_* queries with SQL queries on a saved database
+        instead of from the rooms and people in memory. Nothing is loaded,
+        so this works for databases too large to load. The print methods
+        report on the database too, listing fellows first and then people
+        by ID, the order load_state adds them in. Adding and allocating
+        still work on the rooms and people in memory
+        :param database_name:
+        :type database_name: string
+        :param path:
+        :type path: string
+        :return: An error message if the database cannot be queried
+        :rtype: string
+        """
+        connection = self.connect_to_saved_database(database_name, path)
+        if not isinstance(connection, sqlite3.Connection):
+            return connection
+        from models.queries import DatabaseQueries
+        self.queries = DatabaseQueries(connection)
+
+    def query_columns(self, columns=None, database_name=None, path=None):
+        """
+        Answer the get_* queries from people stored as columns rather than
+        as objects. The columns are a copy, later changes to Amity or to
+        the database are not seen until query_columns is called again
+        :param columns: Columns to query. By default the rooms and people
+            currently in Amity are copied into columns
+        :type columns: PeopleColumns
+        :param database_name: Copy the rooms and people of this saved
+            database into columns instead, without creating an object per
+            person
+        :type database_name: string
+        :param path: Directory of the database
+        :type path: string
+        :return: An error message if the database cannot be queried
+        :rtype: string
+        """
+        from models.columns import ColumnQueries, PeopleColumns
+        if database_name is not None:
+            connection = self.connect_to_saved_database(database_name, path)
+            if not isinstance(connection, sqlite3.Connection):
+                return connection
+            from models.queries import DatabaseQueries
+            columns = DatabaseQueries(connection).to_columns()
+        elif columns is None:
+            columns = PeopleColumns.from_amity(self)
+        self.queries = ColumnQueries(columns)
+
+    def connect_to_saved_database(self, database_name=None, path=None):
+        """
+        Connect to a saved database to query it
+        :param database_name:
+        :type database_name: string
+        :param path:
+        :type path: string
+        :return: The connection, or an error message if the database
+            cannot be queried
+        :rtype: sqlite3.Connection or string
+        """
+        if database_name:
+            if set('[~!@#$%^&*()+{}"/\\:;\']+$').intersection(
+                    database_name) and database_name not in \
+                    Config.special_databases:
+                return Config.error_codes[17] + " '%s'" % database_name
+        else:
+            database_name = Config.default_db_name
+
+        if path:
+            database_file_path = path + "/" + database_name
+        else:
+            database_file_path = database_name
+
+        if not os.path.isfile(database_file_path):
+            return Config.error_codes[18] + " '%s'" % database_name
+        try:
+            connection = self.connections.connect(database_file_path)
+        except (sqlite3.OperationalError, sqlite3.ProgrammingError) as error:
+            return "%s" % error
+        if not isinstance(connection, sqlite3.Connection):
+            return connection
+        if Database.database_is_empty(connection.cursor()):
+            return "No data to Load. Empty database '%s'" % database_name
+        self.print_info("Querying database '%s'" % database_file_path)
+        return connection
+
+    def query_memory(self):
+        """
+        Answer the get_* queries from the rooms and people in memory again
         """
+        self.queries = None
 
+    def add_people_database_data_to_amity(self, people_list):
+        """
+        Add people from SQLITE Database rows in a single pass. The room names
+        in the rows are resolved once up front rather than once per row
         :param people_list:
         :type people_list:
         :return:
@@ -682,15 +1290,21 @@ class Amity(object):
         modified_staff = []
         loaded_fellows = []
         modified_fellows = []
+        people_list = list(people_list)
+        rooms = self.resolve_room_names(
+            name for person_tuple in people_list
+            for name in person_tuple[4:6])
         for person_tuple in people_list:
             if person_tuple[3].lower() in Config.allowed_fellow_strings:
-                fellow = self.add_fellow_database_data_to_amity(person_tuple)
+                fellow = self.add_fellow_database_data_to_amity(person_tuple,
+                                                                rooms)
                 if fellow['loaded_fellow']:
                     loaded_fellows.append(fellow['loaded_fellow'])
                 elif fellow['modified_fellow']:
                     modified_fellows.append(fellow['modified_fellow'])
             elif person_tuple[3].lower() in Config.allowed_staff_strings:
-                staff = self.add_staff_database_data_to_amity(person_tuple)
+                staff = self.add_staff_database_data_to_amity(person_tuple,
+                                                              rooms)
                 if staff['loaded_staff']:
                     loaded_staff.append(staff['loaded_staff'])
                 elif staff['modified_staff']:
@@ -706,30 +1320,52 @@ class Amity(object):
             "modified_fellows": modified_fellows
         }
 
-    def add_fellow_database_data_to_amity(self, fellow_tuple):
+    def resolve_room_names(self, names):
+        """
+        Look up each distinct room name once
+        :param names: Room names, which may repeat or be None
+        :type names: Iterable of strings
+        :return: Room for each name, None for names of rooms not in Amity
+        :rtype: Dictionary
+        """
+        rooms = {}
+        for name in names:
+            if name and name not in rooms:
+                room = self.offices.find(name) or \
+                    self.living_spaces.find(name)
+                if not room:
+                    self.print_error("%s: '%s'" % (Config.error_codes[1],
+                                                   name))
+                rooms[name] = room
+        return rooms
+
+    def add_fellow_database_data_to_amity(self, fellow_tuple, rooms=None):
         """
         Add Fellow Data to Amity from an SQLITE Database tuple
         :param fellow_tuple: A fellow in Amity
         :type fellow_tuple: Tuple containing fellow data
+        :param rooms: Rooms resolved by resolve_room_names. Looked up by
+            name if not given
+        :type rooms: Dictionary
         """
+        if rooms is None:
+            rooms = self.resolve_room_names(fellow_tuple[4:6])
         loaded_fellow = None
         modified_fellow = None
-        if fellow_tuple[0] in [fellow.person_id for fellow in self.fellows]:
+        if self.fellows.find(fellow_tuple[0]):
             # get fellow with similar id and apply values
             fellow = self.get_person_object_from_id(fellow_tuple[0])
-            print("Before: ", fellow.__dict__)
+            self.logger.debug("Before: %s", fellow.get_fields())
             fellow_before = {}
-            fellow_before.update(fellow.__dict__)
+            fellow_before.update(fellow.get_fields())
             fellow.first_name = fellow_tuple[1]
             fellow.last_name = fellow_tuple[2]
-            fellow.allocated_office_space = \
-                self.get_room_object_from_name(fellow_tuple[4])
-            fellow.allocated_living_space = \
-                self.get_room_object_from_name(fellow_tuple[5])
+            fellow.allocated_office_space = rooms.get(fellow_tuple[4])
+            fellow.allocated_living_space = rooms.get(fellow_tuple[5])
             fellow.wants_accommodation = True if fellow_tuple[6] else False
-            if fellow_before != fellow.__dict__:
+            if fellow_before != fellow.get_fields():
                 modified_fellow = fellow
-        elif fellow_tuple[0] in [staff.person_id for staff in self.staff]:
+        elif self.staff.find(fellow_tuple[0]):
             self.print_info("A staff member with the ID '%s' already "
                             "exists. Not loading Fellow '%s' '%s"
                             % (fellow_tuple[0], fellow_tuple[1],
@@ -739,12 +1375,10 @@ class Amity(object):
             fellow = Fellow(
                 fellow_tuple[1], fellow_tuple[2],
                 person_id=fellow_tuple[0],
-                allocated_living_space=self.
-                get_room_object_from_name(fellow_tuple[5]),
+                allocated_living_space=rooms.get(fellow_tuple[5]),
                 wants_accommodation=True if fellow_tuple[6]
                 else False)
-            fellow.allocated_office_space = \
-                self.get_room_object_from_name(fellow_tuple[4])
+            fellow.allocated_office_space = rooms.get(fellow_tuple[4])
 
             # Only append new fellow
             self.fellows.append(fellow)
@@ -754,27 +1388,31 @@ class Amity(object):
             "modified_fellow": modified_fellow
         }
 
-    def add_staff_database_data_to_amity(self, staff_tuple):
+    def add_staff_database_data_to_amity(self, staff_tuple, rooms=None):
         """
         Add Staff data to amity from an SQLITE Database tuple
         :param staff_tuple: A staff in Amity
         :type staff_tuple: A tuple containing staff data
+        :param rooms: Rooms resolved by resolve_room_names. Looked up by
+            name if not given
+        :type rooms: Dictionary
         """
+        if rooms is None:
+            rooms = self.resolve_room_names(staff_tuple[4:5])
         loaded_staff = None
         modified_staff = None
-        if staff_tuple[0] in [staff.person_id for staff in self.staff]:
+        if self.staff.find(staff_tuple[0]):
             # get staff with similar id and apply values
             staff = self.get_person_object_from_id(staff_tuple[0])
             staff_before = {}
-            staff_before.update(staff.__dict__)
+            staff_before.update(staff.get_fields())
             staff.person_id = staff_tuple[0]
             staff.first_name = staff_tuple[1]
             staff.last_name = staff_tuple[2]
-            staff.allocated_office_space = \
-                self.get_room_object_from_name(staff_tuple[4])
-            if staff_before != staff.__dict__:
+            staff.allocated_office_space = rooms.get(staff_tuple[4])
+            if staff_before != staff.get_fields():
                 modified_staff = staff
-        elif staff_tuple[0] in [fellow.person_id for fellow in self.fellows]:
+        elif self.fellows.find(staff_tuple[0]):
             self.print_info("A fellow with the ID '%s' already "
                             "exists. Not loading Staff '%s' '%s"
                             % (staff_tuple[0], staff_tuple[1], staff_tuple[2]))
@@ -782,8 +1420,7 @@ class Amity(object):
             # Create an entirely new Staff object
             staff = Staff(staff_tuple[1], staff_tuple[2],
                           person_id=staff_tuple[0])
-            staff.allocated_office_space = \
-                self.get_room_object_from_name(staff_tuple[4])
+            staff.allocated_office_space = rooms.get(staff_tuple[4])
             # Only append new staff
             self.staff.append(staff)
             loaded_staff = staff
@@ -804,13 +1441,12 @@ class Amity(object):
         loaded_living_spaces = []
         for room in room_list:
             if room[1].lower() in Config.allowed_office_strings:
-                if room[0] in [office.name for office in self.offices]:
+                if self.offices.find(room[0]):
                     self.print_info("An office with the name '%s' already "
                                     "exists. Skipping loading of duplicate "
                                     "office..."
                                     % (room[0]))
-                elif room[0] in [living_space.name for living_space
-                                 in self.living_spaces]:
+                elif self.living_spaces.find(room[0]):
                     self.print_info("A living space with the name '%s' "
                                     "already exists. Skipping loading of "
                                     "office with duplicate name..."
@@ -821,13 +1457,12 @@ class Amity(object):
                     self.offices.append(office)
                     loaded_offices.append(office)
             elif room[1].lower() in Config.allowed_living_space_strings:
-                if room[0] in [living_space.name for living_space
-                               in self.living_spaces]:
+                if self.living_spaces.find(room[0]):
                     self.print_info("A living space with the name '%s' "
                                     "already exists. Skipping loading of "
                                     "duplicate living space..."
                                     % (room[0]))
-                elif room[0] in [office.name for office in self.offices]:
+                elif self.offices.find(room[0]):
                     self.print_info("An office with the name '%s' "
                                     "already exists. Skipping loading of "
                                     "living space with duplicate name..."
@@ -843,14 +1478,25 @@ class Amity(object):
         return {"loaded_offices": loaded_offices,
                 "loaded_living_spaces": loaded_living_spaces}
 
-    def randomly_allocate_unallocated(self):
+    def randomly_allocate_unallocated(self, batch=True):
         """
         Randomly Allocates Rooms to staff and fellows
-        """
-        staff_need_office = self.get_unallocated_staff()
-        fellows_need_office = self.get_fellows_with_no_allocation() \
-            + self.get_fellows_with_living_space_only()
-        need_living_space = self.get_fellows_requiring_accommodation()
+        :param batch: Allocate everyone in one pass over the free seats and
+            print a single summary. If False, allocate one person at a time
+            through randomly_allocate_room
+        :type batch: Boolean
+        :return: The staff and fellows that were allocated a room
+        :rtype: Dictionary of sets
+        """
+        # Read the registries rather than the get_* queries, which return
+        # copies of the people in query mode
+        staff_need_office = self.staff.category('unallocated')
+        fellows_need_office = self.fellows.category('no_allocation') \
+            + self.fellows.category('living_space_only')
+        need_living_space = self.fellows.category('requiring_accommodation')
+        if batch:
+            return self.batch_allocate(staff_need_office + fellows_need_office,
+                                       need_living_space)
         allocated_staff = []
         allocated_fellows = []
         for staff in staff_need_office:
@@ -872,6 +1518,50 @@ class Amity(object):
         return {'staff': set(allocated_staff),
                 'fellows': set(allocated_fellows)}
 
+    def batch_allocate(self, need_office, need_living_space):
+        """
+        Randomly allocate rooms to whole cohorts of people in one pass.
+        People earlier in each list are served first if rooms run out
+        :param need_office: People to be allocated an office
+        :type need_office: List of Fellow or Staff objects
+        :param need_living_space: Fellows to be allocated a living space
+        :type need_living_space: List of Fellow objects
+        :return: The staff and fellows that were allocated a room
+        :rtype: Dictionary of sets
+        """
+        allocated_staff = set()
+        allocated_fellows = set()
+        # Free seats are counted and filled without other threads changing
+        # them. Always lock offices first so that threads cannot deadlock
+        with self.offices.lock, self.living_spaces.lock:
+            office_pairs, no_office = SeatAllocator(
+                self.offices).assign(need_office)
+            living_space_pairs, no_living_space = SeatAllocator(
+                self.living_spaces).assign(need_living_space)
+
+            for person, office in office_pairs:
+                person.allocated_office_space = office
+                if isinstance(person, Staff):
+                    allocated_staff.add(person)
+                else:
+                    allocated_fellows.add(person)
+            for fellow, living_space in living_space_pairs:
+                fellow.allocated_living_space = living_space
+                # They now have accommodation
+                fellow.wants_accommodation = False
+                allocated_fellows.add(fellow)
+
+        self.print_info_result("Allocated %s office space(s) and %s living "
+                               "space(s)" % (len(office_pairs),
+                                             len(living_space_pairs)))
+        if no_office:
+            self.print_info("No office to allocate to %s person(s)"
+                            % len(no_office))
+        if no_living_space:
+            self.print_info("No living space to allocate to %s fellow(s)"
+                            % len(no_living_space))
+        return {'staff': allocated_staff, 'fellows': allocated_fellows}
+
     def get_room_object_from_name(self, name):
         """
 
@@ -882,10 +1572,10 @@ class Amity(object):
         """
         if name:
             if isinstance(name, str):
-                room = [room for room in self.get_all_rooms() if
-                        room.name.lower() == name.lower()]
+                room = self.offices.find(name) or \
+                    self.living_spaces.find(name)
                 if room:
-                    return room[0]
+                    return room
                 else:
                     return "%s: '%s'" % (Config.error_codes[1], name)
             else:
@@ -902,29 +1592,38 @@ class Amity(object):
         if person_id:
             try:
                 person_id = int(person_id)
-                person = [person for person in self.get_all_people()
-                          if person.person_id == person_id]
             except ValueError:
                 return 'The person id must be an integer'
+            person = self.fellows.find(person_id) or \
+                self.staff.find(person_id)
             if person:
-                return person[0]
+                return person
         return "Person with the ID '%s' does not exist" % person_id
 
     def get_all_rooms(self):
         """
-
-        :return:
-        :rtype:
+        Get a view over the offices and living spaces without copying them
+        :return: Offices followed by living spaces
+        :rtype: ChainView
         """
-        return self.offices + self.living_spaces
+        return ChainView(self.offices, self.living_spaces)
 
     def get_all_people(self):
         """
+        Get a view over the fellows and staff without copying them
+        :return: Fellows followed by staff
+        :rtype: ChainView
+        """
+        return ChainView(self.fellows, self.staff)
 
-        :return:
-        :rtype:
+    def allocate_person_id(self):
+        """
+        Get an ID that is not used by any fellow or staff in Amity
+        :return: A new person ID, higher than any ID allocated so far and
+            than the IDs in the databases saved to or loaded from
+        :rtype: int
         """
-        return self.fellows + self.staff
+        return max(self.fellows.highest_id, self.staff.highest_id) + 1
 
     def get_allocated_staff(self):
         """
@@ -932,8 +1631,9 @@ class Amity(object):
         :return:
         :rtype:
         """
-        return [staff for staff in self.staff if isinstance(
-                staff.allocated_office_space, Office)]
+        if self.queries:
+            return self.queries.get_allocated_staff()
+        return self.staff.category('allocated')
 
     def get_fellows_allocated_both(self):
         """
@@ -941,9 +1641,9 @@ class Amity(object):
         :return:
         :rtype:
         """
-        return [fellow for fellow in self.fellows
-                if fellow.allocated_office_space and
-                fellow.allocated_living_space]
+        if self.queries:
+            return self.queries.get_fellows_allocated_both()
+        return self.fellows.category('allocated_both')
 
     def get_unallocated_staff(self):
         """
@@ -951,8 +1651,9 @@ class Amity(object):
         :return:
         :rtype:
         """
-        return [staff for staff in self.staff
-                if not staff.allocated_office_space]
+        if self.queries:
+            return self.queries.get_unallocated_staff()
+        return self.staff.category('unallocated')
 
     def get_fellows_with_no_allocation(self):
         """
@@ -960,9 +1661,9 @@ class Amity(object):
         :return:
         :rtype:
         """
-        return [fellow for fellow in self.fellows
-                if not fellow.allocated_living_space and not
-                fellow.allocated_office_space]
+        if self.queries:
+            return self.queries.get_fellows_with_no_allocation()
+        return self.fellows.category('no_allocation')
 
     def get_fellows_with_office_space_only(self):
         """
@@ -970,9 +1671,9 @@ class Amity(object):
         :return:
         :rtype:
         """
-        return [fellow for fellow in self.fellows
-                if fellow.allocated_office_space and not
-                fellow.allocated_living_space and fellow.wants_accommodation]
+        if self.queries:
+            return self.queries.get_fellows_with_office_space_only()
+        return self.fellows.category('office_space_only')
 
     def get_fellows_requiring_accommodation(self):
         """
@@ -980,9 +1681,9 @@ class Amity(object):
         :return:
         :rtype:
         """
-        return [fellow for fellow in self.fellows
-                if not fellow.allocated_living_space and
-                fellow.wants_accommodation]
+        if self.queries:
+            return self.queries.get_fellows_requiring_accommodation()
+        return self.fellows.category('requiring_accommodation')
 
     def get_fellows_with_living_space_only(self):
         """
@@ -990,9 +1691,9 @@ class Amity(object):
         :return:
         :rtype:
         """
-        return [fellow for fellow in self.fellows
-                if fellow.allocated_living_space and not
-                fellow.allocated_office_space]
+        if self.queries:
+            return self.queries.get_fellows_with_living_space_only()
+        return self.fellows.category('living_space_only')
 
     @staticmethod
     def tuplize_room_data(room_list):
@@ -1080,7 +1781,7 @@ class Amity(object):
         fellow_dict_list = []
         for fellow in fellow_list:
             fellow_dict = {}
-            for key, value in fellow.__dict__.items():
+            for key, value in fellow.get_fields().items():
                 if issubclass(type(value), Room):
                     value = value.name
                 fellow_dict[key] = value
@@ -1100,7 +1801,7 @@ class Amity(object):
         staff_dict_list = []
         for staff in staff_list:
             staff_dict = {}
-            for key, value in staff.__dict__.items():
+            for key, value in staff.get_fields().items():
                 if issubclass(type(value), Room):
                     value = value.name
                 staff_dict[key] = value
@@ -1123,41 +1824,35 @@ class Amity(object):
         living_space_dict_list = []
         for office in office_list:
             office_dict = {}
-            for key, value in office.__dict__.items():
+            for key, value in office.get_fields().items():
                 office_dict[key] = value
             office_dict['type'] = "office"
             office_dict_list.append(office_dict)
 
         for living_space in living_space_list:
             living_space_dict = {}
-            for key, value in living_space.__dict__.items():
+            for key, value in living_space.get_fields().items():
                 living_space_dict[key] = value
             living_space_dict['type'] = "living-space"
             living_space_dict_list.append(living_space_dict)
 
         return office_dict_list + living_space_dict_list
 
-    @staticmethod
-    def print_info(text):
+    def print_info(self, text):
         """
-
+        Send an informational message to the logger
         :param text:
         :type text:
-        :return:
-        :rtype:
         """
-        cprint("\t%s" % text, 'cyan')
+        self.logger.info("%s", text)
 
-    @staticmethod
-    def print_info_result(text):
+    def print_info_result(self, text):
         """
-
+        Send the result of an operation to the logger
         :param text:
         :type text:
-        :return:
-        :rtype:
         """
-        cprint("\t| %s\n" % text, 'blue')
+        self.logger.result("%s", text)
 
     @staticmethod
     def print_subtitle(text):
@@ -1169,16 +1864,38 @@ class Amity(object):
         cprint("\n %s \n %s " % (" " * len(text), text), 'blue', attrs=[
             'reverse', 'bold'])
 
-    @staticmethod
-    def print_error(text):
+    def print_error(self, text):
         """
-
+        Send an error message to the logger
         :param text:
         :type text:
-        :return:
-        :rtype:
         """
-        cprint("\t%s" % text, 'magenta')
+        self.logger.error("%s", text)
+
+    def confirm_override(self, prompt, no_clause, action, *subjects):
+        """
+        Decide whether to override existing data according to the override
+        policy
+        :param prompt: Question to ask when the policy is 'prompt'
+        :type prompt: string
+        :param no_clause: Message shown when the override is declined
+        :type no_clause: string
+        :param action: 'reallocate' or 'override_database'
+        :type action: string
+        :param subjects: The person and room being reallocated, or the path
+            of the database being overridden
+        :return: True if the override should go ahead
+        :rtype: Boolean
+        """
+        if self.override_policy == 'prompt':
+            return self.handle_yes_no_input(prompt, no_clause)
+        if callable(self.override_policy):
+            override = bool(self.override_policy(action, *subjects))
+        else:
+            override = self.override_policy == 'always'
+        if not override:
+            self.print_error(no_clause)
+        return override
 
     def handle_yes_no_input(self, prompt, no_clause):
         """
@@ -0,0 +1,160 @@
+# coding=utf-8
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from models.amity import Amity
+from models.database import ConnectionManager
+
+
+class ReadWriteLock(object):
+    """
+    Lets any number of readers in at once, or a single writer. Created
+    lazily so that it belongs to the event loop that first uses it
+    """
+
+    def __init__(self):
+        self.condition = None
+        self.readers = 0
+        self.writing = False
+
+    def get_condition(self):
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+        return self.condition
+
+    def read(self):
+        return _Locked(self, writer=False)
+
+    def write(self):
+        return _Locked(self, writer=True)
+
+    async def acquire(self, writer):
+        condition = self.get_condition()
+        async with condition:
+            if writer:
+                await condition.wait_for(
+                    lambda: not self.writing and not self.readers)
+                self.writing = True
+            else:
+                await condition.wait_for(lambda: not self.writing)
+                self.readers += 1
+
+    async def release(self, writer):
+        condition = self.get_condition()
+        async with condition:
+            if writer:
+                self.writing = False
+            else:
+                self.readers -= 1
+            condition.notify_all()
+
+
+class _Locked(object):
+    def __init__(self, lock, writer):
+        self.lock = lock
+        self.writer = writer
+
+    async def __aenter__(self):
+        await self.lock.acquire(self.writer)
+
+    async def __aexit__(self, *exc_info):
+        await self.lock.release(self.writer)
+
+
+class AsyncAmity(object):
+    """
+    Awaitable front end to Amity for use in asyncio applications. Calls
+    that read files or write to them run in an executor and SQLite calls
+    run on one dedicated thread, because SQLite connections can only be
+    used by the thread that opened them. Calls that change Amity's rooms
+    and people run one at a time and wait for running reads. Reads run
+    concurrently with each other
+    """
+
+    def __init__(self, amity=None, executor=None):
+        """
+        :param amity: The Amity to run calls on. By default a new Amity
+            that overrides existing data without prompting and has its own
+            database connections. An Amity that is passed in should only be
+            used through this object. Prompting would block the event loop,
+            so it should have an override policy other than 'prompt'
+        :type amity: Amity
+        :param executor: Executor for file I/O. Defaults to the event
+            loop's default executor
+        :type executor: concurrent.futures.Executor
+        """
+        self.amity = amity or Amity(override_policy='always',
+                                    connections=ConnectionManager())
+        self.executor = executor
+        self.database_executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = ReadWriteLock()
+
+    @staticmethod
+    async def run_in(executor, function, *args, **kwargs):
+        # Called from a coroutine, so this is the running loop.
+        # asyncio.get_running_loop is only in Python 3.7 and later
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(function, *args, **kwargs))
+
+    async def read(self, function, *args, **kwargs):
+        """
+        Run a call that only reads Amity's rooms and people in the executor
+        :param function: e.g. amity.print_room
+        :type function: callable
+        """
+        # Queries on a database need the thread that owns the connection
+        executor = self.database_executor if self.amity.queries \
+            else self.executor
+        async with self.lock.read():
+            return await self.run_in(executor, function, *args, **kwargs)
+
+    async def write(self, function, *args, **kwargs):
+        """
+        Run a call that changes Amity's rooms or people in the executor
+        :param function: e.g. amity.add_person
+        :type function: callable
+        """
+        async with self.lock.write():
+            return await self.run_in(self.executor, function, *args,
+                                     **kwargs)
+
+    async def load_people(self, filename, path=None, stream=False):
+        return await self.write(self.amity.load_people, filename, path,
+                                stream)
+
+    async def print_allocations(self, filename=None, path=None):
+        return await self.read(self.amity.print_allocations, filename, path)
+
+    async def print_unallocated(self, filename=None, path=None):
+        return await self.read(self.amity.print_unallocated, filename, path)
+
+    async def save_state(self, database_name=None, path=None,
+                         override=False):
+        # Saving marks the registries as saved, so it counts as a change
+        async with self.lock.write():
+            return await self.run_in(self.database_executor,
+                                     self.amity.save_state, database_name,
+                                     path, override)
+
+    async def load_state(self, database_name=None, path=None):
+        async with self.lock.write():
+            return await self.run_in(self.database_executor,
+                                     self.amity.load_state, database_name,
+                                     path)
+
+    async def query_database(self, database_name=None, path=None):
+        async with self.lock.write():
+            return await self.run_in(self.database_executor,
+                                     self.amity.query_database,
+                                     database_name, path)
+
+    async def close(self):
+        """
+        Close the database connections and stop the database thread
+        """
+        async with self.lock.write():
+            await self.run_in(self.database_executor,
+                              self.amity.connections.close_all)
+        self.database_executor.shutdown()
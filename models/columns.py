@@ -0,0 +1,319 @@
+# coding=utf-8
+import sys
+from array import array
+from functools import lru_cache
+
+from models.config import Config
+from models.person import Fellow, Staff
+from models.room import LivingSpace, Office
+
+FELLOW = 0
+STAFF = 1
+OFFICE = 0
+LIVING_SPACE = 1
+NO_ROOM = -1
+
+
+@lru_cache(maxsize=None)
+def import_numpy():
+    """
+    Import NumPy the first time columns use it rather than when the module
+    is imported, it is slow to import
+    :return: The numpy module, or None if it is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class PeopleColumns(object):
+    """
+    Stores people as columns instead of one object per person. Names are
+    interned, roles and accommodation preferences take a byte per person
+    and allocations are indices into the room columns, with -1 for no room.
+    Filters are computed as NumPy masks over the columns when NumPy is
+    installed and with plain loops otherwise
+    """
+
+    def __init__(self, use_numpy=True):
+        """
+        :param use_numpy: Use NumPy for the filters if it is installed
+        :type use_numpy: Boolean
+        """
+        self.numpy = import_numpy() if use_numpy else None
+        self.use_numpy = self.numpy is not None
+        self.person_ids = array('q')
+        self.first_names = []
+        self.last_names = []
+        self.roles = bytearray()
+        self.offices = array('i')
+        self.living_spaces = array('i')
+        self.wants_accommodation = bytearray()
+        self.room_names = []
+        self.room_types = bytearray()
+        self.room_indices = {}
+        self.occupants = None
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    @classmethod
+    def from_amity(cls, amity, use_numpy=True):
+        """
+        Copy the rooms and people of an Amity into columns
+        :param amity:
+        :type amity: Amity
+        :rtype: PeopleColumns
+        """
+        columns = cls(use_numpy)
+        for office in amity.offices:
+            columns.add_room(office.name, OFFICE)
+        for living_space in amity.living_spaces:
+            columns.add_room(living_space.name, LIVING_SPACE)
+        for fellow in amity.fellows:
+            columns.add_person(
+                fellow.person_id, fellow.first_name, fellow.last_name, FELLOW,
+                columns.room_index(fellow.allocated_office_space),
+                columns.room_index(fellow.allocated_living_space),
+                fellow.wants_accommodation)
+        for staff in amity.staff:
+            columns.add_person(
+                staff.person_id, staff.first_name, staff.last_name, STAFF,
+                columns.room_index(staff.allocated_office_space))
+        return columns
+
+    @classmethod
+    def from_rows(cls, rooms, people, use_numpy=True):
+        """
+        Build columns straight from database rows, without creating an
+        object per person
+        :param rooms: Rows in the format of Database.get_all_rooms
+        :type rooms: Iterable of tuples
+        :param people: Rows in the format of Database.get_all_people
+        :type people: Iterable of tuples
+        :rtype: PeopleColumns
+        """
+        columns = cls(use_numpy)
+        for name, room_type in rooms:
+            columns.add_room(
+                name, OFFICE if room_type.lower() in
+                Config.allowed_office_strings else LIVING_SPACE)
+        for person_id, first_name, last_name, role, office_name, \
+                living_space_name, wants_accommodation in people:
+            columns.add_person(
+                person_id, first_name, last_name,
+                FELLOW if role.lower() in Config.allowed_fellow_strings
+                else STAFF,
+                columns.room_indices.get(office_name.lower(), NO_ROOM)
+                if office_name else NO_ROOM,
+                columns.room_indices.get(living_space_name.lower(), NO_ROOM)
+                if living_space_name else NO_ROOM,
+                wants_accommodation)
+        return columns
+
+    def add_room(self, name, room_type):
+        self.room_indices[name.lower()] = len(self.room_names)
+        self.room_names.append(sys.intern(name))
+        self.room_types.append(room_type)
+
+    def room_index(self, room):
+        if room is None:
+            return NO_ROOM
+        return self.room_indices.get(room.name.lower(), NO_ROOM)
+
+    def add_person(self, person_id, first_name, last_name, role,
+                   office=NO_ROOM, living_space=NO_ROOM,
+                   wants_accommodation=False):
+        self.person_ids.append(person_id)
+        self.first_names.append(sys.intern(first_name))
+        self.last_names.append(sys.intern(last_name))
+        self.roles.append(role)
+        self.offices.append(office)
+        self.living_spaces.append(living_space)
+        self.wants_accommodation.append(1 if wants_accommodation else 0)
+        self.occupants = None
+
+    def select(self, *conditions):
+        """
+        Get the positions of the people matching all of the conditions
+        :param conditions: Any of 'fellow', 'staff', 'office', 'no_office',
+            'living_space', 'no_living_space' and 'wants_accommodation'
+        :type conditions: strings
+        :return: Positions in the columns, in order
+        :rtype: Iterable of ints
+        """
+        if self.use_numpy:
+            numpy = self.numpy
+            mask = numpy.ones(len(self), dtype=bool)
+            for condition in conditions:
+                mask &= self.numpy_mask(condition)
+            return numpy.flatnonzero(mask).tolist()
+        tests = [self.test(condition) for condition in conditions]
+        return [position for position in range(len(self))
+                if all(test(position) for test in tests)]
+
+    def numpy_mask(self, condition):
+        # The arrays are viewed in place, not copied
+        numpy = self.numpy
+        if condition in ('fellow', 'staff'):
+            roles = numpy.frombuffer(self.roles, dtype=numpy.uint8)
+            return roles == (FELLOW if condition == 'fellow' else STAFF)
+        if condition == 'wants_accommodation':
+            return numpy.frombuffer(self.wants_accommodation,
+                                    dtype=numpy.uint8) != 0
+        column = self.offices if condition.endswith('office') \
+            else self.living_spaces
+        rooms = numpy.frombuffer(column, dtype=numpy.int32)
+        if condition.startswith('no_'):
+            return rooms == NO_ROOM
+        return rooms != NO_ROOM
+
+    def test(self, condition):
+        if condition in ('fellow', 'staff'):
+            role = FELLOW if condition == 'fellow' else STAFF
+            return lambda position: self.roles[position] == role
+        if condition == 'wants_accommodation':
+            return lambda position: self.wants_accommodation[position]
+        column = self.offices if condition.endswith('office') \
+            else self.living_spaces
+        if condition.startswith('no_'):
+            return lambda position: column[position] == NO_ROOM
+        return lambda position: column[position] != NO_ROOM
+
+    def allocated(self, room_index):
+        """
+        Get the positions of the people allocated a room
+        :param room_index:
+        :type room_index: int
+        :rtype: list of ints
+        """
+        column = self.offices if self.room_types[room_index] == OFFICE \
+            else self.living_spaces
+        if self.use_numpy:
+            numpy = self.numpy
+            return numpy.flatnonzero(
+                numpy.frombuffer(column, dtype=numpy.int32) ==
+                room_index).tolist()
+        return [position for position, room in enumerate(column)
+                if room == room_index]
+
+    def count_occupants(self):
+        """
+        Get the number of people allocated each room, computed once until
+        the columns change
+        :rtype: list of ints
+        """
+        if self.occupants is None:
+            occupants = [0] * len(self.room_names)
+            for column in (self.offices, self.living_spaces):
+                if self.use_numpy:
+                    numpy = self.numpy
+                    rooms = numpy.frombuffer(column, dtype=numpy.int32)
+                    counts = numpy.bincount(rooms[rooms != NO_ROOM],
+                                            minlength=len(occupants))
+                    occupants = [total + int(count) for total, count
+                                 in zip(occupants, counts)]
+                else:
+                    for room in column:
+                        if room != NO_ROOM:
+                            occupants[room] += 1
+            self.occupants = occupants
+        return self.occupants
+
+    def people(self, positions):
+        """
+        Create Fellow and Staff views of the people at some positions.
+        Their rooms are created for this call and hold the number of people
+        allocated to them in the columns
+        :param positions: Positions in the columns
+        :type positions: Iterable of ints
+        :rtype: list of Fellow and Staff objects
+        """
+        rooms = {}
+
+        def room(room_index):
+            if room_index == NO_ROOM:
+                return None
+            if room_index not in rooms:
+                room_class = Office if self.room_types[room_index] == OFFICE \
+                    else LivingSpace
+                rooms[room_index] = room_class(self.room_names[room_index])
+            return rooms[room_index]
+
+        people = []
+        for position in positions:
+            if self.roles[position] == FELLOW:
+                person = Fellow(
+                    self.first_names[position], self.last_names[position],
+                    person_id=self.person_ids[position],
+                    allocated_living_space=room(
+                        self.living_spaces[position]),
+                    wants_accommodation=self.wants_accommodation[position])
+            else:
+                person = Staff(self.first_names[position],
+                               self.last_names[position],
+                               person_id=self.person_ids[position])
+            person.allocated_office_space = room(self.offices[position])
+            people.append(person)
+        occupants = self.count_occupants()
+        for room_index, view_room in rooms.items():
+            view_room.num_of_occupants = occupants[room_index]
+        return people
+
+
+class ColumnQueries(object):
+    """
+    Answers Amity's get_* queries from PeopleColumns
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def find_people(self, *conditions):
+        return self.columns.people(self.columns.select(*conditions))
+
+    def get_all_rooms(self):
+        """
+        Get every room in the columns, in the order they were added
+        :rtype: list of Office and LivingSpace objects
+        """
+        rooms = []
+        occupants = self.columns.count_occupants()
+        for room_index, name in enumerate(self.columns.room_names):
+            room = Office(name) \
+                if self.columns.room_types[room_index] == OFFICE \
+                else LivingSpace(name)
+            room.num_of_occupants = occupants[room_index]
+            rooms.append(room)
+        return rooms
+
+    def get_people_allocated_room(self, room_name):
+        room_index = self.columns.room_indices.get(room_name.lower())
+        if room_index is None:
+            return "%s: '%s'" % (Config.error_codes[1], room_name)
+        return self.columns.people(self.columns.allocated(room_index))
+
+    def get_allocated_staff(self):
+        return self.find_people('staff', 'office')
+
+    def get_fellows_allocated_both(self):
+        return self.find_people('fellow', 'office', 'living_space')
+
+    def get_unallocated_staff(self):
+        return self.find_people('staff', 'no_office')
+
+    def get_fellows_with_no_allocation(self):
+        return self.find_people('fellow', 'no_office', 'no_living_space')
+
+    def get_fellows_with_office_space_only(self):
+        return self.find_people('fellow', 'office', 'no_living_space',
+                                'wants_accommodation')
+
+    def get_fellows_requiring_accommodation(self):
+        return self.find_people('fellow', 'no_living_space',
+                                'wants_accommodation')
+
+    def get_fellows_with_living_space_only(self):
+        return self.find_people('fellow', 'living_space', 'no_office')
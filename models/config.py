@@ -19,6 +19,8 @@ class Config(object):
     allowed_living_space_strings = ["living_space", "ls", "living-space", "l"]
     allowed_yes_strings = ["yes", "y"]
     allowed_no_strings = ["no", "n"]
+    override_policies = ["prompt", "always", "never"]
+    export_formats = ["csv", "jsonl", "columns"]
     error_codes = {
         1: "Room does not exist",
         2: "Person does not exist",
@@ -37,5 +39,6 @@ class Config(object):
         15: "Invalid characters in the filename",
         16: "The room is empty",
         17: "Invalid character(s) in the database name",
-        18: "Non-existent database"
+        18: "Non-existent database",
+        19: "Cannot read the file"
     }
@@ -1,11 +1,32 @@
 # coding=utf-8
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 
 
 class Database(object):
     """
     Holds the the databse commands for loading and saving data to SQLITE
-    databases
+    databases.
+
+    The version of the schema is kept in the database's user_version.
+    Version 0 is the original layout, where people refer to rooms by name
+    and nothing is indexed. Version 1 gives rooms an integer key that
+    people refer to with foreign keys, and indexes the allocation and role
+    columns
     """
+    schema_version = 1
+    # People rows in the format they are saved in, with room names
+    people_query = ("SELECT people.id, first_name, last_name, role, "
+                    "office.name, living_space.name, wants_accommodation "
+                    "FROM people "
+                    "LEFT JOIN rooms AS office "
+                    "ON office.id = people.office_id "
+                    "LEFT JOIN rooms AS living_space "
+                    "ON living_space.id = people.living_space_id")
+
     @staticmethod
     def create_rooms_table(cursor):
         """
@@ -15,8 +36,9 @@ class Database(object):
         """
         cursor.execute('''
                         CREATE TABLE IF NOT EXISTS rooms
-                        (name varchar(50) PRIMARY KEY,
-                        type varchar(15))
+                        (id INTEGER PRIMARY KEY,
+                        name varchar(50) NOT NULL UNIQUE COLLATE NOCASE,
+                        type varchar(15) NOT NULL)
                         ''')
         return
 
@@ -27,47 +49,164 @@ class Database(object):
         :param cursor:
         :type cursor:
         """
-        result = cursor.execute('''
+        cursor.execute('''
                         CREATE TABLE IF NOT EXISTS people
                         (id INTEGER PRIMARY KEY,
                         first_name varchar(50) NOT NULL,
                         last_name varchar(50) NOT NULL,
                         role varchar(50),
-                        allocated_office_space varchar(50),
-                        allocated_living_space varchar(50),
+                        office_id INTEGER
+                        REFERENCES rooms (id) ON DELETE SET NULL,
+                        living_space_id INTEGER
+                        REFERENCES rooms (id) ON DELETE SET NULL,
                         wants_accommodation INTEGER DEFAULT 0)
                       ''')
-        print("Result: ", result)
+        cursor.execute("CREATE INDEX IF NOT EXISTS people_office_id "
+                       "ON people (office_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS people_living_space_id "
+                       "ON people (living_space_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS people_role "
+                       "ON people (role)")
         return
 
+    @staticmethod
+    def create_tables(cursor):
+        """
+        Create the tables of the current schema if they do not exist
+        :param cursor:
+        :type cursor:
+        """
+        Database.create_rooms_table(cursor)
+        Database.create_people_table(cursor)
+        cursor.execute("PRAGMA user_version = %d" % Database.schema_version)
+
+    @staticmethod
+    def get_schema_version(cursor):
+        """
+        Get the schema version of a database
+        :param cursor:
+        :type cursor:
+        :return: The version, or None if the database has no tables
+        :rtype: int
+        """
+        if Database.database_is_empty(cursor):
+            return None
+        cursor.execute("PRAGMA user_version")
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def migrate(cursor):
+        """
+        Bring the tables of a database up to the current schema version.
+        Databases without tables are left alone
+        :param cursor:
+        :type cursor:
+        :return: The version the database was migrated from, or None if
+            it did not need migrating
+        :rtype: int
+        """
+        version = Database.get_schema_version(cursor)
+        if version is None or version == Database.schema_version:
+            return None
+        if version > Database.schema_version:
+            raise sqlite3.OperationalError(
+                "Database schema version %s is newer than the supported "
+                "version %s" % (version, Database.schema_version))
+        Database.migrate_from_version_0(cursor)
+        return version
+
+    @staticmethod
+    def migrate_from_version_0(cursor):
+        """
+        Move the data of the original two table layout into the current
+        tables. Allocations to rooms that are not in the database are dropped
+        :param cursor:
+        :type cursor:
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = [row[0] for row in cursor.fetchall()]
+        for table in ("rooms", "people"):
+            if table in tables:
+                cursor.execute("ALTER TABLE %s RENAME TO old_%s"
+                               % (table, table))
+        Database.create_tables(cursor)
+        if "rooms" in tables:
+            cursor.execute("INSERT OR IGNORE INTO rooms (name, type) "
+                           "SELECT name, type FROM old_rooms "
+                           "WHERE name IS NOT NULL")
+            cursor.execute("DROP TABLE old_rooms")
+        if "people" in tables:
+            cursor.execute(
+                "INSERT INTO people (id, first_name, last_name, role, "
+                "office_id, living_space_id, wants_accommodation) "
+                "SELECT id, first_name, last_name, role, "
+                "(SELECT id FROM rooms WHERE name = allocated_office_space), "
+                "(SELECT id FROM rooms WHERE name = allocated_living_space), "
+                "wants_accommodation FROM old_people")
+            cursor.execute("DROP TABLE old_people")
+
     @staticmethod
     def insert_room_data(cursor, room_data):
         """
-        Insert Room data into SQLITE Database
+        Insert Room data into SQLITE Database. Rooms that are already in the
+        database keep their key, so people stay allocated to them
         :param cursor:
         :type cursor:
-        :param room_data:
+        :param room_data: (name, type) tuples
         :type room_data:
         """
+        room_data = list(room_data)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO rooms (name, type) values (?, ?)",
+            room_data)
         cursor.executemany(
-            "INSERT OR REPLACE INTO rooms (name, "
-            "type) values (?, ?)", room_data)
+            "UPDATE rooms SET name = ?, type = ? WHERE name = ?",
+            [(name, room_type, name) for name, room_type in room_data])
 
     @staticmethod
     def insert_people_data(cursor, people_data):
         """
-        Insert Room data into SQLITE Database
-        :param people_data:
+        Insert Room data into SQLITE Database. Rooms are given by name and
+        must already be in the database
+        :param people_data: (id, first name, last name, role, office name,
+            living space name, wants accommodation) tuples
         :type people_data:
         :param cursor:
         :type cursor:
         """
         cursor.executemany("INSERT OR REPLACE INTO people (id, "
                            "first_name, last_name, "
-                           "role, allocated_office_space, "
-                           "allocated_living_space, "
+                           "role, office_id, "
+                           "living_space_id, "
                            "wants_accommodation) values "
-                           "(?, ?, ?, ?, ?, ?, ?)", people_data)
+                           "(?, ?, ?, ?, "
+                           "(SELECT id FROM rooms WHERE name = ?), "
+                           "(SELECT id FROM rooms WHERE name = ?), ?)",
+                           people_data)
+
+    @staticmethod
+    def delete_room_data(cursor, room_names):
+        """
+        Delete rooms from SQLITE Database
+        :param cursor:
+        :type cursor:
+        :param room_names: Names of the rooms to delete
+        :type room_names: Iterable of strings
+        """
+        cursor.executemany("DELETE FROM rooms WHERE name = ?",
+                           [(name,) for name in room_names])
+
+    @staticmethod
+    def delete_people_data(cursor, person_ids):
+        """
+        Delete people from SQLITE Database
+        :param cursor:
+        :type cursor:
+        :param person_ids: IDs of the people to delete
+        :type person_ids: Iterable of ints
+        """
+        cursor.executemany("DELETE FROM people WHERE id = ?",
+                           [(person_id,) for person_id in person_ids])
 
     @staticmethod
     def database_is_empty(cursor):
@@ -95,9 +234,89 @@ class Database(object):
         :param cursor:
         :type cursor:
         """
-        cursor.execute("SELECT * FROM people")
+        cursor.execute(Database.people_query)
+        return cursor.fetchall()
+
+    @staticmethod
+    def find_people(cursor, condition, parameters=()):
+        """
+        Get the people matching a condition, fellows first and then by ID
+        :param cursor:
+        :type cursor:
+        :param condition: SQL condition on the people, office and
+            living_space tables e.g. "people.office_id IS NULL"
+        :type condition: string
+        :param parameters: Values for the placeholders in the condition
+        :type parameters: tuple
+        :return: Rows in the format of get_all_people
+        :rtype: list
+        """
+        # Fellows first, in the order load_state adds people to Amity
+        cursor.execute("%s WHERE %s "
+                       "ORDER BY lower(people.role) = 'staff', people.id"
+                       % (Database.people_query, condition), parameters)
         return cursor.fetchall()
 
+    @staticmethod
+    def get_highest_person_id(cursor):
+        """
+        Get the highest person ID in the database
+        :param cursor:
+        :type cursor:
+        :return: The highest ID, 0 if there are no people
+        :rtype: int
+        """
+        cursor.execute("SELECT MAX(id) FROM people")
+        return cursor.fetchone()[0] or 0
+
+    @staticmethod
+    def find_person_names(cursor, person_ids):
+        """
+        Get the names and roles of the people with any of the IDs
+        :param cursor:
+        :type cursor:
+        :param person_ids:
+        :type person_ids: Iterable of ints
+        :return: (id, first name, last name, role) tuples
+        :rtype: list
+        """
+        person_ids = list(person_ids)
+        people = []
+        # Stay under SQLite's limit on the number of placeholders
+        for start in range(0, len(person_ids), 500):
+            chunk = person_ids[start:start + 500]
+            cursor.execute(
+                "SELECT id, first_name, last_name, role FROM people "
+                "WHERE id IN (%s)" % ", ".join("?" * len(chunk)), chunk)
+            people += cursor.fetchall()
+        return people
+
+    @staticmethod
+    def find_rooms(cursor, names):
+        """
+        Get rooms with the number of people allocated to them
+        :param cursor:
+        :type cursor:
+        :param names: Names of the rooms. Case insensitive
+        :type names: list of strings
+        :return: (name, type, number of occupants) tuples
+        :rtype: list
+        """
+        names = list(names)
+        rooms = []
+        # Stay under SQLite's limit on the number of placeholders
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            cursor.execute(
+                "SELECT name, type, "
+                "(SELECT count(*) FROM people WHERE office_id = rooms.id) + "
+                "(SELECT count(*) FROM people "
+                "WHERE living_space_id = rooms.id) "
+                "FROM rooms WHERE name IN (%s)" % ", ".join("?" * len(chunk)),
+                chunk)
+            rooms += cursor.fetchall()
+        return rooms
+
     @staticmethod
     def get_all_rooms(cursor):
         """
@@ -105,5 +324,158 @@ class Database(object):
         :param cursor:
         :type cursor:
         """
-        cursor.execute("SELECT * FROM rooms")
+        cursor.execute("SELECT name, type FROM rooms")
         return cursor.fetchall()
+
+
+class ConnectionManager(object):
+    """
+    Keeps one open connection per database file so that repeated saves and
+    loads do not pay for connecting and creating tables every time. The
+    sqlite3 module caches compiled statements per connection, so reusing
+    the connection also reuses the prepared insert statements.
+
+    A sqlite3 connection can only be used by the thread that opened it, so
+    each thread has its own connections. They are closed by close_all in
+    that thread, or when the thread ends
+    """
+    pragmas = [
+        # Readers do not block the writer and commits append to the log
+        "PRAGMA journal_mode=WAL",
+        # Safe with WAL, only the last commits can be lost on power loss
+        "PRAGMA synchronous=NORMAL",
+        # Negative values are in KiB, i.e. 8MB of page cache
+        "PRAGMA cache_size=-8192",
+        # Off by default in SQLite. Removing a room clears its allocations
+        "PRAGMA foreign_keys=ON"
+    ]
+
+    def __init__(self):
+        self.local = threading.local()
+
+    @property
+    def connections(self):
+        """
+        Connections opened by the current thread, keyed by absolute path
+        :rtype: dict
+        """
+        if not hasattr(self.local, 'connections'):
+            self.local.connections = {}
+        return self.local.connections
+
+    @property
+    def with_tables(self):
+        """
+        Connections of the current thread whose tables have been created
+        :rtype: set
+        """
+        if not hasattr(self.local, 'with_tables'):
+            self.local.with_tables = set()
+        return self.local.with_tables
+
+    @staticmethod
+    def file_id(database_file_path):
+        try:
+            stat = os.stat(database_file_path)
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def connect(self, database_file_path):
+        """
+        Get the open connection to a database file, connecting if needed
+        :param database_file_path:
+        :type database_file_path: string
+        :return: The connection. Anything other than a Connection returned
+            by sqlite3.connect is passed back as is and not kept
+        :rtype: sqlite3.Connection
+        """
+        key = os.path.abspath(database_file_path)
+        if key in self.connections:
+            connection, file_id = self.connections[key]
+            try:
+                # Raises if the connection was closed elsewhere
+                connection.total_changes
+            except sqlite3.ProgrammingError:
+                del self.connections[key]
+                self.with_tables.discard(connection)
+            else:
+                if file_id == self.file_id(database_file_path):
+                    return connection
+                # The file was replaced since it was opened
+                self.close(database_file_path)
+
+        connection = sqlite3.connect(database_file_path)
+        if not isinstance(connection, sqlite3.Connection):
+            return connection
+        for pragma in self.pragmas:
+            connection.execute(pragma)
+        # Setting the journal mode creates the file if it did not exist
+        self.connections[key] = (connection, self.file_id(database_file_path))
+        with self.transaction(connection) as cursor:
+            if Database.migrate(cursor) is not None:
+                self.with_tables.add(connection)
+        return connection
+
+    def create_tables(self, connection):
+        """
+        Create the tables the first time a connection is written to
+        :param connection:
+        :type connection: sqlite3.Connection
+        :return: True if the tables were created by this call
+        :rtype: Boolean
+        """
+        if connection in self.with_tables:
+            return False
+        with self.transaction(connection) as cursor:
+            Database.create_tables(cursor)
+        self.with_tables.add(connection)
+        return True
+
+    @contextmanager
+    def transaction(self, connection):
+        """
+        Run the statements in the with block in a single transaction. It is
+        committed if the block succeeds and rolled back if it raises
+        :param connection:
+        :type connection: sqlite3.Connection
+        """
+        cursor = connection.cursor()
+        if not connection.in_transaction:
+            # Begin explicitly so that schema changes are in the transaction
+            cursor.execute("BEGIN")
+        try:
+            yield cursor
+        except BaseException:
+            connection.rollback()
+            raise
+        else:
+            connection.commit()
+        finally:
+            cursor.close()
+
+    def close(self, database_file_path):
+        """
+        Close the connection to a database file if it is open
+        :param database_file_path:
+        :type database_file_path: string
+        """
+        entry = self.connections.pop(os.path.abspath(database_file_path),
+                                     None)
+        if entry:
+            self.with_tables.discard(entry[0])
+            entry[0].close()
+
+    def close_all(self):
+        """
+        Close the connections opened by the current thread
+        """
+        for connection, file_id in self.connections.values():
+            connection.close()
+        self.local.connections = {}
+        self.local.with_tables = set()
+
+
+# Shared by every Amity that is not given its own manager
+connections = ConnectionManager()
+atexit.register(connections.close_all)
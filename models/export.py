@@ -0,0 +1,237 @@
+# coding=utf-8
+import contextlib
+import csv
+import itertools
+import json
+import struct
+import sys
+from array import array
+
+from models.columns import FELLOW, LIVING_SPACE, NO_ROOM, OFFICE, STAFF, \
+    PeopleColumns
+from models.person import Fellow
+
+FIELDS = ("person_id", "first_name", "last_name", "role", "office",
+          "living_space", "wants_accommodation")
+
+# Columnar files start with the magic bytes, the format version and the
+# number of rooms and people. Numbers are stored little-endian
+COLUMNS_MAGIC = b"AMTC"
+COLUMNS_VERSION = 1
+COLUMNS_HEADER = struct.Struct("<4sHII")
+# Number of values packed into an array per write
+WRITE_CHUNK_SIZE = 4096
+
+
+def open_output(output, mode):
+    """
+    Open a path for writing. File-like objects are used as they are and
+    left open
+    :param output: Path or file-like object
+    :type output: string or file-like object
+    :param mode: Mode to open a path in e.g. 'w' or 'wb'
+    :type mode: string
+    """
+    if isinstance(output, str):
+        if 'b' in mode:
+            return open(output, mode)
+        return open(output, mode, newline='', encoding='utf-8')
+    return left_open(output)
+
+
+@contextlib.contextmanager
+def left_open(output):
+    # contextlib.nullcontext is only in Python 3.7 and later
+    yield output
+
+
+class Exporter(object):
+    """
+    Writes the people in Amity and their allocations in formats that other
+    programs can read without parsing the printed reports. Rows are
+    written as the people are read, without building a list of all rows
+    """
+
+    def __init__(self, amity):
+        """
+        :param amity: The Amity to export
+        :type amity: Amity
+        """
+        self.amity = amity
+
+    def records(self):
+        """
+        Get one tuple of FIELDS per person, fellows first
+        :rtype: generator of tuples
+        """
+        for person in self.amity.get_all_people():
+            office = person.allocated_office_space
+            if isinstance(person, Fellow):
+                living_space = person.allocated_living_space
+                yield (person.person_id, person.first_name, person.last_name,
+                       "fellow", office.name if office else None,
+                       living_space.name if living_space else None,
+                       person.wants_accommodation)
+            else:
+                yield (person.person_id, person.first_name, person.last_name,
+                       "staff", office.name if office else None, None, False)
+
+    def write_csv(self, output):
+        """
+        Write a header row and a row per person. People without a room
+        have an empty room field
+        :param output: Path or text file-like object
+        :type output: string or file-like object
+        """
+        with open_output(output, 'w') as file_w:
+            writer = csv.writer(file_w)
+            writer.writerow(FIELDS)
+            writer.writerows(
+                (person_id, first_name, last_name, role, office or "",
+                 living_space or "", int(wants_accommodation))
+                for person_id, first_name, last_name, role, office,
+                living_space, wants_accommodation in self.records())
+
+    def write_json_lines(self, output):
+        """
+        Write a JSON object per person, one per line. People without a room
+        have null for the room
+        :param output: Path or text file-like object
+        :type output: string or file-like object
+        """
+        with open_output(output, 'w') as file_w:
+            for record in self.records():
+                file_w.write(json.dumps(dict(zip(FIELDS, record))))
+                file_w.write("\n")
+
+    def write_columns(self, output):
+        """
+        Write the rooms and people as binary columns that read_columns
+        loads straight into arrays. Each column is written in its own pass
+        over the people, so they are not copied into columns first
+        :param output: Path or binary file-like object
+        :type output: string or file-like object
+        """
+        amity = self.amity
+
+        def rooms():
+            return itertools.chain(amity.offices, amity.living_spaces)
+
+        room_indices = {room: position for position, room in
+                        enumerate(rooms())}
+        people = amity.get_all_people()
+        with open_output(output, 'wb') as file_w:
+            file_w.write(COLUMNS_HEADER.pack(
+                COLUMNS_MAGIC, COLUMNS_VERSION, len(room_indices),
+                len(people)))
+            write_strings(file_w, lambda: (room.name for room in rooms()))
+            file_w.write(bytes((OFFICE,)) * len(amity.offices))
+            file_w.write(bytes((LIVING_SPACE,)) * len(amity.living_spaces))
+            write_values(file_w, 'q',
+                         (person.person_id for person in people))
+            write_strings(file_w,
+                          lambda: (person.first_name for person in people))
+            write_strings(file_w,
+                          lambda: (person.last_name for person in people))
+            write_values(file_w, 'B',
+                         (FELLOW if isinstance(person, Fellow) else STAFF
+                          for person in people))
+            write_values(file_w, 'i',
+                         (room_indices.get(person.allocated_office_space,
+                                           NO_ROOM) for person in people))
+            write_values(file_w, 'i',
+                         (room_indices.get(getattr(
+                             person, 'allocated_living_space', None),
+                             NO_ROOM) for person in people))
+            write_values(file_w, 'B',
+                         (getattr(person, 'wants_accommodation', False)
+                          for person in people))
+
+
+def write_values(file_w, typecode, values):
+    # Packed a chunk at a time, the values are never all held in memory
+    values = iter(values)
+    while True:
+        chunk = array(typecode, itertools.islice(values, WRITE_CHUNK_SIZE))
+        if not chunk:
+            break
+        if sys.byteorder == 'big':
+            chunk.byteswap()
+        file_w.write(chunk.tobytes())
+
+
+def read_array(file_r, typecode, count):
+    values = array(typecode)
+    values.frombytes(read_exactly(file_r, values.itemsize * count))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def write_strings(file_w, strings):
+    # The byte length of every string, then all the strings back to back.
+    # strings is called for a new iterator in each of the two passes
+    write_values(file_w, 'I', (len(string.encode('utf-8'))
+                               for string in strings()))
+    file_w.writelines(string.encode('utf-8') for string in strings())
+
+
+def read_strings(file_r, count):
+    lengths = read_array(file_r, 'I', count)
+    data = read_exactly(file_r, sum(lengths))
+    strings = []
+    start = 0
+    for length in lengths:
+        strings.append(data[start:start + length].decode('utf-8'))
+        start += length
+    return strings
+
+
+def read_exactly(file_r, size):
+    data = file_r.read(size)
+    if len(data) != size:
+        raise ValueError("Columnar file is truncated")
+    return data
+
+
+def read_columns(source, use_numpy=True):
+    """
+    Load a file written by Exporter.write_columns
+    :param source: Path or binary file-like object
+    :type source: string or file-like object
+    :param use_numpy: Use NumPy for the filters if it is installed
+    :type use_numpy: Boolean
+    :rtype: PeopleColumns
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as file_r:
+            return read_columns(file_r, use_numpy)
+    magic, version, num_of_rooms, num_of_people = COLUMNS_HEADER.unpack(
+        read_exactly(source, COLUMNS_HEADER.size))
+    if magic != COLUMNS_MAGIC:
+        raise ValueError("Not a columnar Amity file")
+    if version != COLUMNS_VERSION:
+        raise ValueError("Unsupported columnar file version %s" % version)
+    columns = PeopleColumns(use_numpy)
+    room_names = read_strings(source, num_of_rooms)
+    room_types = read_exactly(source, num_of_rooms)
+    for name, room_type in zip(room_names, room_types):
+        if room_type not in (OFFICE, LIVING_SPACE):
+            raise ValueError("Unknown room type %s" % room_type)
+        columns.add_room(name, room_type)
+    person_ids = read_array(source, 'q', num_of_people)
+    first_names = read_strings(source, num_of_people)
+    last_names = read_strings(source, num_of_people)
+    roles = read_exactly(source, num_of_people)
+    offices = read_array(source, 'i', num_of_people)
+    living_spaces = read_array(source, 'i', num_of_people)
+    wants_accommodation = read_exactly(source, num_of_people)
+    for room_index in itertools.chain(offices, living_spaces):
+        if room_index != NO_ROOM and not 0 <= room_index < num_of_rooms:
+            raise ValueError("Room index %s out of range" % room_index)
+    for position in range(num_of_people):
+        columns.add_person(person_ids[position], first_names[position],
+                           last_names[position], roles[position],
+                           offices[position], living_spaces[position],
+                           wants_accommodation[position])
+    return columns
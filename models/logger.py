@@ -0,0 +1,135 @@
+# coding=utf-8
+import sys
+
+DEBUG = 10  # Per person progress messages
+INFO = 20
+ERROR = 40
+
+
+# termcolor is imported the first time something is coloured, so that
+# commands that print nothing in colour start faster
+def colored(*args, **kwargs):
+    """
+    Colour text with termcolor.colored
+    :rtype: string
+    """
+    from termcolor import colored as termcolor_colored
+    return termcolor_colored(*args, **kwargs)
+
+
+def cprint(*args, **kwargs):
+    """
+    Print coloured text with termcolor.cprint
+    """
+    from termcolor import cprint as termcolor_cprint
+    termcolor_cprint(*args, **kwargs)
+
+
+class Logger(object):
+    """
+    Base class for the loggers Amity sends its messages through. Messages
+    below the logger's level are dropped before they are formatted, so
+    arguments should be passed separately rather than pre-formatted
+    """
+    level = DEBUG
+
+    def __init__(self, level=None):
+        if level is not None:
+            self.level = level
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, style, message, *args):
+        """
+        Log a message
+        :param level: DEBUG, INFO or ERROR
+        :type level: int
+        :param style: How the message is presented. One of 'plain', 'info',
+            'result' or 'error'
+        :type style: string
+        :param message: The message, with %-style placeholders for args
+        :type message: string
+        """
+        if level >= self.level:
+            self.emit(level, style, message % args if args else message)
+
+    def emit(self, level, style, text):
+        raise NotImplementedError
+
+    def debug(self, message, *args):
+        self.log(DEBUG, 'plain', message, *args)
+
+    def info(self, message, *args, level=INFO):
+        self.log(level, 'info', message, *args)
+
+    def result(self, message, *args, level=INFO):
+        self.log(level, 'result', message, *args)
+
+    def error(self, message, *args):
+        self.log(ERROR, 'error', message, *args)
+
+    def flush(self):
+        pass
+
+
+class ConsoleLogger(Logger):
+    """
+    Prints coloured messages to stdout. Used by the interactive CLI
+    """
+    formats = {
+        'plain': ("%s", None),
+        'info': ("\t%s", 'cyan'),
+        'result': ("\t| %s\n", 'blue'),
+        'error': ("\t%s", 'magenta')
+    }
+
+    def emit(self, level, style, text):
+        text_format, color = self.formats[style]
+        text = text_format % text
+        if color:
+            text = colored(text, color)
+        # Look stdout up on every call so that redirecting it still works
+        print(text, file=sys.stdout)
+
+
+class SilentLogger(Logger):
+    """
+    Drops every message
+    """
+    level = float('inf')
+
+    def emit(self, level, style, text):
+        pass
+
+
+class BufferedLogger(Logger):
+    """
+    Counts messages instead of printing them and keeps only the errors.
+    flush() sends the errors and a single summary line to another logger
+    """
+    level = DEBUG
+
+    def __init__(self, target=None, level=None):
+        super(BufferedLogger, self).__init__(level)
+        self.target = target or ConsoleLogger()
+        self.count = 0
+        self.errors = []
+
+    def log(self, level, style, message, *args):
+        # Only errors are ever formatted
+        if level < self.level:
+            return
+        self.count += 1
+        if level >= ERROR:
+            self.errors.append(message % args if args else message)
+
+    def flush(self):
+        if not self.count:
+            return
+        for text in self.errors:
+            self.target.error(text)
+        self.target.result("%s message(s) logged, %s error(s)",
+                           self.count, len(self.errors))
+        self.count = 0
+        self.errors = []
@@ -0,0 +1,81 @@
+# coding=utf-8
+
+
+class Observable(object):
+    """
+    Base class for model objects whose changes are tracked by the
+    collections that hold them. Model objects store their data in slots
+    rather than in a __dict__ to keep large campuses small in memory
+    """
+    # _listeners is None, the only listener or a tuple of listeners. Most
+    # objects are in a single registry, so this is the smallest to store.
+    # It is a bookkeeping slot, get_fields leaves it out
+    __slots__ = ('_listeners',)
+
+    def __init__(self):
+        self._listeners = None
+
+    def get_fields(self):
+        """
+        Get the values of the object's data slots, keyed by their mangled
+        names e.g. '_Person__first_name'. Slots that are not set are left
+        out, as are bookkeeping slots without two leading underscores
+        :return: Field names and values
+        :rtype: dict
+        """
+        fields = {}
+        for cls in reversed(type(self).__mro__):
+            for name in cls.__dict__.get('__slots__', ()):
+                if not name.startswith('__') or name.endswith('__'):
+                    continue
+                # Private slots are stored under their mangled names
+                name = '_%s%s' % (cls.__name__.lstrip('_'), name)
+                if hasattr(self, name):
+                    fields[name] = getattr(self, name)
+        return fields
+
+    def add_listener(self, listener):
+        """
+        Register an object to be notified of changes
+        :param listener: Object with a method for each event it handles
+        :type listener: object
+        """
+        if self._listeners is None:
+            self._listeners = listener
+        elif isinstance(self._listeners, tuple):
+            self._listeners += (listener,)
+        else:
+            self._listeners = (self._listeners, listener)
+
+    def remove_listener(self, listener):
+        """
+        Stop notifying a listener of changes
+        :param listener: A previously registered listener
+        :type listener: object
+        """
+        if self._listeners is listener:
+            self._listeners = None
+        elif isinstance(self._listeners, tuple):
+            # Compare by identity, registries are lists and compare by
+            # content
+            for position, registered in enumerate(self._listeners):
+                if registered is listener:
+                    listeners = self._listeners[:position] + \
+                        self._listeners[position + 1:]
+                    self._listeners = listeners[0] if len(listeners) == 1 \
+                        else listeners
+                    break
+
+    def notify_listeners(self, event, *args):
+        """
+        Call the method named after the event on every listener
+        :param event: Name of the event e.g. 'room_renamed'
+        :type event: string
+        """
+        listeners = self._listeners
+        if listeners is None:
+            return
+        if not isinstance(listeners, tuple):
+            listeners = (listeners,)
+        for listener in listeners:
+            getattr(listener, event)(self, *args)
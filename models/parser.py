@@ -0,0 +1,82 @@
+# coding=utf-8
+import re
+from collections import namedtuple
+
+from models.config import Config
+
+ParsedPerson = namedtuple('ParsedPerson', ['line_number', 'first_name',
+                                           'last_name', 'role',
+                                           'wants_accommodation'])
+RejectedLine = namedtuple('RejectedLine', ['line_number', 'line'])
+
+
+class RosterParser(object):
+    """
+    Parses roster lines in the format 'FIRST LAST FELLOW|STAFF [Y|N]'.
+    Parsing is separate from allocation so that it can be run, and timed,
+    on its own
+    """
+    pattern = re.compile(r'^(?P<first_name>\w+)\s(?P<last_name>\w+)\s'
+                         r'(?P<role>FELLOW|STAFF|F|S)'
+                         r'(?:\s(?P<accommodation>YES|Y|NO|N))?$',
+                         re.IGNORECASE)
+    fellow_tokens = frozenset(Config.allowed_fellow_strings)
+    yes_tokens = frozenset(Config.allowed_yes_strings)
+
+    def parse_line(self, line, line_number=0):
+        """
+        Parse a single roster line
+        :param line: The line to parse
+        :type line: string
+        :param line_number: Number of the line in its file
+        :type line_number: int
+        :return: The parsed person or None if the line is badly formatted
+        :rtype: ParsedPerson
+        """
+        return self._record(line.strip(), line_number)
+
+    def _record(self, line, line_number):
+        match = self.pattern.match(line)
+        if not match:
+            return None
+        first_name, last_name, role, accommodation = match.groups()
+        return ParsedPerson(
+            line_number, first_name, last_name,
+            'fellow' if role.lower() in self.fellow_tokens else 'staff',
+            accommodation is not None and
+            accommodation.lower() in self.yes_tokens)
+
+    def parse(self, lines, first_line_number=1):
+        """
+        Parse roster lines one at a time. Blank lines are skipped
+        :param lines: Roster lines e.g. an open file
+        :type lines: Iterable of strings
+        :param first_line_number: Number of the first line in its file
+        :type first_line_number: int
+        :return: Generator of a ParsedPerson for each correctly formatted
+            line and a RejectedLine for each badly formatted one
+        :rtype: Generator
+        """
+        for line_number, line in enumerate(lines, first_line_number):
+            line = line.strip()
+            if not line:
+                continue
+            record = self._record(line, line_number)
+            if record is None:
+                yield RejectedLine(line_number, line)
+            else:
+                yield record
+
+
+def parse_chunk(lines, first_line_number=1):
+    """
+    Parse a chunk of a roster file. A module level function so that it can
+    be run in a process pool
+    :param lines: Consecutive lines of a roster file
+    :type lines: List of strings
+    :param first_line_number: Number of the first line in its file
+    :type first_line_number: int
+    :return: ParsedPerson and RejectedLine records
+    :rtype: list
+    """
+    return list(RosterParser().parse(lines, first_line_number))
@@ -1,12 +1,17 @@
 import random
 from abc import ABCMeta, abstractmethod
 
+from .observable import Observable
 from .room import Office, LivingSpace
 
 
-class Person(metaclass=ABCMeta):
+class Person(Observable, metaclass=ABCMeta):
+    __slots__ = ('__person_id', '__first_name', '__last_name',
+                 '__allocated_office_space')
+
     @abstractmethod
     def __init__(self, first_name, last_name, **kwargs):
+        super(Person, self).__init__()
         # If not defined, id is None
         self.person_id = kwargs.pop('person_id', random.randrange(0, 99999))
         # If not defined, allocated_office_space is None
@@ -14,6 +19,32 @@ class Person(metaclass=ABCMeta):
         self.first_name = first_name
         self.last_name = last_name
 
+    @classmethod
+    def from_saved(cls, person_id, first_name, last_name,
+                   allocated_office_space=None):
+        """
+        Create a person from saved values without going through the
+        setters, which check, normalise and announce every change. The
+        office is not counted again in its number of occupants
+        :param person_id:
+        :type person_id: int
+        :param first_name: Name as the name setter stored it
+        :type first_name: string
+        :param last_name: Name as the name setter stored it
+        :type last_name: string
+        :param allocated_office_space:
+        :type allocated_office_space: Office
+        """
+        person = cls.__new__(cls)
+        Observable.__init__(person)
+        person.__person_id = person_id
+        person.__first_name = first_name
+        person.__last_name = last_name
+        person.__allocated_office_space = allocated_office_space
+        if allocated_office_space is not None:
+            allocated_office_space.add_occupant(person)
+        return person
+
     @property
     def person_id(self):
         """
@@ -25,7 +56,10 @@ class Person(metaclass=ABCMeta):
 
     @person_id.setter
     def person_id(self, person_id):
+        old_id = getattr(self, '_Person__person_id', None)
         self.__person_id = int(person_id)
+        if old_id is not None and old_id != self.__person_id:
+            self.notify_listeners('person_id_changed', old_id)
 
     @property
     def first_name(self):
@@ -38,10 +72,13 @@ class Person(metaclass=ABCMeta):
 
     @first_name.setter
     def first_name(self, first_name):
+        old_first_name = getattr(self, '_Person__first_name', None)
         if first_name.islower() or not first_name.isupper():
             self.__first_name = ''.join(first_name.split()).title()
         else:
             self.__first_name = ''.join(first_name.split())
+        if old_first_name != self.__first_name:
+            self.notify_listeners('person_changed')
 
     @property
     def last_name(self):
@@ -54,10 +91,13 @@ class Person(metaclass=ABCMeta):
 
     @last_name.setter
     def last_name(self, last_name):
+        old_last_name = getattr(self, '_Person__last_name', None)
         if last_name.islower() or not last_name.isupper():
             self.__last_name = ''.join(last_name.split()).title()
         else:
             self.__last_name = ''.join(last_name.split())
+        if old_last_name != self.__last_name:
+            self.notify_listeners('person_changed')
 
     @property
     def allocated_office_space(self):
@@ -65,11 +105,13 @@ class Person(metaclass=ABCMeta):
 
     @allocated_office_space.setter
     def allocated_office_space(self, office_space):
+        old_office_space = getattr(self, '_Person__allocated_office_space',
+                                   None)
         if isinstance(office_space, Office):
             # If Person already had an Office Space, decrement number of
             # occupants from previous office space
-            if isinstance(self.__allocated_office_space, Office):
-                self.__allocated_office_space.num_of_occupants -= 1
+            if isinstance(old_office_space, Office):
+                old_office_space.num_of_occupants -= 1
             # Automatically increment number of occupants in newly allocated
             #   office
             office_space.num_of_occupants += 1
@@ -82,24 +124,52 @@ class Person(metaclass=ABCMeta):
             self.__allocated_office_space = None
         else:
             self.__allocated_office_space = None
+        if old_office_space is not self.__allocated_office_space:
+            if old_office_space is not None:
+                old_office_space.remove_occupant(self)
+            if self.__allocated_office_space is not None:
+                self.__allocated_office_space.add_occupant(self)
+            self.notify_listeners('person_changed')
 
 
 class Staff(Person):
+    __slots__ = ()
 
     def __init__(self, *args, **kwargs):
         super(Staff, self).__init__(*args, **kwargs)
 
 
 class Fellow(Person):
+    __slots__ = ('__allocated_living_space', '__wants_accommodation')
 
     def __init__(self, *args, **kwargs):
         # Default is None
-        self.allocated_living_space = kwargs.pop(
-                'allocated_living_space', None)
+        allocated_living_space = kwargs.pop('allocated_living_space', None)
         # Default is False, meaning No
-        self.wants_accommodation = kwargs.pop(
-                'wants_accommodation', False)
+        wants_accommodation = kwargs.pop('wants_accommodation', False)
         super(Fellow, self).__init__(*args, **kwargs)
+        self.allocated_living_space = allocated_living_space
+        self.wants_accommodation = wants_accommodation
+
+    @classmethod
+    def from_saved(cls, person_id, first_name, last_name,
+                   allocated_office_space=None, allocated_living_space=None,
+                   wants_accommodation=False):
+        """
+        Create a fellow from saved values without going through the
+        setters. See Person.from_saved
+        :param allocated_living_space:
+        :type allocated_living_space: LivingSpace
+        :param wants_accommodation:
+        :type wants_accommodation: Boolean
+        """
+        fellow = super(Fellow, cls).from_saved(
+            person_id, first_name, last_name, allocated_office_space)
+        fellow.__allocated_living_space = allocated_living_space
+        fellow.__wants_accommodation = bool(wants_accommodation)
+        if allocated_living_space is not None:
+            allocated_living_space.add_occupant(fellow)
+        return fellow
 
     @property
     def allocated_living_space(self):
@@ -119,11 +189,13 @@ class Fellow(Person):
         :return:
         :rtype:
         """
+        old_living_space = getattr(self, '_Fellow__allocated_living_space',
+                                   None)
         if isinstance(living_space, LivingSpace):
             # If Fellow already had a Living Space, decrement number of
             # occupants from previous living space
-            if isinstance(self.__allocated_living_space, LivingSpace):
-                self.__allocated_living_space.num_of_occupants -= 1
+            if isinstance(old_living_space, LivingSpace):
+                old_living_space.num_of_occupants -= 1
             # Automatically increment number of occupants in newly allocated
             #   living space
             living_space.num_of_occupants += 1
@@ -136,6 +208,12 @@ class Fellow(Person):
             self.__allocated_living_space = None
         else:
             self.__allocated_living_space = None
+        if old_living_space is not self.__allocated_living_space:
+            if old_living_space is not None:
+                old_living_space.remove_occupant(self)
+            if self.__allocated_living_space is not None:
+                self.__allocated_living_space.add_occupant(self)
+            self.notify_listeners('person_changed')
 
     @property
     def wants_accommodation(self):
@@ -148,7 +226,8 @@ class Fellow(Person):
 
     @wants_accommodation.setter
     def wants_accommodation(self, wants_accommodation):
-        if wants_accommodation:
-            self.__wants_accommodation = True
-        else:
-            self.__wants_accommodation = False
+        old_wants_accommodation = getattr(
+            self, '_Fellow__wants_accommodation', None)
+        self.__wants_accommodation = bool(wants_accommodation)
+        if old_wants_accommodation != self.__wants_accommodation:
+            self.notify_listeners('person_changed')
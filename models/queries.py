@@ -0,0 +1,142 @@
+# coding=utf-8
+from models.columns import PeopleColumns
+from models.config import Config
+from models.database import Database
+from models.person import Fellow, Staff
+from models.room import LivingSpace, Office
+
+FELLOW = "people.role = 'fellow'"
+STAFF = "people.role = 'staff'"
+HAS_OFFICE = "people.office_id IS NOT NULL"
+NO_OFFICE = "people.office_id IS NULL"
+HAS_LIVING_SPACE = "people.living_space_id IS NOT NULL"
+NO_LIVING_SPACE = "people.living_space_id IS NULL"
+WANTS_ACCOMMODATION = "people.wants_accommodation"
+
+
+class DatabaseQueries(object):
+    """
+    Answers Amity's get_* queries with indexed SQL queries on a saved
+    database instead of filtering the objects held in memory. Only the
+    people and rooms in each result are turned into objects, so a database
+    does not need to be loaded to be queried
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: Connection to a database in the current schema
+        :type connection: sqlite3.Connection
+        """
+        self.connection = connection
+
+    def find_people(self, *conditions, parameters=()):
+        """
+        Get the people matching all of the conditions
+        :param conditions: SQL conditions
+        :type conditions: strings
+        :return: Fellow and Staff objects ordered by ID
+        :rtype: list
+        """
+        cursor = self.connection.cursor()
+        rows = Database.find_people(cursor, " AND ".join(conditions),
+                                    parameters)
+        rooms = self.find_rooms(
+            cursor, set(name for row in rows for name in row[4:6] if name))
+        cursor.close()
+        people = [self.make_person(row, rooms) for row in rows]
+        # Count every occupant, not only those in the result
+        for room, num_of_occupants in rooms.values():
+            room.num_of_occupants = num_of_occupants
+        return people
+
+    def to_columns(self, use_numpy=True):
+        """
+        Copy all the rooms and people of the database into columns, without
+        creating an object per person
+        :param use_numpy: Use NumPy for the filters if it is installed
+        :type use_numpy: Boolean
+        :rtype: PeopleColumns
+        """
+        cursor = self.connection.cursor()
+        rooms = Database.get_all_rooms(cursor)
+        # Everyone, fellows first in the order load_state adds them
+        people = Database.find_people(cursor, "1")
+        cursor.close()
+        return PeopleColumns.from_rows(rooms, people, use_numpy)
+
+    @staticmethod
+    def find_rooms(cursor, names):
+        rooms = {}
+        for name, room_type, num_of_occupants in Database.find_rooms(cursor,
+                                                                     names):
+            if room_type.lower() in Config.allowed_office_strings:
+                room = Office(name)
+            else:
+                room = LivingSpace(name)
+            rooms[name] = (room, num_of_occupants)
+        return rooms
+
+    @staticmethod
+    def make_person(row, rooms):
+        person_id, first_name, last_name, role, office_name, \
+            living_space_name, wants_accommodation = row
+        office = rooms[office_name][0] if office_name else None
+        if role.lower() in Config.allowed_fellow_strings:
+            living_space = rooms[living_space_name][0] \
+                if living_space_name else None
+            person = Fellow(first_name, last_name, person_id=person_id,
+                            allocated_living_space=living_space,
+                            wants_accommodation=wants_accommodation)
+        else:
+            person = Staff(first_name, last_name, person_id=person_id)
+        person.allocated_office_space = office
+        return person
+
+    def get_all_rooms(self):
+        """
+        Get every room in the database, offices first
+        :rtype: list of Office and LivingSpace objects
+        """
+        cursor = self.connection.cursor()
+        rooms = self.find_rooms(
+            cursor, [name for name, room_type in
+                     Database.get_all_rooms(cursor)])
+        cursor.close()
+        for room, num_of_occupants in rooms.values():
+            room.num_of_occupants = num_of_occupants
+        return [room for room, num_of_occupants in rooms.values()
+                if isinstance(room, Office)] + \
+            [room for room, num_of_occupants in rooms.values()
+             if isinstance(room, LivingSpace)]
+
+    def get_people_allocated_room(self, room_name):
+        cursor = self.connection.cursor()
+        found = Database.find_rooms(cursor, [room_name])
+        cursor.close()
+        if not found:
+            return "%s: '%s'" % (Config.error_codes[1], room_name)
+        return self.find_people(
+            "(office.name = ? OR living_space.name = ?)",
+            parameters=(found[0][0], found[0][0]))
+
+    def get_allocated_staff(self):
+        return self.find_people(STAFF, HAS_OFFICE)
+
+    def get_fellows_allocated_both(self):
+        return self.find_people(FELLOW, HAS_OFFICE, HAS_LIVING_SPACE)
+
+    def get_unallocated_staff(self):
+        return self.find_people(STAFF, NO_OFFICE)
+
+    def get_fellows_with_no_allocation(self):
+        return self.find_people(FELLOW, NO_OFFICE, NO_LIVING_SPACE)
+
+    def get_fellows_with_office_space_only(self):
+        return self.find_people(FELLOW, HAS_OFFICE, NO_LIVING_SPACE,
+                                WANTS_ACCOMMODATION)
+
+    def get_fellows_requiring_accommodation(self):
+        return self.find_people(FELLOW, NO_LIVING_SPACE, WANTS_ACCOMMODATION)
+
+    def get_fellows_with_living_space_only(self):
+        return self.find_people(FELLOW, HAS_LIVING_SPACE, NO_OFFICE)
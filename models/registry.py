@@ -0,0 +1,500 @@
+# coding=utf-8
+import itertools
+import random
+import threading
+
+
+class RegistryField(object):
+    """
+    Class attribute declaring one of Amity's collections. Every instance
+    gets its own registry. Any list assigned to the attribute is wrapped in
+    the registry class so that its indexes stay in step with its contents
+    """
+
+    def __init__(self, registry_class):
+        self.registry_class = registry_class
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        registry = instance.__dict__.get(self.name)
+        if registry is None:
+            registry = instance.__dict__[self.name] = self.registry_class()
+        return registry
+
+    def __set__(self, instance, value):
+        if not isinstance(value, self.registry_class):
+            value = self.registry_class(value)
+        value.replaces(self.__get__(instance, type(instance)))
+        instance.__dict__[self.name] = value
+
+    def share(self, instance, registry):
+        """
+        Make an instance use a registry that is also used elsewhere
+        :param instance: Object the field belongs to
+        :type instance: object
+        :param registry: The registry to use
+        :type registry: Registry
+        """
+        instance.__dict__[self.name] = registry
+
+
+class ChainView(object):
+    """
+    Read only view over several lists. Used instead of concatenating the
+    lists every time all of their items are needed
+    """
+
+    def __init__(self, *lists):
+        self.lists = lists
+
+    def __iter__(self):
+        for items in self.lists:
+            yield from items
+
+    def __len__(self):
+        return sum(len(items) for items in self.lists)
+
+    def __bool__(self):
+        return any(self.lists)
+
+    def __contains__(self, item):
+        return any(item in items for items in self.lists)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return "ChainView(%r)" % list(self)
+
+
+class Registry(list):
+    """
+    List of model objects that keeps a dictionary index on a key of each
+    item. Subclasses define the key.
+
+    The registry also records what changed since it was last saved: the
+    items added or modified since then and the saved keys of the items
+    removed since then.
+
+    synced_database is the absolute path of the database the registry was
+    last saved to or loaded from, with the changes recorded since then. It
+    is kept here rather than by Amity so that every Amity sharing the
+    registry sees which database it is in step with.
+
+    lock is for callers that need to check and change the registry's items
+    in one step, e.g. to fill the free seats of its rooms from several
+    threads
+    """
+
+    def __init__(self, items=()):
+        super(Registry, self).__init__()
+        self.lock = threading.RLock()
+        self._keys = {}
+        self._added = {}
+        self._counter = itertools.count()
+        self.dirty = set()
+        self.removed = set()
+        self.synced_database = None
+        self.extend(items)
+
+    @staticmethod
+    def key(item):
+        """
+        Get the index key of an item
+        :param item: An item of the registry
+        :type item: object
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def saved_key(item):
+        """
+        Get the key an item is saved under in the database
+        :param item: An item of the registry
+        :type item: object
+        """
+        raise NotImplementedError
+
+    def _index(self, item):
+        item.add_listener(self)
+        self._keys.setdefault(self.key(item), item)
+        self._added.setdefault(item, next(self._counter))
+        self.dirty.add(item)
+        self.removed.discard(self.saved_key(item))
+
+    def _unindex(self, item, key=None):
+        item.remove_listener(self)
+        if key is None:
+            key = self.key(item)
+            # The item is leaving the registry rather than being re-keyed
+            self.dirty.discard(item)
+            self.removed.add(self.saved_key(item))
+            if not any(other is item for other in self):
+                self._added.pop(item, None)
+        if self._keys.get(key) is item:
+            del self._keys[key]
+            # Fall back to another item that was added with the same key
+            for other in self:
+                if other is not item and self.key(other) == key:
+                    self._keys[key] = other
+                    self.dirty.add(other)
+                    self.removed.discard(self.saved_key(other))
+                    break
+
+    def _rekey(self, item, old_key):
+        self._unindex(item, old_key)
+        self._index(item)
+
+    def append(self, item):
+        super(Registry, self).append(item)
+        self._index(item)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def insert(self, position, item):
+        super(Registry, self).insert(position, item)
+        self._index(item)
+
+    def remove(self, item):
+        super(Registry, self).remove(item)
+        self._unindex(item)
+
+    def pop(self, position=-1):
+        item = super(Registry, self).pop(position)
+        self._unindex(item)
+        return item
+
+    def clear(self):
+        items = list(self)
+        super(Registry, self).clear()
+        for item in items:
+            item.remove_listener(self)
+            self.removed.add(self.saved_key(item))
+        self._keys.clear()
+        self._added.clear()
+        self.dirty.clear()
+
+    def added_order(self, item):
+        """
+        Get the order an item was added to the registry in
+        :param item: Object to look up by identity
+        :type item: object
+        :return: Number that is higher for items added later, or None if
+            the item is not in the registry
+        :rtype: int
+        """
+        return self._added.get(item)
+
+    def mark_clean(self, items=None):
+        """
+        Forget changes once they have been saved
+        :param items: Only forget changes to these items. Defaults to all
+            changes, including removals
+        :type items: Iterable of items
+        """
+        if items is None:
+            self.dirty.clear()
+            self.removed.clear()
+        else:
+            self.dirty.difference_update(items)
+
+    def replaces(self, registry):
+        """
+        Carry over the unsaved removals and the synced database of a
+        registry this one replaces. Items of the old registry that are not
+        in this one count as removed
+        :param registry: The registry being replaced
+        :type registry: Registry
+        """
+        if registry is self:
+            return
+        self.synced_database = registry.synced_database
+        self.removed.update(registry.removed)
+        self.removed.update(registry.saved_key(item) for item in registry)
+        self.removed.difference_update(self.saved_key(item) for item in self)
+
+    def __setitem__(self, position, value):
+        old_items = self[position]
+        if not isinstance(position, slice):
+            old_items, value = [old_items], [value]
+            position = slice(position, position + 1 or None)
+        value = list(value)
+        super(Registry, self).__setitem__(position, value)
+        for item in old_items:
+            self._unindex(item)
+        for item in value:
+            self._index(item)
+
+    def __delitem__(self, position):
+        old_items = self[position]
+        if not isinstance(position, slice):
+            old_items = [old_items]
+        super(Registry, self).__delitem__(position)
+        for item in old_items:
+            self._unindex(item)
+
+
+class FreeRoomPool(object):
+    """
+    Set of the rooms that still have free capacity. Rooms are stored in an
+    array and removed by swapping with the last room, so adding, removing
+    and picking a random room all take constant time
+    """
+
+    def __init__(self):
+        self.rooms = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __bool__(self):
+        return bool(self.rooms)
+
+    def __iter__(self):
+        return iter(self.rooms)
+
+    def __contains__(self, room):
+        return room in self.positions
+
+    def add(self, room):
+        """
+        Add a room to the pool
+        :param room: Room with free capacity
+        :type room: Office or LivingSpace object
+        """
+        if room not in self.positions:
+            self.positions[room] = len(self.rooms)
+            self.rooms.append(room)
+
+    def discard(self, room):
+        """
+        Remove a room from the pool if it is in it
+        :param room: Room to remove
+        :type room: Office or LivingSpace object
+        """
+        position = self.positions.pop(room, None)
+        if position is None:
+            return
+        last_room = self.rooms.pop()
+        if last_room is not room:
+            self.rooms[position] = last_room
+            self.positions[last_room] = position
+
+    def update(self, room):
+        """
+        Add or remove a room depending on whether it has free capacity
+        :param room: Room whose occupancy may have changed
+        :type room: Office or LivingSpace object
+        """
+        if room.num_of_occupants < room.get_max_occupants():
+            self.add(room)
+        else:
+            self.discard(room)
+
+    def choice(self):
+        """
+        Pick a room with free capacity uniformly at random
+        :return: A random room from the pool or None if the pool is empty
+        :rtype: Office or LivingSpace object
+        """
+        if not self.rooms:
+            return None
+        return self.rooms[random.randrange(len(self.rooms))]
+
+    def clear(self):
+        self.rooms = []
+        self.positions = {}
+
+
+class RoomRegistry(Registry):
+    """
+    List of rooms that keeps a case insensitive room name index and a pool
+    of the rooms that are not full
+    """
+
+    def __init__(self, rooms=()):
+        self.free = FreeRoomPool()
+        super(RoomRegistry, self).__init__(rooms)
+
+    @staticmethod
+    def key(room):
+        return room.name.lower()
+
+    @staticmethod
+    def saved_key(room):
+        return room.name
+
+    def _index(self, room):
+        super(RoomRegistry, self)._index(room)
+        self.free.update(room)
+
+    def _unindex(self, room, key=None):
+        super(RoomRegistry, self)._unindex(room, key)
+        self.free.discard(room)
+
+    def clear(self):
+        super(RoomRegistry, self).clear()
+        self.free.clear()
+
+    def find(self, name):
+        """
+        Get the room with the specified name
+        :param name: Name of the room. Case insensitive
+        :type name: string
+        :return: The room if it exists, else None
+        :rtype: Room object
+        """
+        return self._keys.get(name.lower())
+
+    def room_renamed(self, room, old_name):
+        """
+        Listener called by a room in the registry when its name changes
+        """
+        self.removed.add(old_name)
+        self._rekey(room, old_name.lower())
+
+    def room_occupancy_changed(self, room):
+        """
+        Listener called by a room in the registry when its number of
+        occupants changes
+        """
+        self.free.update(room)
+
+
+class PersonRegistry(Registry):
+    """
+    List of people that keeps an index of people by their ID and the set
+    of people in each of its categories
+    """
+    # Category names and the test for belonging to them. Memberships are
+    # updated as people are added, removed and change
+    categories = {}
+
+    def __init__(self, people=()):
+        self.highest_id = 0
+        self.members = {name: set() for name in self.categories}
+        super(PersonRegistry, self).__init__(people)
+
+    @staticmethod
+    def key(person):
+        return person.person_id
+
+    @staticmethod
+    def saved_key(person):
+        return person.person_id
+
+    def _index(self, person):
+        super(PersonRegistry, self)._index(person)
+        self.highest_id = max(self.highest_id, person.person_id)
+        self.categorise(person)
+
+    def _unindex(self, person, key=None):
+        super(PersonRegistry, self)._unindex(person, key)
+        if self.added_order(person) is None:
+            for members in self.members.values():
+                members.discard(person)
+
+    def clear(self):
+        super(PersonRegistry, self).clear()
+        for members in self.members.values():
+            members.clear()
+
+    def reserve_ids(self, highest_id):
+        """
+        Count IDs up to highest_id as allocated, e.g. the IDs saved in a
+        database
+        :param highest_id:
+        :type highest_id: int
+        """
+        self.highest_id = max(self.highest_id, highest_id)
+
+    def categorise(self, person):
+        for name, belongs in self.categories.items():
+            if belongs(person):
+                self.members[name].add(person)
+            else:
+                self.members[name].discard(person)
+
+    def category(self, name):
+        """
+        Get the people in a category without testing everyone
+        :param name: One of the names in categories
+        :type name: string
+        :return: People in the order they were added
+        :rtype: list
+        """
+        return sorted(self.members[name], key=self.added_order)
+
+    def find(self, person_id):
+        """
+        Get the person with the specified ID
+        :param person_id: ID of the person
+        :type person_id: int
+        :return: The person if they exist, else None
+        :rtype: Fellow or Staff object
+        """
+        return self._keys.get(person_id)
+
+    def person_id_changed(self, person, old_id):
+        """
+        Listener called by a person in the registry when their ID changes
+        """
+        self.removed.add(old_id)
+        self._rekey(person, old_id)
+
+    def person_changed(self, person):
+        """
+        Listener called by a person in the registry when their names,
+        allocations or accommodation preference change
+        """
+        self.dirty.add(person)
+        self.categorise(person)
+
+
+class FellowRegistry(PersonRegistry):
+    """
+    List of fellows grouped by what they have been allocated
+    """
+    categories = {
+        'allocated_both': lambda fellow:
+            fellow.allocated_office_space is not None and
+            fellow.allocated_living_space is not None,
+        'no_allocation': lambda fellow:
+            fellow.allocated_office_space is None and
+            fellow.allocated_living_space is None,
+        'office_space_only': lambda fellow:
+            fellow.allocated_office_space is not None and
+            fellow.allocated_living_space is None and
+            fellow.wants_accommodation,
+        'requiring_accommodation': lambda fellow:
+            fellow.allocated_living_space is None and
+            fellow.wants_accommodation,
+        'living_space_only': lambda fellow:
+            fellow.allocated_living_space is not None and
+            fellow.allocated_office_space is None,
+    }
+
+
+class StaffRegistry(PersonRegistry):
+    """
+    List of staff grouped by whether they have been allocated an office
+    """
+    categories = {
+        'allocated': lambda staff: staff.allocated_office_space is not None,
+        'unallocated': lambda staff: staff.allocated_office_space is None,
+    }
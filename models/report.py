@@ -0,0 +1,66 @@
+# coding=utf-8
+import sys
+
+from models.person import Staff
+
+
+class AllocationsReport(object):
+    """
+    Writes each room followed by the people allocated to it. The people
+    are grouped by room in one pass and the whole report is written
+    through a single buffered file handle
+    """
+
+    def __init__(self, occupants):
+        """
+        :param occupants: People allocated each room, in the order the
+            rooms are written
+        :type occupants: dict of Room object to list of people
+        """
+        self.occupants = occupants
+
+    @classmethod
+    def from_people(cls, rooms, people):
+        """
+        Group people by the rooms they are allocated
+        :param rooms: Rooms in the order they are written
+        :type rooms: Iterable of Office and LivingSpace objects
+        :param people: People in the order they are listed in each room
+        :type people: Iterable of Fellow and Staff objects
+        :rtype: AllocationsReport
+        """
+        occupants = {room: [] for room in rooms}
+        for person in people:
+            for room in (person.allocated_office_space,
+                         getattr(person, 'allocated_living_space', None)):
+                if room in occupants:
+                    occupants[room].append(person)
+        return cls(occupants)
+
+    def write(self, output=None):
+        """
+        Write the rooms that have occupants
+        :param output: Path of the file to write, or a file-like object.
+            Defaults to standard output
+        :type output: string or file-like object
+        :return: The rooms left out because nobody is allocated them
+        :rtype: list of Room objects
+        """
+        if output is None:
+            output = sys.stdout
+        if isinstance(output, str):
+            with open(output, 'w') as file_w:
+                return self.write(file_w)
+        empty_rooms = []
+        for room, people in self.occupants.items():
+            if not people:
+                empty_rooms.append(room)
+                continue
+            output.write("%s\n%s\n" % (room.name, '-' * len(room.name)))
+            output.writelines(
+                "%s %s %s\n" % (person.first_name, person.last_name,
+                                "Staff" if isinstance(person, Staff)
+                                else "Fellow")
+                for person in people)
+            output.write("\n")
+        return empty_rooms
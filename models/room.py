@@ -1,23 +1,50 @@
 from abc import ABCMeta, abstractmethod
 
+from .observable import Observable
 
-class Room(metaclass=ABCMeta):
+
+class Room(Observable, metaclass=ABCMeta):
+    # _occupants is the reverse index of the people allocated the room,
+    # kept in step by the allocation setters of Person and Fellow
+    __slots__ = ('__name', '__num_of_occupants', '_occupants')
 
     @abstractmethod
     def __init__(self, name):
+        super(Room, self).__init__()
+        self._occupants = {}
         self.name = name
         self.num_of_occupants = 0
 
+    @classmethod
+    def from_saved(cls, name, num_of_occupants=0):
+        """
+        Create a room from saved values without going through the setters,
+        which check, normalise and announce every change
+        :param name: Name as the name setter stored it
+        :type name: string
+        :param num_of_occupants:
+        :type num_of_occupants: int
+        """
+        room = cls.__new__(cls)
+        Observable.__init__(room)
+        room._occupants = {}
+        room.__name = name
+        room.__num_of_occupants = num_of_occupants
+        return room
+
     @property
     def name(self):
         return self.__name
 
     @name.setter
     def name(self, name):
+        old_name = getattr(self, '_Room__name', None)
         if name.islower() or not name.isupper():
             self.__name = ''.join(name.split()).title()
         else:
             self.__name = ''.join(name.split())
+        if old_name is not None and old_name != self.__name:
+            self.notify_listeners('room_renamed', old_name)
 
     @property
     def num_of_occupants(self):
@@ -25,14 +52,30 @@ class Room(metaclass=ABCMeta):
 
     @num_of_occupants.setter
     def num_of_occupants(self, num_of_occupants):
-            self.__num_of_occupants = num_of_occupants
+        self.__num_of_occupants = num_of_occupants
+        self.notify_listeners('room_occupancy_changed')
+
+    def get_occupants(self):
+        """
+        Get the people allocated the room without scanning all people
+        :return: People in the order they were allocated the room
+        :rtype: list of Fellow and Staff objects
+        """
+        return list(self._occupants)
+
+    def add_occupant(self, person):
+        # A dict is used as a set that keeps the allocation order
+        self._occupants[person] = None
+
+    def remove_occupant(self, person):
+        self._occupants.pop(person, None)
 
     def get_max_occupants(self):
         return self.max_occupants
 
 
 class Office(Room):
-
+    __slots__ = ()
     max_occupants = 6
 
     def __init__(self, name):
@@ -40,6 +83,7 @@ class Office(Room):
 
 
 class LivingSpace(Room):
+    __slots__ = ()
     max_occupants = 4
 
     def __init__(self, name):
@@ -0,0 +1,246 @@
+# coding=utf-8
+import os
+import struct
+
+from models.columns import FELLOW, LIVING_SPACE, NO_ROOM, OFFICE, STAFF
+from models.person import Fellow, Staff
+from models.room import LivingSpace, Office
+
+# A snapshot file is laid out as:
+#   header
+#   a fixed width record per room, offices first
+#   a fixed width record per person, fellows first
+#   the string table: count + 1 offsets followed by the UTF-8 strings
+# Names are stored as indices into the string table and allocations as
+# indices of room records, with -1 for no room. Room types, roles and
+# NO_ROOM are encoded as in models.columns. Numbers are little-endian
+SNAPSHOT_MAGIC = b"AMSN"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<4sHHIII")
+ROOM = struct.Struct("<IIB3x")
+PERSON = struct.Struct("<qIIiiBB2x")
+OFFSET = struct.Struct("<I")
+
+
+def write_snapshot(amity, file_path):
+    """
+    Write the rooms and people of an Amity to a snapshot file. The file is
+    replaced in one step, so readers never see a partly written snapshot
+    :param amity:
+    :type amity: Amity
+    :param file_path: Path of the snapshot file
+    :type file_path: string
+    """
+    strings = {}
+
+    def string(value):
+        return strings.setdefault(value, len(strings))
+
+    room_indices = {}
+    rooms = []
+    for room_type, registry in ((OFFICE, amity.offices),
+                                (LIVING_SPACE, amity.living_spaces)):
+        for room in registry:
+            room_indices[room] = len(rooms)
+            rooms.append(ROOM.pack(string(room.name), room.num_of_occupants,
+                                   room_type))
+    people = []
+    for person in amity.get_all_people():
+        office = room_indices.get(person.allocated_office_space, NO_ROOM)
+        if isinstance(person, Fellow):
+            people.append(PERSON.pack(
+                person.person_id, string(person.first_name),
+                string(person.last_name), office,
+                room_indices.get(person.allocated_living_space, NO_ROOM),
+                FELLOW, person.wants_accommodation))
+        else:
+            people.append(PERSON.pack(
+                person.person_id, string(person.first_name),
+                string(person.last_name), office, NO_ROOM, STAFF, False))
+
+    temporary_path = file_path + ".tmp"
+    with open(temporary_path, 'wb') as file_w:
+        file_w.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0,
+                                 len(rooms), len(people), len(strings)))
+        file_w.writelines(rooms)
+        file_w.writelines(people)
+        encoded = [value.encode('utf-8') for value in strings]
+        offset = 0
+        file_w.write(OFFSET.pack(offset))
+        for value in encoded:
+            offset += len(value)
+            file_w.write(OFFSET.pack(offset))
+        file_w.writelines(encoded)
+    os.replace(temporary_path, file_path)
+
+
+class Snapshot(object):
+    """
+    Read only view of a snapshot file. Restoring builds every room and
+    person, so the whole file is read at once. Strings are decoded the
+    first time they are used
+    """
+
+    def __init__(self, file_path):
+        """
+        :param file_path: Path of a file written by write_snapshot
+        :type file_path: string
+        :raises ValueError: If the file is not a snapshot in this version
+        """
+        with open(file_path, 'rb') as file_r:
+            self.buffer = memoryview(file_r.read())
+        if len(self.buffer) < HEADER.size:
+            raise ValueError("Not an Amity snapshot '%s'" % file_path)
+        magic, version, _, self.num_of_rooms, self.num_of_people, \
+            num_of_strings = HEADER.unpack_from(self.buffer)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not an Amity snapshot '%s'" % file_path)
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version %s" % version)
+        self.people_offset = HEADER.size + ROOM.size * self.num_of_rooms
+        self.offsets_offset = self.people_offset + \
+            PERSON.size * self.num_of_people
+        self.strings_offset = self.offsets_offset + \
+            OFFSET.size * (num_of_strings + 1)
+        if len(self.buffer) < self.strings_offset:
+            raise ValueError("Truncated snapshot '%s'" % file_path)
+        self.strings = {}
+
+    def __len__(self):
+        return self.num_of_people
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.buffer.release()
+
+    def string(self, index):
+        """
+        Get a string from the string table, decoding it the first time
+        :param index:
+        :type index: int
+        :rtype: string
+        """
+        value = self.strings.get(index)
+        if value is None:
+            start, end = struct.unpack_from(
+                "<II", self.buffer, self.offsets_offset + OFFSET.size * index)
+            value = self.strings[index] = bytes(self.buffer[
+                self.strings_offset + start:
+                self.strings_offset + end]).decode('utf-8')
+        return value
+
+    def room(self, position):
+        """
+        Read one room record
+        :param position: Position of the room, offices first
+        :type position: int
+        :return: Name, room type and number of occupants
+        :rtype: tuple
+        """
+        if not 0 <= position < self.num_of_rooms:
+            raise IndexError(position)
+        name, num_of_occupants, room_type = ROOM.unpack_from(
+            self.buffer, HEADER.size + ROOM.size * position)
+        return self.string(name), room_type, num_of_occupants
+
+    def person(self, position):
+        """
+        Read one person record
+        :param position: Position of the person, fellows first
+        :type position: int
+        :return: ID, first name, last name, role, office position, living
+            space position and accommodation preference
+        :rtype: tuple
+        """
+        if not 0 <= position < self.num_of_people:
+            raise IndexError(position)
+        person_id, first_name, last_name, office, living_space, role, \
+            wants_accommodation = PERSON.unpack_from(
+                self.buffer, self.people_offset + PERSON.size * position)
+        return (person_id, self.string(first_name), self.string(last_name),
+                role, office, living_space, bool(wants_accommodation))
+
+    def read_strings(self):
+        """
+        Decode the whole string table at once
+        :rtype: list of strings
+        """
+        offsets = [offset for offset, in OFFSET.iter_unpack(
+            self.buffer[self.offsets_offset:self.strings_offset])]
+        data = bytes(self.buffer[self.strings_offset:
+                                 self.strings_offset + offsets[-1]])
+        if len(data) < offsets[-1]:
+            raise ValueError("Truncated snapshot string table")
+        return [data[start:end].decode('utf-8')
+                for start, end in zip(offsets, offsets[1:])]
+
+    def restore(self, amity):
+        """
+        Replace the rooms and people of an Amity with those of the
+        snapshot. Every record is read, so the objects are built straight
+        from the records instead of through the setters
+        :param amity:
+        :type amity: Amity
+        :raises ValueError: If a record has an unknown type or refers to a
+            string or room that is not in the snapshot
+        """
+        strings = self.read_strings()
+
+        def string(index):
+            if not 0 <= index < len(strings):
+                raise ValueError("String index %s out of range" % index)
+            return strings[index]
+
+        rooms = []
+        offices = []
+        living_spaces = []
+        # Counts can include people that were not in Amity, so they are
+        # taken from the records rather than counted again
+        for name, num_of_occupants, room_type in ROOM.iter_unpack(
+                self.buffer[HEADER.size:self.people_offset]):
+            if room_type == OFFICE:
+                restored = Office.from_saved(string(name), num_of_occupants)
+                offices.append(restored)
+            elif room_type == LIVING_SPACE:
+                restored = LivingSpace.from_saved(string(name),
+                                                  num_of_occupants)
+                living_spaces.append(restored)
+            else:
+                raise ValueError("Unknown room type %s" % room_type)
+            rooms.append(restored)
+
+        def room(position, room_class):
+            if position == NO_ROOM:
+                return None
+            if not 0 <= position < len(rooms):
+                raise ValueError("Room index %s out of range" % position)
+            if not isinstance(rooms[position], room_class):
+                raise ValueError("Room index %s has the wrong room type" %
+                                 position)
+            return rooms[position]
+
+        fellows = []
+        staff = []
+        for person_id, first_name, last_name, office, living_space, role, \
+                wants_accommodation in PERSON.iter_unpack(
+                    self.buffer[self.people_offset:self.offsets_offset]):
+            if role == FELLOW:
+                fellows.append(Fellow.from_saved(
+                    person_id, string(first_name), string(last_name),
+                    room(office, Office), room(living_space, LivingSpace),
+                    wants_accommodation))
+            elif role == STAFF:
+                staff.append(Staff.from_saved(
+                    person_id, string(first_name), string(last_name),
+                    room(office, Office)))
+            else:
+                raise ValueError("Unknown role %s" % role)
+        amity.offices = offices
+        amity.living_spaces = living_spaces
+        amity.fellows = fellows
+        amity.staff = staff
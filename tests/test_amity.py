@@ -1,7 +1,9 @@
 import unittest
 import sqlite3
 import os
+import tempfile
 
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from io import StringIO
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -11,9 +13,13 @@ from termcolor import cprint, colored
 from models.amity import Amity
 from models.config import Config
 from models.database import Database
+from models.logger import BufferedLogger, SilentLogger
 from models.person import Fellow, Staff
 from models.room import LivingSpace, Office
 
+# Some tests replace sqlite3.connect with a mock, restored in tearDown
+real_sqlite3_connect = sqlite3.connect
+
 
 class TestAmity(unittest.TestCase):
     def setUp(self):
@@ -30,6 +36,8 @@ class TestAmity(unittest.TestCase):
         self.amity.staff = [self.staff]
 
     def tearDown(self):
+        sqlite3.connect = real_sqlite3_connect
+        self.amity.connections.close_all()
         del self.amity
         del self.staff
         del self.fellow
@@ -37,6 +45,64 @@ class TestAmity(unittest.TestCase):
         del self.living_space
         del self.people_list
 
+    # Amity State Tests
+    # *****************************
+
+    def test_amity_instances_do_not_share_state(self):
+        amity = Amity(logger=SilentLogger())
+        amity.create_room(["narnia"])
+        amity.add_person("jon", "snow", "fellow")
+        self.assertIsNone(self.amity.offices.find("narnia"))
+        self.assertEqual(Amity().get_all_rooms(), [])
+        self.assertEqual(Amity().get_all_people(), [])
+
+    def test_share_state_uses_the_same_rooms_and_people(self):
+        amity = Amity(logger=SilentLogger())
+        amity.share_state(self.amity)
+        amity.create_room(["narnia"])
+        self.assertIsNotNone(self.amity.offices.find("narnia"))
+        self.assertIs(amity.fellows, self.amity.fellows)
+
+    def test_share_state_saves_fully_after_other_amity_saved_elsewhere(self):
+        other = Amity(logger=SilentLogger())
+        other.share_state(self.amity)
+        with tempfile.TemporaryDirectory() as directory:
+            self.save_to_temporary_database(directory, "x.db")
+            self.fellow.first_name = "jacob"
+            Path(directory, "y.db").touch()
+            other.save_state("y.db", directory, override=True)
+            self.assertEqual(other.synced_database, self.amity.synced_database)
+            x_path = self.save_to_temporary_database(directory, "x.db")
+            connection = sqlite3.connect(x_path)
+            names = connection.execute(
+                "SELECT first_name FROM people WHERE id = ?",
+                (self.fellow.person_id,)).fetchall()
+            connection.close()
+            other.connections.close_all()
+        self.assertEqual(names, [("Jacob",)])
+
+    def test_clone_copies_rooms_and_people(self):
+        self.fellow.allocated_office_space = self.office
+        self.fellow.allocated_living_space = self.living_space
+        clone = self.amity.clone()
+        fellow = clone.fellows.find(self.fellow.person_id)
+        self.assertIsNot(fellow, self.fellow)
+        self.assertIs(fellow.allocated_office_space,
+                      clone.offices.find("hogwarts"))
+        self.assertIs(fellow.allocated_living_space,
+                      clone.living_spaces.find("python"))
+        self.assertEqual(clone.offices.find("hogwarts").num_of_occupants,
+                         self.office.num_of_occupants)
+
+    def test_allocations_in_clone_do_not_affect_original(self):
+        clone = self.amity.clone()
+        with patch('sys.stdout', new=StringIO()):
+            clone.randomly_allocate_unallocated()
+        self.assertIsNotNone(
+            clone.staff.find(self.staff.person_id).allocated_office_space)
+        self.assertIsNone(self.staff.allocated_office_space)
+        self.assertEqual(self.office.num_of_occupants, 0)
+
     # Create Room Tests
     # *****************************
 
@@ -219,6 +285,46 @@ class TestAmity(unittest.TestCase):
             self.fellow, living_space2)
         self.assertFalse(False)
 
+    @patch('builtins.input', side_effect=AssertionError("Prompted"))
+    def test_handle_override_always_policy_moves_without_prompting(
+            self, input):
+        self.amity.override_policy = 'always'
+        office2 = Office("krypton")
+        self.staff.allocated_office_space = self.office
+        result = self.amity.allocate_room_to_person(self.staff, office2)
+        self.assertEqual(result.allocated_office_space, office2)
+
+    @patch('builtins.input', side_effect=AssertionError("Prompted"))
+    def test_handle_override_never_policy_aborts_without_prompting(
+            self, input):
+        self.amity.override_policy = 'never'
+        living_space2 = LivingSpace("Ruby")
+        self.fellow.allocated_living_space = self.living_space
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            result = self.amity.allocate_room_to_person(self.fellow,
+                                                        living_space2)
+            self.assertIn("Aborted Reallocation", fakeOutput.getvalue())
+        self.assertIsNone(result)
+        self.assertEqual(self.fellow.allocated_living_space,
+                         self.living_space)
+
+    def test_handle_override_callback_policy_receives_person_and_room(self):
+        decisions = []
+
+        def policy(action, *subjects):
+            decisions.append((action,) + subjects)
+            return True
+        amity = Amity(override_policy=policy)
+        office2 = Office("krypton")
+        self.staff.allocated_office_space = self.office
+        self.assertTrue(amity.handle_override_room_allocation(self.staff,
+                                                              office2))
+        self.assertEqual(decisions, [('reallocate', self.staff, office2)])
+
+    def test_amity_rejects_unknown_override_policy(self):
+        with self.assertRaises(ValueError):
+            Amity(override_policy='sometimes')
+
     def test_randomly_allocate_room_prints_message_if_no_office_exist(self):
         self.amity.offices = []
         with patch('sys.stdout', new=StringIO()) as fakeOutput:
@@ -389,12 +495,44 @@ class TestAmity(unittest.TestCase):
         self.assertEqual(ls_result, self.fellow.allocated_living_space)
         self.assertEqual(o_result, self.fellow.allocated_office_space)
 
+    def test_randomly_allocate_room_gives_staff_no_living_space(self):
+        with patch('sys.stdout', new=StringIO()):
+            self.amity.randomly_allocate_room(self.staff, "ls")
+        self.assertEqual(self.living_space.get_occupants(), [])
+        self.assertEqual(self.living_space.num_of_occupants, 0)
+
     def test_randomly_allocate_room_does_not_assign_full_room(self):
         self.office.num_of_occupants = self.office.max_occupants
         o_result = self.amity.randomly_allocate_room(self.fellow, "o")
         self.assertEqual(o_result, None)
         self.assertEqual(self.fellow.allocated_office_space, None)
 
+    def test_randomly_allocate_room_reuses_rooms_that_are_freed(self):
+        self.amity.allocate_room_to_person(self.fellow, self.office)
+        self.office.num_of_occupants = self.office.max_occupants
+        self.assertNotIn(self.office, self.amity.offices.free)
+        # Moving the fellow out frees a seat in the office
+        office2 = Office("krypton")
+        self.fellow.allocated_office_space = office2
+        self.assertIn(self.office, self.amity.offices.free)
+        self.assertEqual(self.amity.randomly_allocate_room(self.staff, "o"),
+                         self.office)
+
+    def test_free_room_pools_only_hold_rooms_with_free_capacity(self):
+        offices = self.amity.create_room(["gates", "page", "jobs"])
+        free = self.amity.offices.free
+        for _ in range(Office.max_occupants * 2):
+            self.amity.add_person("Kate", "surname", "s")
+        for office in self.amity.offices:
+            self.assertEqual(office in free, office.num_of_occupants <
+                             office.max_occupants)
+        for _ in range(Office.max_occupants * 2):
+            self.amity.add_person("Kate", "surname", "s")
+        self.assertEqual(len(free), 0)
+        self.amity.offices.remove(offices[0])
+        offices[0].num_of_occupants = 0
+        self.assertNotIn(offices[0], free)
+
     # Load People Tests
     # *****************************
 
@@ -451,6 +589,140 @@ class TestAmity(unittest.TestCase):
                          x.first_name.lower() + " " + x.last_name.lower() ==
                          "DOMINIC WALTERS".lower()])
 
+    def test_load_people_stream_returns_counts(self):
+        filename = "test_stream.txt"
+        with open(filename, 'w') as f:
+            f.writelines(["OLUWAFEMI SULE FELLOW Y\n", "\n",
+                          "Badly formatted line\n", "DOMINIC WALTERS STAFF\n",
+                          "SIMON PATTERSON FELLOW\n"])
+        result = self.amity.load_people(filename, stream=True)
+        os.remove(filename)
+        self.assertEqual(result, {'fellows': 2, 'staff': 1, 'ignored': 1})
+        self.assertEqual(3, len(self.amity.fellows))
+        self.assertEqual(2, len(self.amity.staff))
+
+    def test_load_people_stream_gives_error_messages_on_bad_files(self):
+        filename = "test_stream.txt"
+        with open(filename, 'w') as f:
+            f.writelines(["\n", "   \n"])
+        self.assertEqual(self.amity.load_people(filename, stream=True),
+                         Config.error_codes[13] + " '%s'" % filename)
+        with open(filename, 'w') as f:
+            f.writelines(["Wrongly formatted\n"])
+        self.assertEqual(self.amity.load_people(filename, stream=True),
+                         Config.error_codes[14] + " '%s'" % filename)
+        os.remove(filename)
+
+    def test_add_people_from_lines_consumes_lines_lazily(self):
+        lines = iter(["Kate Surname FELLOW\n", "Jack Surname STAFF\n"])
+        people = self.amity.add_people_from_lines(lines)
+        kate = next(people)
+        self.assertIsInstance(kate, Fellow)
+        self.assertEqual(next(lines), "Jack Surname STAFF\n")
+        self.assertEqual(list(people), [])
+
+    # Import People Tests
+    # *****************************
+
+    def test_import_people_loads_files_in_parallel_and_allocates_once(self):
+        self.amity.create_room(["gates", "page"])
+        with patch.object(self.amity, 'batch_allocate',
+                          wraps=self.amity.batch_allocate) as batch_allocate, \
+                patch('sys.stdout', new=StringIO()):
+            result = self.amity.import_people(
+                ["people.in", "test_people.in"], "files", workers=2,
+                chunk_size=3)
+        self.assertEqual(batch_allocate.call_count, 1)
+        self.assertEqual(len(result["people"]), 14)
+        self.assertEqual([person.first_name for person in
+                          result["people"][:3]],
+                         ["OLUWAFEMI", "DOMINIC", "SIMON"])
+        self.assertEqual(result["files"][0],
+                         {"filename": "people.in", "loaded": 7, "ignored": 0,
+                          "error": None})
+        for person in result["people"]:
+            self.assertIsInstance(person.allocated_office_space, Office)
+        # 8 fellows want accommodation, there are 4 places in 'python'
+        self.assertEqual(self.living_space.num_of_occupants,
+                         LivingSpace.max_occupants)
+
+    def test_import_people_raises_errors_from_adding_people(self):
+        with patch.object(self.amity, 'add_person',
+                          side_effect=ValueError("bad person")), \
+                patch('sys.stdout', new=StringIO()):
+            with self.assertRaisesRegex(ValueError, "bad person"):
+                self.amity.import_people(["people.in"], "files", workers=1,
+                                         chunk_size=1)
+
+    def test_import_people_reports_errors_per_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "bad.in"), "w") as bad:
+                bad.write("Jake FELLOW\nJane Surname STAFF\nBad\n")
+            Path(directory, "empty.in").touch()
+            with patch('sys.stdout', new=StringIO()) as fakeOutput:
+                result = self.amity.import_people(
+                    ["bad.in", "empty.in", "missing.in"], directory,
+                    executor=ThreadPoolExecutor(max_workers=2),
+                    chunk_size=1)
+        self.assertEqual(result["files"][0],
+                         {"filename": "bad.in", "loaded": 1, "ignored": 2,
+                          "error": None})
+        self.assertEqual(result["files"][1]["error"],
+                         Config.error_codes[13] + " 'empty.in'")
+        self.assertEqual(result["files"][2]["error"],
+                         Config.error_codes[12] + " 'missing.in'")
+        self.assertIn(Config.error_codes[12] + " 'missing.in'",
+                      fakeOutput.getvalue())
+
+    def test_import_people_reports_unreadable_files_and_continues(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, "folder.in"))
+            with open(os.path.join(directory, "good.in"), "w") as good:
+                good.write("Jake Fellow FELLOW\n")
+            with patch('sys.stdout', new=StringIO()):
+                result = self.amity.import_people(
+                    ["folder.in", "good.in"], directory,
+                    executor=ThreadPoolExecutor(max_workers=1))
+        self.assertTrue(result["files"][0]["error"].startswith(
+            Config.error_codes[19] + " 'folder.in'"))
+        self.assertEqual(result["files"][1]["loaded"], 1)
+        self.assertEqual(len(result["people"]), 1)
+
+    def test_import_people_reports_a_file_given_twice_twice(self):
+        with patch('sys.stdout', new=StringIO()):
+            result = self.amity.import_people(
+                ["people.in", "people.in"], "files",
+                executor=ThreadPoolExecutor(max_workers=1))
+        self.assertEqual([(report["filename"], report["loaded"])
+                          for report in result["files"]],
+                         [("people.in", 7), ("people.in", 7)])
+
+    def test_import_people_limits_the_chunks_submitted_ahead(self):
+        class SerialExecutor(Executor):
+            submitted = 0
+
+            def submit(self, function, *args):
+                self.submitted += 1
+                future = Future()
+                future.set_result(function(*args))
+                return future
+
+        executor = SerialExecutor()
+        submitted = []
+        add_person = self.amity.add_person
+
+        def record_submitted(*args, **kwargs):
+            submitted.append(executor.submitted)
+            return add_person(*args, **kwargs)
+
+        with patch.object(self.amity, 'add_person',
+                          side_effect=record_submitted), \
+                patch('sys.stdout', new=StringIO()):
+            self.amity.import_people(["people.in"], "files", workers=1,
+                                     chunk_size=1, executor=executor)
+        self.assertEqual(executor.submitted, 7)
+        self.assertEqual(submitted[0], 2)
+
     # Print Allocated People Tests
     # *****************************
 
@@ -641,6 +913,31 @@ class TestAmity(unittest.TestCase):
             self.assertIn("Jake Surname Fellow", fakeOutput.getvalue().strip())
             self.assertIn("Jane Surname Staff", fakeOutput.getvalue().strip())
 
+    def test_print_allocations_writes_to_file_like_object(self):
+        self.fellow.allocated_office_space = self.office
+        self.staff.allocated_office_space = self.office
+        output = StringIO()
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            self.amity.print_allocations(output)
+            self.assertIn(Config.error_codes[16] + ": 'python'",
+                          fakeOutput.getvalue())
+        self.assertEqual(output.getvalue(),
+                         "Hogwarts\n--------\nJake Surname Fellow\n"
+                         "Jane Surname Staff\n\n")
+
+    def test_print_allocations_reads_the_occupants_of_each_room(self):
+        self.staff.allocated_office_space = self.office
+        self.fellow.allocated_office_space = self.office
+        output = StringIO()
+        with patch.object(self.amity, 'get_all_people',
+                          side_effect=AssertionError("scanned everyone")), \
+                patch('sys.stdout', new=StringIO()):
+            self.amity.print_allocations(output)
+        # Fellows are listed first, whatever order they were allocated in
+        self.assertEqual(output.getvalue(),
+                         "Hogwarts\n--------\nJake Surname Fellow\n"
+                         "Jane Surname Staff\n\n")
+
     def test_print_allocations_prints_filenotfound_error_on_non_existent_dir(
             self):
         with patch('sys.stdout', new=StringIO()) as fakeOutput:
@@ -825,6 +1122,28 @@ class TestAmity(unittest.TestCase):
         result = self.amity.print_room(self.office.name)
         self.assertEqual(result, [self.fellow, self.staff])
 
+    def test_get_people_allocated_room_follows_reallocation(self):
+        office = Office("narnia")
+        self.amity.offices.append(office)
+        self.staff.allocated_office_space = self.office
+        self.fellow.allocated_office_space = self.office
+        self.fellow.allocated_living_space = self.living_space
+        self.fellow.allocated_office_space = office
+        self.assertEqual(self.amity.get_people_allocated_room("hogwarts"),
+                         [self.staff])
+        self.assertEqual(self.amity.get_people_allocated_room("narnia"),
+                         [self.fellow])
+        self.fellow.allocated_living_space = None
+        self.assertEqual(self.amity.get_people_allocated_room("python"), [])
+
+    def test_get_people_allocated_room_leaves_out_people_not_in_amity(self):
+        self.fellow.allocated_office_space = self.office
+        Staff("malia", "surname").allocated_office_space = self.office
+        self.assertEqual(self.amity.get_people_allocated_room("hogwarts"),
+                         [self.fellow])
+        self.assertEqual(self.office.get_occupants()[0], self.fellow)
+        self.assertEqual(len(self.office.get_occupants()), 2)
+
     # Save State Tests
     # *****************************
 
@@ -851,6 +1170,14 @@ class TestAmity(unittest.TestCase):
             text = "About to override database '%s'" % database_name
             self.assertIn(text, fakeOutput.getvalue().strip())
 
+    @patch('builtins.input', side_effect=AssertionError("Prompted"))
+    def test_save_state_never_policy_does_not_override_database(self, input):
+        self.amity.override_policy = 'never'
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            result = self.amity.save_state(Config.empty_database, "databases")
+            self.assertIn("Aborted save state", fakeOutput.getvalue())
+        self.assertIs(result, False)
+
     def test_save_state_gives_informative_message_when_database_does_not_exist(
             self):
         database_name = "test_save_state_not_exist"
@@ -888,6 +1215,131 @@ class TestAmity(unittest.TestCase):
         result = self.amity.save_state('test_database*')
         self.assertEqual(result, Config.error_codes[17] + " 'test_database*'")
 
+    def save_to_temporary_database(self, directory, database_name="amity.db"):
+        Path(directory, database_name).touch()
+        with patch('sys.stdout', new=StringIO()):
+            self.amity.save_state(database_name, directory, override=True)
+        return os.path.join(directory, database_name)
+
+    def test_save_state_again_only_writes_changed_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.save_to_temporary_database(directory)
+            self.fellow.first_name = "jacob"
+            new_office = Office("narnia")
+            self.amity.offices.append(new_office)
+            with patch('models.amity.Database.insert_people_data') as \
+                    insert_people, \
+                    patch('models.amity.Database.insert_room_data') as \
+                    insert_rooms:
+                self.save_to_temporary_database(directory)
+        insert_people.assert_called_once_with(
+            unittest.mock.ANY, self.amity.tuplize_fellow_data([self.fellow]))
+        insert_rooms.assert_called_once_with(
+            unittest.mock.ANY, [("Narnia", "office")])
+
+    def test_save_state_again_deletes_removed_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.save_to_temporary_database(directory)
+            self.amity.staff.remove(self.staff)
+            self.living_space.name = "ruby"
+            self.fellow.allocated_living_space = self.living_space
+            database_file_path = self.save_to_temporary_database(directory)
+            connection = sqlite3.connect(database_file_path)
+            people = connection.execute(
+                "SELECT people.id, rooms.name FROM people JOIN rooms "
+                "ON rooms.id = people.living_space_id").fetchall()
+            rooms = connection.execute("SELECT name FROM rooms").fetchall()
+            connection.close()
+        self.assertEqual(people, [(self.fellow.person_id, "Ruby")])
+        self.assertEqual(sorted(rooms), [("Hogwarts",), ("Ruby",)])
+
+    def test_save_state_again_rewrites_only_occupants_of_renamed_rooms(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.fellow.allocated_living_space = self.living_space
+            self.save_to_temporary_database(directory)
+            self.living_space.name = "ruby"
+            with patch('models.amity.Database.insert_people_data') as \
+                    insert_people, \
+                    patch.object(type(self.amity.staff), '__iter__') as \
+                    iterate_staff:
+                self.save_to_temporary_database(directory)
+        insert_people.assert_called_once_with(
+            unittest.mock.ANY, self.amity.tuplize_fellow_data([self.fellow]))
+        iterate_staff.assert_not_called()
+
+    def test_save_state_and_load_state_reuse_the_connection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with patch('sqlite3.connect', wraps=real_sqlite3_connect) as \
+                    connect:
+                self.save_to_temporary_database(directory)
+                self.fellow.first_name = "jacob"
+                self.save_to_temporary_database(directory)
+                with patch('sys.stdout', new=StringIO()):
+                    self.amity.load_state("amity.db", directory)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_save_state_and_load_state_from_different_threads(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.save_to_temporary_database(directory)
+            self.fellow.first_name = "jacob"
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(self.save_to_temporary_database,
+                                directory).result()
+            amity = Amity(logger=SilentLogger())
+            result = amity.load_state("amity.db", directory)
+        self.assertEqual(
+            [fellow.first_name for fellow in
+             result["people"]["loaded_fellows"]], ["Jacob"])
+
+    def test_sessions_saving_to_one_database_keep_each_others_people(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "amity.db").touch()
+            first = Amity(logger=SilentLogger())
+            first.add_person("first", "person", "fellow")
+            first.save_state("amity.db", directory, override=True)
+            second = Amity(logger=SilentLogger())
+            second.add_person("second", "person", "staff")
+            second.save_state("amity.db", directory, override=True)
+            self.assertEqual(second.staff[0].person_id, 2)
+            # The person added before loading keeps their own row too
+            third = Amity(logger=SilentLogger())
+            third.add_person("third", "person", "fellow")
+            third.load_state("amity.db", directory)
+            third.save_state("amity.db", directory, override=True)
+            self.assertEqual(third.add_person("fourth", "person",
+                                              "staff").person_id, 4)
+            third.connections.close_all()
+            connection = sqlite3.connect(os.path.join(directory, "amity.db"))
+            rows = connection.execute(
+                "SELECT id, first_name FROM people ORDER BY id").fetchall()
+            connection.close()
+        self.assertEqual(rows, [(1, "First"), (2, "Second"), (3, "Third")])
+
+    def test_save_state_writes_everything_to_another_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.save_to_temporary_database(directory)
+            with patch('models.amity.Database.insert_people_data') as \
+                    insert_people:
+                self.save_to_temporary_database(directory, "other.db")
+        self.assertEqual(insert_people.call_count, 2)
+
+    def test_save_state_after_load_state_only_writes_changed_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.save_to_temporary_database(directory)
+            amity = Amity(logger=SilentLogger())
+            amity.offices = []
+            amity.living_spaces = []
+            amity.fellows = []
+            amity.staff = []
+            amity.load_state("amity.db", directory)
+            staff = amity.get_person_object_from_id(self.staff.person_id)
+            staff.last_name = "newname"
+            with patch('models.amity.Database.insert_people_data') as \
+                    insert_people:
+                amity.save_state("amity.db", directory, override=True)
+        insert_people.assert_called_once_with(
+            unittest.mock.ANY, amity.tuplize_staff_data([staff]))
+
     # Load State Tests
     # *****************************
 
@@ -931,6 +1383,120 @@ class TestAmity(unittest.TestCase):
         self.assertEqual(result,
                          Config.error_codes[17] + " 'test_database*'")
 
+    # Query Database Tests
+    # ****************************************
+
+    def create_query_database(self, directory):
+        self.amity.create_room(["narnia"], "living-space")
+        narnia = self.amity.get_room_object_from_name("narnia")
+        both = Fellow("both", "rooms", person_id=11, wants_accommodation=True)
+        both.allocated_office_space = self.office
+        both.allocated_living_space = narnia
+        office_only = Fellow("office", "only", person_id=12,
+                             wants_accommodation=True)
+        office_only.allocated_office_space = self.office
+        living_only = Fellow("living", "only", person_id=13)
+        living_only.allocated_living_space = narnia
+        staff = Staff("allocated", "staff", person_id=14)
+        staff.allocated_office_space = self.office
+        self.amity.fellows += [both, office_only, living_only]
+        self.amity.staff.append(staff)
+        self.save_to_temporary_database(directory)
+        amity = Amity(logger=SilentLogger())
+        amity.offices = []
+        amity.living_spaces = []
+        amity.fellows = []
+        amity.staff = []
+        self.assertIsNone(amity.query_database("amity.db", directory))
+        return amity
+
+    def test_query_database_answers_queries_like_memory(self):
+        queries = ["get_allocated_staff", "get_fellows_allocated_both",
+                   "get_unallocated_staff", "get_fellows_with_no_allocation",
+                   "get_fellows_with_office_space_only",
+                   "get_fellows_requiring_accommodation",
+                   "get_fellows_with_living_space_only"]
+        with tempfile.TemporaryDirectory() as directory:
+            amity = self.create_query_database(directory)
+            for query in queries:
+                expected = sorted(person.person_id for person in
+                                  getattr(self.amity, query)())
+                result = [person.person_id for person in
+                          getattr(amity, query)()]
+                self.assertEqual(result, expected, query)
+
+    def test_query_database_get_people_allocated_room(self):
+        with tempfile.TemporaryDirectory() as directory:
+            amity = self.create_query_database(directory)
+            people = amity.get_people_allocated_room("HOGWARTS")
+            self.assertEqual([person.person_id for person in people],
+                             [11, 12, 14])
+            self.assertEqual(people[0].allocated_office_space.name,
+                             "Hogwarts")
+            self.assertEqual(people[0].allocated_office_space.
+                             num_of_occupants, 3)
+            self.assertEqual(people[0].allocated_living_space.name, "Narnia")
+            self.assertEqual(amity.get_people_allocated_room("mordor"),
+                             "%s: 'mordor'" % Config.error_codes[1])
+            amity.query_memory()
+            self.assertEqual(amity.get_people_allocated_room("mordor"),
+                             "%s: 'mordor'" % Config.error_codes[1])
+
+    def test_query_database_lists_fellows_before_staff(self):
+        with tempfile.TemporaryDirectory() as directory:
+            staff = Staff("first", "staff", person_id=1)
+            staff.allocated_office_space = self.office
+            self.amity.staff.append(staff)
+            amity = self.create_query_database(directory)
+            people = amity.get_people_allocated_room("hogwarts")
+            amity.query_memory()
+        self.assertEqual([person.person_id for person in people],
+                         [11, 12, 1, 14])
+
+    def test_query_database_prints_rooms_of_the_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            amity = self.create_query_database(directory)
+            with patch('sys.stdout', new=StringIO()) as fakeOutput:
+                people = amity.print_room("narnia")
+                self.assertIn("Living Only Fellow", fakeOutput.getvalue())
+            self.assertEqual([person.person_id for person in people],
+                             [11, 13])
+            output = StringIO()
+            amity.print_allocations(output)
+        self.assertEqual(output.getvalue(),
+                         "Hogwarts\n--------\nBoth Rooms Fellow\n"
+                         "Office Only Fellow\nAllocated Staff Staff\n\n"
+                         "Narnia\n------\nBoth Rooms Fellow\n"
+                         "Living Only Fellow\n\n")
+
+    def test_randomly_allocate_unallocated_in_query_mode_uses_memory(self):
+        for query in ("query_database", "query_columns"):
+            amity = Amity(logger=SilentLogger())
+            amity.create_room(["hogwarts"])
+            staff = amity.add_person("jane", "surname", "staff",
+                                     allocate=False)
+            with tempfile.TemporaryDirectory() as directory:
+                Path(directory, "amity.db").touch()
+                amity.save_state("amity.db", directory, override=True)
+                if query == "query_database":
+                    amity.query_database("amity.db", directory)
+                else:
+                    amity.query_columns()
+                amity.randomly_allocate_unallocated()
+                amity.query_memory()
+                amity.connections.close_all()
+            office = amity.offices[0]
+            self.assertIs(staff.allocated_office_space, office, query)
+            self.assertEqual(office.num_of_occupants, 1, query)
+            self.assertEqual(office.get_occupants(), [staff], query)
+
+    def test_query_database_gives_informative_messages(self):
+        self.assertEqual(self.amity.query_database("does_not_exist"),
+                         Config.error_codes[18] + " 'does_not_exist'")
+        self.assertEqual(self.amity.query_database("bad/name"),
+                         Config.error_codes[17] + " 'bad/name'")
+        self.assertIsNone(self.amity.queries)
+
     # Add People Database Data to Amity Tests
     # ****************************************
 
@@ -981,6 +1547,31 @@ class TestAmity(unittest.TestCase):
             self.assertIn(text, fakeOutput.getvalue().strip())
             self.assertIn(text2, fakeOutput.getvalue().strip())
 
+    def test_add_people_db_data_looks_up_each_room_name_once(self):
+        people = [(id_, 'Maria', 'Najai', 'fellow', 'Hogwarts', 'Python', 1)
+                  for id_ in range(3742, 3745)]
+        with patch.object(self.amity.offices, 'find',
+                          wraps=self.amity.offices.find) as find:
+            result = self.amity.add_people_database_data_to_amity(people)
+        self.assertEqual(find.call_count, 2)
+        self.assertEqual(len(result["loaded_fellows"]), 3)
+        for fellow in result["loaded_fellows"]:
+            self.assertIs(fellow.allocated_office_space, self.office)
+            self.assertIs(fellow.allocated_living_space, self.living_space)
+        self.assertEqual(self.office.num_of_occupants, 3)
+        self.assertEqual(self.living_space.num_of_occupants, 3)
+
+    def test_add_people_db_data_reports_each_missing_room_once(self):
+        people = [(id_, 'Maria', 'Najai', 'staff', 'Narnia', None, 0)
+                  for id_ in range(3742, 3745)]
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            result = self.amity.add_people_database_data_to_amity(people)
+        self.assertEqual(fakeOutput.getvalue().count(
+            "%s: 'Narnia'" % Config.error_codes[1]), 1)
+        self.assertEqual(
+            [staff.allocated_office_space for staff in
+             result["loaded_staff"]], [None, None, None])
+
     # Add Room Database Data to Amity Tests
     # ****************************************
 
@@ -1034,6 +1625,36 @@ class TestAmity(unittest.TestCase):
             self.assertIn(text, fakeOutput.getvalue().strip())
             self.assertIn(text2, fakeOutput.getvalue().strip())
 
+    # Logger Tests
+    # ****************************************
+
+    def test_silent_logger_suppresses_allocation_messages(self):
+        self.amity.logger = SilentLogger()
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            self.amity.load_people("files/test_people.in")
+            self.amity.randomly_allocate_room(self.fellow, "mansion")
+            self.assertEqual(fakeOutput.getvalue(), "")
+        self.assertEqual(len(self.amity.get_all_people()), 9)
+
+    def test_buffered_logger_prints_single_summary_on_flush(self):
+        self.amity.logger = BufferedLogger()
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            self.amity.load_people("files/test_people.in")
+            self.amity.print_error("Something went wrong")
+            self.assertEqual(fakeOutput.getvalue(), "")
+            self.amity.logger.flush()
+            output = fakeOutput.getvalue()
+        self.assertIn("Something went wrong", output)
+        self.assertIn("1 error(s)", output)
+        self.assertNotIn("Randomly allocating office", output)
+
+    def test_default_logger_prints_per_person_messages(self):
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            self.amity.add_person("Kate", "Surname", "s")
+            self.assertIn("Randomly allocating office to Kate...",
+                          fakeOutput.getvalue())
+            self.assertIn("Allocated office: Hogwarts", fakeOutput.getvalue())
+
     # Randomly Allocate Unallocated Tests
     # ****************************************
 
@@ -1062,6 +1683,105 @@ class TestAmity(unittest.TestCase):
         self.assertEqual(self.fellow.allocated_living_space.name,
                          self.living_space.name)
 
+    def test_allocate_unallocated_does_not_overfill_rooms(self):
+        self.amity.create_room(["gates"])
+        self.amity.create_room(["ruby"], "ls")
+        for _ in range(10):
+            self.amity.fellows.append(Fellow("Kate", "Surname",
+                                             wants_accommodation=True))
+            self.amity.staff.append(Staff("Jack", "Surname"))
+        result = self.amity.randomly_allocate_unallocated()
+        for room in self.amity.get_all_rooms():
+            self.assertEqual(room.num_of_occupants, room.max_occupants)
+        self.assertEqual(len(self.amity.get_unallocated_staff()) +
+                         len(self.amity.get_fellows_with_no_allocation()) +
+                         len(self.amity.get_fellows_with_living_space_only()),
+                         22 - 2 * Office.max_occupants)
+        # Staff are served first when there are not enough offices
+        self.assertEqual(len(result['staff']), 11)
+        self.assertEqual(len(self.amity.get_fellows_requiring_accommodation()),
+                         10 - 2 * LivingSpace.max_occupants)
+
+    def test_allocate_unallocated_prints_single_summary(self):
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            self.amity.randomly_allocate_unallocated()
+            self.assertNotIn("Randomly allocating office",
+                             fakeOutput.getvalue())
+            self.assertIn("Allocated 2 office space(s) and 0 living space(s)",
+                          fakeOutput.getvalue())
+
+    def test_allocate_unallocated_per_person_returns_same_structure(self):
+        self.fellow.wants_accommodation = True
+        with patch('sys.stdout', new=StringIO()) as fakeOutput:
+            result = self.amity.randomly_allocate_unallocated(batch=False)
+            self.assertIn("Randomly allocating office",
+                          fakeOutput.getvalue())
+        self.assertEqual(result, {'staff': {self.staff},
+                                  'fellows': {self.fellow}})
+        self.assertEqual(self.fellow.allocated_living_space,
+                         self.living_space)
+
+    # Allocation Categories Tests
+    # *****************************
+
+    def test_allocation_categories_follow_changes(self):
+        fellow = Fellow("vader", "surname", wants_accommodation=True)
+        self.amity.fellows.append(fellow)
+        self.assertEqual(self.amity.get_fellows_with_no_allocation(),
+                         [self.fellow, fellow])
+        self.assertEqual(self.amity.get_fellows_requiring_accommodation(),
+                         [fellow])
+        fellow.allocated_office_space = self.office
+        self.assertEqual(self.amity.get_fellows_with_office_space_only(),
+                         [fellow])
+        fellow.allocated_living_space = self.living_space
+        self.assertEqual(self.amity.get_fellows_allocated_both(), [fellow])
+        self.assertEqual(self.amity.get_fellows_requiring_accommodation(), [])
+        fellow.allocated_office_space = None
+        self.assertEqual(self.amity.get_fellows_with_living_space_only(),
+                         [fellow])
+        self.amity.fellows.remove(fellow)
+        self.assertEqual(self.amity.get_fellows_with_living_space_only(), [])
+
+    def test_allocation_categories_of_staff(self):
+        self.assertEqual(self.amity.get_unallocated_staff(), [self.staff])
+        self.staff.allocated_office_space = self.office
+        self.assertEqual(self.amity.get_unallocated_staff(), [])
+        self.assertEqual(self.amity.get_allocated_staff(), [self.staff])
+        self.amity.staff = []
+        self.assertEqual(self.amity.get_allocated_staff(), [])
+
+    # Concurrent Allocation Tests
+    # ****************************************
+
+    def test_concurrent_add_person_never_overfills_rooms(self):
+        amity = Amity(logger=SilentLogger())
+        amity.create_room(["gates", "page", "jobs"])
+        amity.create_room(["ruby", "go"], "living-space")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            people = list(executor.map(
+                lambda number: amity.add_person("fellow", "number", "fellow",
+                                                True), range(40)))
+        for room in amity.get_all_rooms():
+            self.assertEqual(room.num_of_occupants, room.get_max_occupants())
+        self.assertEqual(len(amity.get_unallocated_staff()) +
+                         len(amity.get_fellows_with_no_allocation()) +
+                         len(amity.get_fellows_with_living_space_only()),
+                         40 - 3 * Office.max_occupants)
+        self.assertEqual(len(set(person.person_id for person in people)), 40)
+
+    def test_concurrent_allocate_room_to_person_respects_capacity(self):
+        amity = Amity(logger=SilentLogger())
+        people = [Staff("staff", "number", person_id=number)
+                  for number in range(20)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda person: amity.allocate_room_to_person(
+                    person, self.office), people))
+        self.assertEqual(self.office.num_of_occupants, Office.max_occupants)
+        self.assertEqual(results.count(Config.error_codes[11]),
+                         20 - Office.max_occupants)
+
     # Get Room Object From Name Tests
     # ****************************************
 
@@ -1070,6 +1790,42 @@ class TestAmity(unittest.TestCase):
         result = self.amity.get_room_object_from_name(42)
         self.assertEqual(result, "Room name must be a string")
 
+    def test_get_room_object_from_name_is_case_insensitive(self):
+        self.assertEqual(self.amity.get_room_object_from_name("HOGWARTS"),
+                         self.office)
+        self.assertEqual(self.amity.get_room_object_from_name("python"),
+                         self.living_space)
+
+    def test_get_room_object_from_name_finds_newly_created_rooms(self):
+        gates = self.amity.create_room(["gates"])[0]
+        bee = self.amity.create_room(["bee"], "ls")[0]
+        self.assertEqual(self.amity.get_room_object_from_name("Gates"), gates)
+        self.assertEqual(self.amity.get_room_object_from_name("bee"), bee)
+
+    def test_get_room_object_from_name_finds_rooms_appended_to_lists(self):
+        py = Office("py")
+        self.amity.offices.append(py)
+        self.assertEqual(self.amity.get_room_object_from_name("py"), py)
+
+    def test_get_room_object_from_name_forgets_removed_rooms(self):
+        self.amity.offices.remove(self.office)
+        self.assertEqual(self.amity.get_room_object_from_name("hogwarts"),
+                         Config.error_codes[1] + ": 'hogwarts'")
+
+    def test_get_room_object_from_name_follows_renamed_rooms(self):
+        self.office.name = "krypton"
+        self.assertEqual(self.amity.get_room_object_from_name("krypton"),
+                         self.office)
+        self.assertEqual(self.amity.get_room_object_from_name("hogwarts"),
+                         Config.error_codes[1] + ": 'hogwarts'")
+
+    def test_get_all_rooms_returns_offices_then_living_spaces(self):
+        rooms = self.amity.get_all_rooms()
+        self.assertEqual(len(rooms), 2)
+        self.assertEqual(list(rooms), [self.office, self.living_space])
+        gates = self.amity.create_room(["gates"])[0]
+        self.assertIn(gates, rooms)
+
     # Get Person Object From ID Tests
     # ****************************************
 
@@ -1083,6 +1839,41 @@ class TestAmity(unittest.TestCase):
         result = self.amity.get_person_object_from_id(42)
         self.assertEqual(result, "Person with the ID '%s' does not exist" % 42)
 
+    def test_get_person_object_from_id_finds_fellows_and_staff(self):
+        self.assertEqual(self.amity.get_person_object_from_id(
+            self.fellow.person_id), self.fellow)
+        self.assertEqual(self.amity.get_person_object_from_id(
+            str(self.staff.person_id)), self.staff)
+
+    def test_get_person_object_from_id_follows_changed_ids(self):
+        old_id = self.fellow.person_id
+        self.fellow.person_id = old_id + 100000
+        self.assertEqual(self.amity.get_person_object_from_id(
+            old_id + 100000), self.fellow)
+        self.assertEqual(self.amity.get_person_object_from_id(old_id),
+                         "Person with the ID '%s' does not exist" % old_id)
+
+    def test_get_person_object_from_id_forgets_removed_people(self):
+        self.amity.staff.remove(self.staff)
+        self.assertEqual(self.amity.get_person_object_from_id(
+            self.staff.person_id), "Person with the ID '%s' does not exist"
+            % self.staff.person_id)
+
+    def test_add_person_allocates_unique_person_ids(self):
+        people = [self.amity.add_person("Kate", "surname", role)
+                  for role in ["f", "s"] * 50]
+        ids = [person.person_id for person in self.amity.get_all_people()]
+        self.assertEqual(len(ids), len(set(ids)))
+        for person in people:
+            self.assertEqual(
+                self.amity.get_person_object_from_id(person.person_id),
+                person)
+
+    def test_allocate_person_id_skips_ids_loaded_from_database(self):
+        self.amity.add_people_database_data_to_amity(
+            [(500000, 'Maria', 'Najai', 'fellow', None, None, 0)])
+        self.assertGreater(self.amity.allocate_person_id(), 500000)
+
     # Tupelize Room Data Tests
     # ****************************************
 
@@ -1114,6 +1905,46 @@ class TestAmity(unittest.TestCase):
                           self.staff.last_name, "staff", None, None, False),
                          result[0])
 
+    # Model Slots Tests
+    # ****************************************
+
+    def test_people_and_rooms_have_no_instance_dict(self):
+        for model in [self.fellow, self.staff, self.office,
+                      self.living_space]:
+            self.assertFalse(hasattr(model, '__dict__'))
+            with self.assertRaises(AttributeError):
+                model.unknown_attribute = True
+
+    def test_people_notify_every_registry_they_are_in(self):
+        other = Amity()
+        other.fellows.append(self.fellow)
+        self.fellow.person_id = 4242
+        self.assertIs(self.amity.fellows.find(4242), self.fellow)
+        self.assertIs(other.fellows.find(4242), self.fellow)
+        self.amity.fellows.remove(self.fellow)
+        self.fellow.person_id = 4343
+        self.assertIsNone(self.amity.fellows.find(4343))
+        self.assertIs(other.fellows.find(4343), self.fellow)
+
+    def test_get_fields_uses_mangled_names(self):
+        self.fellow.allocated_office_space = self.office
+        self.assertEqual(self.fellow.get_fields(), {
+            '_Person__person_id': self.fellow.person_id,
+            '_Person__first_name': "Jake",
+            '_Person__last_name': "Surname",
+            '_Person__allocated_office_space': self.office,
+            '_Fellow__allocated_living_space': None,
+            '_Fellow__wants_accommodation': False})
+        self.assertEqual(self.office.get_fields(),
+                         {'_Room__name': "Hogwarts",
+                          '_Room__num_of_occupants': 1})
+
+    def test_translate_fellow_data_gives_room_names(self):
+        self.fellow.allocated_office_space = self.office
+        result = self.amity.translate_fellow_data_to_dict([self.fellow])
+        self.assertEqual(result[0]['_Person__allocated_office_space'],
+                         "Hogwarts")
+
     # Translate Fellow Data To Dict Tests
     # ****************************************
 
@@ -1122,7 +1953,7 @@ class TestAmity(unittest.TestCase):
         result = self.amity.translate_fellow_data_to_dict(self.amity.fellows)
         self.assertIsInstance(result[0], dict)
         fellow_dict = {}
-        fellow_dict.update(self.fellow.__dict__)
+        fellow_dict.update(self.fellow.get_fields())
         fellow_dict.update({'role': "fellow"})
         self.assertEqual(fellow_dict, result[0])
 
@@ -1134,7 +1965,7 @@ class TestAmity(unittest.TestCase):
         result = self.amity.translate_staff_data_to_dict(self.amity.staff)
         self.assertIsInstance(result[0], dict)
         staff_dict = {}
-        staff_dict.update(self.staff.__dict__)
+        staff_dict.update(self.staff.get_fields())
         staff_dict.update({'role': "staff"})
         self.assertEqual(staff_dict, result[0])
 
@@ -1147,10 +1978,10 @@ class TestAmity(unittest.TestCase):
             self.amity.offices, self.amity.living_spaces)
         self.assertIsInstance(result[0], dict)
         office_dict = {}
-        office_dict.update(self.office.__dict__)
+        office_dict.update(self.office.get_fields())
         office_dict.update({'type': "office"})
         living_space_dict = {}
-        living_space_dict.update(self.living_space.__dict__)
+        living_space_dict.update(self.living_space.get_fields())
         living_space_dict.update({'type': "living-space"})
         self.assertEqual([office_dict] + [living_space_dict], result)
 
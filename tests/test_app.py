@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+import app
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))), "app.py")
+
+# Seconds a one-shot command may take to start, including the interpreter
+STARTUP_BUDGET = 1.0
+
+
+def run_app(*args, stdin=None):
+    return subprocess.run([sys.executable, APP] + list(args), input=stdin,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, timeout=30)
+
+
+class TestApp(unittest.TestCase):
+    def test_importing_app_does_not_import_presentation_libraries(self):
+        result = subprocess.run(
+            [sys.executable, "-c",
+             "import sys; sys.path.insert(0, %r); import app; "
+             "print([name for name in ('pyfiglet', 'terminaltables', "
+             "'docopt', 'multiprocessing', 'termcolor', 'numpy', "
+             "'models.columns', 'models.export', 'models.snapshot', "
+             "'models.queries') if name in sys.modules])"
+             % os.path.dirname(APP)],
+            stdout=subprocess.PIPE, universal_newlines=True, timeout=30)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_one_shot_command_starts_within_budget(self):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            result = run_app("--version")
+            timings.append(time.perf_counter() - start)
+            self.assertEqual(result.stdout.strip(), "2.0")
+        self.assertLess(min(timings), STARTUP_BUDGET)
+
+    def test_piped_session_has_no_banner_or_clear(self):
+        result = run_app("-i", stdin="print_room hogwarts\n")
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("There are no rooms yet", result.stdout)
+        self.assertNotIn("\033[2J", result.stdout)
+        self.assertNotIn("A ROOM ALLOCATION SYSTEM", result.stdout)
+        self.assertNotIn("Amity #", result.stdout)
+
+    def test_one_shot_command_runs(self):
+        result = run_app("print_room", "hogwarts")
+        self.assertIn("There are no rooms yet", result.stdout)
+
+    def test_one_shot_command_keeps_quoted_arguments_whole(self):
+        with patch('sys.stdout', new=StringIO()):
+            app.main(["create_room", "Blue Room"])
+            self.assertEqual([room.name for room in app.amity.offices],
+                             ["Blueroom"])
+            app.main(["add_person", "Mary Ann", "Doe", "fellow"])
+            self.assertEqual([fellow.first_name for fellow in
+                              app.amity.fellows], ["Maryann"])
+
+    def test_render_banner_is_cached(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.dict(os.environ, {'XDG_CACHE_HOME': directory}):
+            banner = app.render_banner()
+            self.assertTrue(os.path.isfile(
+                app.banner_cache_path('AMITY', app.BANNER_FONT)))
+            # A cached banner is read without importing pyfiglet
+            with patch.dict(sys.modules, {'pyfiglet': None}):
+                self.assertEqual(app.render_banner(), banner)
+
+
+if __name__ == '__main__':
+    unittest.main()
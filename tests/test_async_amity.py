@@ -0,0 +1,127 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from models.amity import Amity
+from models.async_amity import AsyncAmity
+from models.database import ConnectionManager
+from models.logger import SilentLogger
+
+
+class TestAsyncAmity(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.amity = Amity(logger=SilentLogger(), override_policy='never',
+                           connections=ConnectionManager())
+        self.async_amity = AsyncAmity(self.amity)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.complete(self.async_amity.close())
+        self.loop.close()
+        self.directory.cleanup()
+
+    def complete(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_load_people_save_state_and_load_state(self):
+        self.amity.create_room(["hogwarts"])
+        people = self.complete(self.async_amity.load_people("people.in",
+                                                            "files"))
+        self.assertEqual(len(people), 7)
+        Path(self.directory.name, "amity.db").touch()
+        self.complete(self.async_amity.save_state(
+            "amity.db", self.directory.name, override=True))
+
+        amity = AsyncAmity(Amity(logger=SilentLogger(),
+                                 connections=ConnectionManager()))
+        result = self.complete(amity.load_state("amity.db",
+                                                self.directory.name))
+        self.complete(amity.close())
+        self.assertEqual(len(result["people"]["loaded_fellows"]), 4)
+        self.assertEqual(len(result["people"]["loaded_staff"]), 3)
+        self.assertEqual(len(result["rooms"]["loaded_offices"]), 1)
+
+    def test_default_amity_saves_over_an_existing_database(self):
+        async_amity = AsyncAmity()
+        async_amity.amity.logger = SilentLogger()
+        async_amity.amity.create_room(["hogwarts"])
+        Path(self.directory.name, "amity.db").touch()
+        result = self.complete(async_amity.save_state("amity.db",
+                                                      self.directory.name))
+        self.complete(async_amity.close())
+        self.assertIsNone(result)
+        amity = Amity(logger=SilentLogger(), connections=ConnectionManager())
+        loaded = amity.load_state("amity.db", self.directory.name)
+        amity.connections.close_all()
+        self.assertEqual(len(loaded["rooms"]["loaded_offices"]), 1)
+
+    def test_declined_save_is_reported(self):
+        self.amity.create_room(["hogwarts"])
+        Path(self.directory.name, "amity.db").touch()
+        with patch('sys.stdout', new=StringIO()):
+            result = self.complete(self.async_amity.save_state(
+                "amity.db", self.directory.name))
+        self.assertIs(result, False)
+
+    def test_print_unallocated_to_file(self):
+        self.complete(self.async_amity.load_people("people.in", "files"))
+        self.complete(self.async_amity.print_unallocated(
+            "unallocated.txt", self.directory.name))
+        with open(os.path.join(self.directory.name,
+                               "unallocated.txt")) as unallocated:
+            self.assertEqual(len(unallocated.readlines()), 7)
+
+    def test_reads_run_concurrently(self):
+        both_reading = threading.Barrier(2, timeout=5)
+
+        def read():
+            # Times out unless the other read is running at the same time
+            both_reading.wait()
+
+        async def read_twice():
+            await asyncio.gather(self.async_amity.read(read),
+                                 self.async_amity.read(read))
+
+        self.complete(read_twice())
+
+    def test_writes_run_one_at_a_time(self):
+        running = []
+        overlapped = []
+
+        def write():
+            running.append(1)
+            overlapped.append(len(running) > 1)
+            time.sleep(0.01)
+            running.pop()
+
+        async def write_three_times():
+            await asyncio.gather(*[self.async_amity.write(write)
+                                   for _ in range(3)])
+
+        self.complete(write_three_times())
+        self.assertEqual(overlapped, [False, False, False])
+
+    def test_queries_on_database_run_on_database_thread(self):
+        self.amity.create_room(["hogwarts"])
+        self.amity.add_person("jane", "surname", "staff")
+        self.amity.add_person("jake", "surname", "fellow")
+        Path(self.directory.name, "amity.db").touch()
+        self.complete(self.async_amity.save_state(
+            "amity.db", self.directory.name, override=True))
+        self.complete(self.async_amity.query_database(
+            "amity.db", self.directory.name))
+        staff = self.complete(self.async_amity.read(
+            self.amity.get_allocated_staff))
+        self.assertEqual([person.first_name for person in staff], ["Jane"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import columns as columns_module
+from models.amity import Amity
+from models.columns import ColumnQueries, PeopleColumns
+from models.config import Config
+from models.logger import SilentLogger
+from models.person import Fellow, Staff
+
+
+class TestPeopleColumns(unittest.TestCase):
+    use_numpy = False
+
+    queries = ["get_allocated_staff", "get_fellows_allocated_both",
+               "get_unallocated_staff", "get_fellows_with_no_allocation",
+               "get_fellows_with_office_space_only",
+               "get_fellows_requiring_accommodation",
+               "get_fellows_with_living_space_only"]
+
+    def setUp(self):
+        self.amity = Amity(logger=SilentLogger())
+        self.amity.create_room(["hogwarts"])
+        self.amity.create_room(["narnia"], "living-space")
+        office = self.amity.offices.find("hogwarts")
+        living_space = self.amity.living_spaces.find("narnia")
+        both = Fellow("both", "rooms", person_id=1, wants_accommodation=True)
+        both.allocated_office_space = office
+        both.allocated_living_space = living_space
+        office_only = Fellow("office", "only", person_id=2,
+                             wants_accommodation=True)
+        office_only.allocated_office_space = office
+        living_only = Fellow("living", "only", person_id=3)
+        living_only.allocated_living_space = living_space
+        neither = Fellow("no", "rooms", person_id=4, wants_accommodation=True)
+        allocated = Staff("allocated", "staff", person_id=5)
+        allocated.allocated_office_space = office
+        unallocated = Staff("unallocated", "staff", person_id=6)
+        self.amity.fellows = [both, office_only, living_only, neither]
+        self.amity.staff = [allocated, unallocated]
+        self.columns = PeopleColumns.from_amity(self.amity, self.use_numpy)
+
+    def test_filters_match_memory(self):
+        queries = ColumnQueries(self.columns)
+        for query in self.queries:
+            self.assertEqual(
+                [person.person_id for person in getattr(queries, query)()],
+                [person.person_id for person in getattr(self.amity, query)()],
+                query)
+
+    def test_amity_query_columns(self):
+        self.amity.query_columns(self.columns)
+        staff = self.amity.get_allocated_staff()
+        self.assertEqual([person.person_id for person in staff], [5])
+        self.assertIsNot(staff[0], self.amity.staff.find(5))
+        self.amity.query_memory()
+        self.assertIs(self.amity.get_allocated_staff()[0],
+                      self.amity.staff.find(5))
+
+    def test_amity_query_columns_of_a_saved_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "amity.db").touch()
+            self.amity.save_state("amity.db", directory, override=True)
+            amity = Amity(logger=SilentLogger())
+            self.assertIsNone(amity.query_columns(database_name="amity.db",
+                                                  path=directory))
+            amity.connections.close_all()
+        for query in self.queries:
+            self.assertEqual(
+                [person.person_id for person in getattr(amity, query)()],
+                [person.person_id for person in getattr(self.amity, query)()],
+                query)
+        self.assertEqual(amity.get_all_people(), [])
+        self.assertEqual(amity.query_columns(database_name="missing.db"),
+                         Config.error_codes[18] + " 'missing.db'")
+
+    def test_amity_query_columns_uses_empty_columns_given(self):
+        self.amity.query_columns(PeopleColumns(self.use_numpy))
+        self.assertEqual(self.amity.get_allocated_staff(), [])
+
+    def test_views_have_rooms_with_occupant_counts(self):
+        people = ColumnQueries(self.columns).get_people_allocated_room(
+            "HOGWARTS")
+        self.assertEqual([person.person_id for person in people], [1, 2, 5])
+        self.assertEqual(people[0].allocated_office_space.name, "Hogwarts")
+        self.assertEqual(people[0].allocated_office_space.num_of_occupants, 3)
+        self.assertEqual(people[0].allocated_living_space.num_of_occupants, 2)
+        self.assertEqual(
+            ColumnQueries(self.columns).get_people_allocated_room("mordor"),
+            "%s: 'mordor'" % Config.error_codes[1])
+
+    def test_from_rows_matches_from_amity(self):
+        rooms = [("Hogwarts", "office"), ("Narnia", "living-space")]
+        people = [(1, "Both", "Rooms", "fellow", "Hogwarts", "Narnia", 1),
+                  (2, "Office", "Only", "fellow", "Hogwarts", None, 1),
+                  (3, "Living", "Only", "fellow", None, "Narnia", 0),
+                  (4, "No", "Rooms", "fellow", None, None, 1),
+                  (5, "Allocated", "Staff", "staff", "Hogwarts", None, 0),
+                  (6, "Unallocated", "Staff", "staff", None, None, 0)]
+        columns = PeopleColumns.from_rows(rooms, people, self.use_numpy)
+        for name in ["person_ids", "first_names", "roles", "offices",
+                     "living_spaces", "wants_accommodation", "room_names"]:
+            self.assertEqual(getattr(columns, name),
+                             getattr(self.columns, name), name)
+
+    def test_names_are_interned(self):
+        columns = PeopleColumns(self.use_numpy)
+        columns.add_person(7, "".join(["Ja", "ke"]), "Surname", 0)
+        columns.add_person(8, "".join(["Jak", "e"]), "Surname", 0)
+        self.assertIs(columns.first_names[0], columns.first_names[1])
+
+
+@unittest.skipIf(columns_module.import_numpy() is None,
+                 "NumPy is not installed")
+class TestPeopleColumnsWithNumpy(TestPeopleColumns):
+    use_numpy = True
+
+    def test_numpy_is_used(self):
+        self.assertTrue(self.columns.use_numpy)
+
+
+if __name__ == '__main__':
+    unittest.main()
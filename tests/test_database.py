@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from models.database import ConnectionManager, Database
+
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.connections = ConnectionManager()
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_file_path = os.path.join(self.directory.name,
+                                               "amity.db")
+
+    def tearDown(self):
+        self.connections.close_all()
+        self.directory.cleanup()
+
+    def test_connect_reuses_connection_to_the_same_file(self):
+        connection = self.connections.connect(self.database_file_path)
+        self.assertIs(self.connections.connect(self.database_file_path),
+                      connection)
+        self.assertIs(self.connections.connect(
+            os.path.join(self.directory.name, ".", "amity.db")), connection)
+
+    def test_connect_sets_pragmas(self):
+        connection = self.connections.connect(self.database_file_path)
+        self.assertEqual(
+            connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        # NORMAL
+        self.assertEqual(
+            connection.execute("PRAGMA synchronous").fetchone()[0], 1)
+        self.assertEqual(
+            connection.execute("PRAGMA cache_size").fetchone()[0], -8192)
+
+    def test_connect_does_not_keep_results_that_are_not_connections(self):
+        with patch('sqlite3.connect', return_value="connection failed"):
+            self.assertEqual(
+                self.connections.connect(self.database_file_path),
+                "connection failed")
+        self.assertEqual(self.connections.connections, {})
+
+    def test_connect_reconnects_when_file_is_replaced(self):
+        connection = self.connections.connect(self.database_file_path)
+        self.connections.create_tables(connection)
+        os.remove(self.database_file_path)
+        new_connection = self.connections.connect(self.database_file_path)
+        self.assertIsNot(new_connection, connection)
+        self.assertTrue(self.connections.create_tables(new_connection))
+
+    def test_create_tables_only_creates_tables_once(self):
+        connection = self.connections.connect(self.database_file_path)
+        self.assertTrue(self.connections.create_tables(connection))
+        self.assertFalse(self.connections.create_tables(connection))
+        tables = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        self.assertEqual(sorted(tables), [("people",), ("rooms",)])
+
+    def test_transaction_commits_on_success(self):
+        connection = self.connections.connect(self.database_file_path)
+        self.connections.create_tables(connection)
+        with self.connections.transaction(connection) as cursor:
+            cursor.execute("INSERT INTO rooms (name, type) "
+                           "VALUES ('Hogwarts', 'office')")
+        other_connection = sqlite3.connect(self.database_file_path)
+        rooms = other_connection.execute("SELECT name FROM rooms").fetchall()
+        other_connection.close()
+        self.assertEqual(rooms, [("Hogwarts",)])
+
+    def test_transaction_rolls_back_on_error(self):
+        connection = self.connections.connect(self.database_file_path)
+        self.connections.create_tables(connection)
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.connections.transaction(connection) as cursor:
+                cursor.execute("INSERT INTO rooms (name, type) "
+                               "VALUES ('Hogwarts', 'office')")
+                cursor.execute("INSERT INTO rooms (name, type) "
+                               "VALUES ('Hogwarts', 'office')")
+        self.assertEqual(
+            connection.execute("SELECT * FROM rooms").fetchall(), [])
+
+    def test_each_thread_gets_its_own_connection(self):
+        connection = self.connections.connect(self.database_file_path)
+
+        def connect_and_query():
+            other = self.connections.connect(self.database_file_path)
+            other.execute("SELECT 1").fetchone()
+            self.connections.close_all()
+            return other
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(connect_and_query).result()
+        self.assertIsNot(other, connection)
+        self.assertIs(self.connections.connect(self.database_file_path),
+                      connection)
+
+    def test_connect_replaces_a_closed_connection(self):
+        connection = self.connections.connect(self.database_file_path)
+        connection.close()
+        new_connection = self.connections.connect(self.database_file_path)
+        self.assertIsNot(new_connection, connection)
+        self.assertEqual(new_connection.execute("SELECT 1").fetchone(), (1,))
+
+
+class TestDatabaseSchema(unittest.TestCase):
+    def setUp(self):
+        self.connections = ConnectionManager()
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_file_path = os.path.join(self.directory.name,
+                                               "amity.db")
+
+    def tearDown(self):
+        self.connections.close_all()
+        self.directory.cleanup()
+
+    def create_version_0_database(self):
+        connection = sqlite3.connect(self.database_file_path)
+        connection.executescript('''
+            CREATE TABLE rooms (name varchar(50) PRIMARY KEY,
+                                type varchar(15));
+            CREATE TABLE people (id INTEGER PRIMARY KEY,
+                                 first_name varchar(50) NOT NULL,
+                                 last_name varchar(50) NOT NULL,
+                                 role varchar(50),
+                                 allocated_office_space varchar(50),
+                                 allocated_living_space varchar(50),
+                                 wants_accommodation INTEGER DEFAULT 0);
+            INSERT INTO rooms VALUES ('Hogwarts', 'office');
+            INSERT INTO rooms VALUES ('Python', 'living-space');
+            INSERT INTO people VALUES (1, 'Jake', 'Surname', 'fellow',
+                                       'Hogwarts', 'Python', 1);
+            INSERT INTO people VALUES (2, 'Jane', 'Surname', 'staff',
+                                       'Narnia', NULL, 0);
+        ''')
+        connection.close()
+
+    def saved_database(self):
+        connection = self.connections.connect(self.database_file_path)
+        self.connections.create_tables(connection)
+        with self.connections.transaction(connection) as cursor:
+            Database.insert_room_data(cursor, [("Hogwarts", "office"),
+                                               ("Python", "living-space")])
+            Database.insert_people_data(cursor, [
+                (1, "Jake", "Surname", "fellow", "Hogwarts", "Python", 1),
+                (2, "Jane", "Surname", "staff", "Hogwarts", None, 0)])
+        return connection
+
+    def test_connect_migrates_version_0_database(self):
+        self.create_version_0_database()
+        connection = self.connections.connect(self.database_file_path)
+        cursor = connection.cursor()
+        self.assertEqual(Database.get_schema_version(cursor),
+                         Database.schema_version)
+        self.assertEqual(Database.get_all_rooms(cursor),
+                         [("Hogwarts", "office"), ("Python", "living-space")])
+        # Allocations to rooms that are not in the database are dropped
+        self.assertEqual(Database.get_all_people(cursor), [
+            (1, "Jake", "Surname", "fellow", "Hogwarts", "Python", 1),
+            (2, "Jane", "Surname", "staff", None, None, 0)])
+        self.assertFalse(self.connections.create_tables(connection))
+
+    def test_connect_leaves_databases_without_tables_alone(self):
+        connection = self.connections.connect(self.database_file_path)
+        cursor = connection.cursor()
+        self.assertTrue(Database.database_is_empty(cursor))
+        self.assertIsNone(Database.get_schema_version(cursor))
+
+    def test_connect_refuses_newer_schema_versions(self):
+        self.create_version_0_database()
+        connection = sqlite3.connect(self.database_file_path)
+        connection.execute("PRAGMA user_version = %d"
+                           % (Database.schema_version + 1))
+        connection.close()
+        with self.assertRaises(sqlite3.OperationalError):
+            self.connections.connect(self.database_file_path)
+
+    def test_people_table_indexes_allocations_and_role(self):
+        connection = self.saved_database()
+        indexed_columns = set()
+        for index in connection.execute("PRAGMA index_list(people)"):
+            for column in connection.execute(
+                    "PRAGMA index_info(%s)" % index[1]):
+                indexed_columns.add(column[2])
+        self.assertTrue({"office_id", "living_space_id",
+                         "role"}.issubset(indexed_columns))
+
+    def test_insert_room_data_keeps_room_keys(self):
+        connection = self.saved_database()
+        with self.connections.transaction(connection) as cursor:
+            Database.insert_room_data(cursor, [("Hogwarts", "office")])
+            self.assertEqual(Database.get_all_people(cursor)[1][4],
+                             "Hogwarts")
+
+    def test_deleting_room_clears_allocations(self):
+        connection = self.saved_database()
+        with self.connections.transaction(connection) as cursor:
+            Database.delete_room_data(cursor, ["Hogwarts"])
+            self.assertEqual(Database.get_all_people(cursor), [
+                (1, "Jake", "Surname", "fellow", None, "Python", 1),
+                (2, "Jane", "Surname", "staff", None, None, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
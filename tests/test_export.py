@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from io import BytesIO, StringIO
+
+from models.amity import Amity
+from models.columns import ColumnQueries
+from models.export import Exporter, FIELDS, read_columns
+from models.logger import SilentLogger
+from models.person import Fellow, Staff
+
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.amity = Amity(logger=SilentLogger())
+        self.amity.create_room(["hogwarts"])
+        self.amity.create_room(["narnia"], "living-space")
+        fellow = Fellow("jake", "surname", person_id=1,
+                        wants_accommodation=True,
+                        allocated_living_space=self.amity.living_spaces[0])
+        fellow.allocated_office_space = self.amity.offices[0]
+        self.amity.fellows = [fellow,
+                              Fellow("vader", "surname", person_id=2)]
+        self.amity.staff = [Staff("jane", "surname", person_id=3)]
+        self.exporter = Exporter(self.amity)
+
+    def test_write_csv(self):
+        output = StringIO()
+        self.exporter.write_csv(output)
+        rows = list(csv.reader(StringIO(output.getvalue())))
+        self.assertEqual(rows, [
+            list(FIELDS),
+            ["1", "Jake", "Surname", "fellow", "Hogwarts", "Narnia", "1"],
+            ["2", "Vader", "Surname", "fellow", "", "", "0"],
+            ["3", "Jane", "Surname", "staff", "", "", "0"]])
+
+    def test_write_json_lines(self):
+        output = StringIO()
+        self.exporter.write_json_lines(output)
+        records = [json.loads(line) for line in
+                   output.getvalue().splitlines()]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0], {
+            "person_id": 1, "first_name": "Jake", "last_name": "Surname",
+            "role": "fellow", "office": "Hogwarts", "living_space": "Narnia",
+            "wants_accommodation": True})
+        self.assertIsNone(records[2]["office"])
+
+    def test_columns_round_trip(self):
+        output = BytesIO()
+        self.exporter.write_columns(output)
+        columns = read_columns(BytesIO(output.getvalue()), use_numpy=False)
+        self.assertEqual(list(columns.person_ids), [1, 2, 3])
+        self.assertEqual(columns.room_names, ["Hogwarts", "Narnia"])
+        people = ColumnQueries(columns).get_fellows_allocated_both()
+        self.assertEqual([person.first_name for person in people], ["Jake"])
+        self.assertEqual(people[0].allocated_living_space.name, "Narnia")
+
+    def test_read_columns_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            read_columns(BytesIO(b"person_id,first_name\n"))
+
+    def test_amity_export_people_to_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.amity.export_people("people.jsonl", 'jsonl', directory)
+            with open(os.path.join(directory, "people.jsonl")) as people:
+                self.assertEqual(len(people.readlines()), 3)
+
+    def test_amity_export_people_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.amity.export_people(StringIO(), 'xml')
+        with self.assertRaises(TypeError):
+            self.amity.export_people(42)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from models.parser import ParsedPerson, RejectedLine, RosterParser, \
+    parse_chunk
+
+
+class TestRosterParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = RosterParser()
+
+    def test_parse_line_returns_parsed_person(self):
+        self.assertEqual(self.parser.parse_line("OLUWAFEMI SULE FELLOW Y", 3),
+                         ParsedPerson(3, "OLUWAFEMI", "SULE", "fellow", True))
+        self.assertEqual(self.parser.parse_line("Dominic Walters s\n"),
+                         ParsedPerson(0, "Dominic", "Walters", "staff",
+                                      False))
+
+    def test_parse_line_accepts_all_accommodation_options(self):
+        for option, wants_accommodation in [("Y", True), ("yes", True),
+                                            ("N", False), ("No", False)]:
+            record = self.parser.parse_line("Jake Surname F %s" % option)
+            self.assertEqual(record.wants_accommodation, wants_accommodation)
+
+    def test_parse_line_returns_none_for_badly_formatted_lines(self):
+        for line in ["Jake FELLOW", "Jake Surname Manager",
+                     "Jake Surname FELLOW Maybe", "Jake  Surname FELLOW"]:
+            self.assertIsNone(self.parser.parse_line(line))
+
+    def test_parse_reports_line_numbers_of_rejected_lines(self):
+        lines = ["Jake Surname FELLOW\n", "\n", "Bad line\n",
+                 "Jane Surname STAFF\n"]
+        records = list(self.parser.parse(lines))
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0].line_number, 1)
+        self.assertEqual(records[1], RejectedLine(3, "Bad line"))
+        self.assertEqual(records[2].line_number, 4)
+
+    def test_parse_parses_people_file(self):
+        with open("files/people.in") as people:
+            records = list(self.parser.parse(people))
+        self.assertEqual(len(records), 7)
+        self.assertNotIn(RejectedLine, [type(record) for record in records])
+        self.assertEqual([record.role for record in records].count("staff"),
+                         3)
+
+    def test_parse_chunk_numbers_lines_from_first_line_number(self):
+        records = parse_chunk(["Bad line\n", "Jane Surname STAFF\n"], 11)
+        self.assertEqual(records, [
+            RejectedLine(11, "Bad line"),
+            ParsedPerson(12, "Jane", "Surname", "staff", False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
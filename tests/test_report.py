@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+from models.person import Fellow, Staff
+from models.report import AllocationsReport
+from models.room import LivingSpace, Office
+
+
+class TestAllocationsReport(unittest.TestCase):
+    def setUp(self):
+        self.office = Office("hogwarts")
+        self.living_space = LivingSpace("python")
+        self.empty_office = Office("narnia")
+        self.fellow = Fellow("jake", "surname",
+                             allocated_living_space=self.living_space)
+        self.fellow.allocated_office_space = self.office
+        self.staff = Staff("jane", "surname")
+        self.staff.allocated_office_space = self.office
+        self.report = AllocationsReport.from_people(
+            [self.office, self.empty_office, self.living_space],
+            [self.fellow, self.staff])
+
+    def test_groups_people_by_room_in_room_order(self):
+        self.assertEqual(list(self.report.occupants.items()),
+                         [(self.office, [self.fellow, self.staff]),
+                          (self.empty_office, []),
+                          (self.living_space, [self.fellow])])
+
+    def test_write_to_file_like_object(self):
+        output = StringIO()
+        empty_rooms = self.report.write(output)
+        self.assertEqual(output.getvalue(),
+                         "Hogwarts\n--------\n"
+                         "Jake Surname Fellow\nJane Surname Staff\n\n"
+                         "Python\n------\nJake Surname Fellow\n\n")
+        self.assertEqual(empty_rooms, [self.empty_office])
+
+    def test_write_to_path(self):
+        output = StringIO()
+        self.report.write(output)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "allocations.txt")
+            self.report.write(file_path)
+            with open(file_path) as allocations:
+                self.assertEqual(allocations.read(), output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from models.amity import Amity
+from models.config import Config
+from models.logger import SilentLogger
+from models.person import Fellow, Staff
+from models.snapshot import HEADER, ROOM, Snapshot, write_snapshot
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "amity.snapshot")
+        self.amity = Amity(logger=SilentLogger())
+        self.amity.create_room(["hogwarts", "oculus"])
+        self.amity.create_room(["narnia"], "living-space")
+        fellow = Fellow("jake", "surname", person_id=4,
+                        wants_accommodation=True,
+                        allocated_living_space=self.amity.living_spaces[0])
+        fellow.allocated_office_space = self.amity.offices.find("oculus")
+        staff = Staff("jane", "surname", person_id=9)
+        staff.allocated_office_space = self.amity.offices.find("oculus")
+        self.amity.fellows = [fellow, Fellow("vader", "surname",
+                                             person_id=5)]
+        self.amity.staff = [staff]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_records_are_read_from_the_mapped_file(self):
+        write_snapshot(self.amity, self.file_path)
+        with Snapshot(self.file_path) as snapshot:
+            self.assertEqual(len(snapshot), 3)
+            oculus = self.amity.offices.index(
+                self.amity.offices.find("oculus"))
+            self.assertEqual(snapshot.room(oculus), ("Oculus", 0, 2))
+            self.assertEqual(snapshot.room(2), ("Narnia", 1, 1))
+            self.assertEqual(snapshot.person(0),
+                             (4, "Jake", "Surname", 0, oculus, 2, True))
+            self.assertEqual(snapshot.person(2),
+                             (9, "Jane", "Surname", 1, oculus, -1, False))
+            with self.assertRaises(IndexError):
+                snapshot.person(3)
+
+    def test_load_snapshot_restores_rooms_people_and_allocations(self):
+        self.amity.save_snapshot(self.file_path)
+        amity = Amity(logger=SilentLogger())
+        result = amity.load_snapshot(self.file_path)
+        self.assertEqual(result, {"rooms": 3, "people": 3})
+        self.assertEqual([room.name for room in amity.get_all_rooms()],
+                         [room.name for room in self.amity.get_all_rooms()])
+        self.assertEqual(amity.get_room_object_from_name(
+            "oculus").num_of_occupants, 2)
+        fellow = amity.fellows.find(4)
+        self.assertEqual(fellow.allocated_office_space.name, "Oculus")
+        self.assertEqual(fellow.allocated_living_space.name, "Narnia")
+        self.assertTrue(fellow.wants_accommodation)
+        self.assertEqual(amity.get_people_allocated_room("oculus"),
+                         [fellow, amity.staff.find(9)])
+        self.assertEqual(amity.get_fellows_with_no_allocation(),
+                         [amity.fellows.find(5)])
+        # Restored people still tell their registries about changes
+        fellow.person_id = 6
+        self.assertIs(amity.fellows.find(6), fellow)
+
+    def test_load_snapshot_rejects_room_indices_out_of_range(self):
+        self.amity.save_snapshot(self.file_path)
+        with open(self.file_path, 'rb') as file_r:
+            data = bytearray(file_r.read())
+        people_offset = HEADER.size + ROOM.size * 3
+        for office in (3, -2):
+            # The office field follows the ID and the two names
+            struct.pack_into("<i", data, people_offset + 16, office)
+            with open(self.file_path, 'wb') as file_w:
+                file_w.write(data)
+            amity = Amity(logger=SilentLogger())
+            self.assertEqual(amity.load_snapshot(self.file_path),
+                             "Room index %s out of range" % office)
+            self.assertFalse(amity.get_all_rooms())
+            self.assertFalse(amity.get_all_people())
+        # A living space is not an office
+        struct.pack_into("<i", data, people_offset + 16, 2)
+        with open(self.file_path, 'wb') as file_w:
+            file_w.write(data)
+        self.assertEqual(Amity(logger=SilentLogger()).load_snapshot(
+            self.file_path), "Room index 2 has the wrong room type")
+
+    def test_load_snapshot_needs_an_empty_amity(self):
+        self.amity.save_snapshot(self.file_path)
+        self.assertEqual(self.amity.load_snapshot(self.file_path),
+                         "Snapshots can only be loaded into an empty Amity")
+
+    def test_load_snapshot_rejects_missing_and_invalid_files(self):
+        amity = Amity(logger=SilentLogger())
+        self.assertEqual(amity.load_snapshot("missing", self.directory.name),
+                         "%s '%s/missing'" % (Config.error_codes[12],
+                                              self.directory.name))
+        with open(self.file_path, 'wb') as file_w:
+            file_w.write(b"SQLite format 3\x00" + bytes(100))
+        self.assertIn("Not an Amity snapshot",
+                      amity.load_snapshot(self.file_path))
+        self.assertFalse(amity.get_all_people())
+
+
+if __name__ == '__main__':
+    unittest.main()